@@ -62,8 +62,8 @@ class CourseContentAdmin(admin.ModelAdmin):
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ('get_content', 'get_user', 'comment_preview', 'created_at')
-    list_filter = ('created_at',)
+    list_display = ('get_content', 'get_user', 'comment_preview', 'is_approved', 'created_at')
+    list_filter = ('is_approved', 'created_at')
     search_fields = ('comment', 'content_id__name', 'member_id__user_id__username')
     readonly_fields = ('created_at', 'updated_at')
     raw_id_fields = ('content_id', 'member_id')
@@ -127,4 +127,39 @@ class CourseCreationLimitAdmin(admin.ModelAdmin):
 class ContentCreationLimitAdmin(admin.ModelAdmin):
     list_display = ('teacher', 'content_count', 'hour_started')
     list_filter = ('teacher',)
-    search_fields = ('teacher__username',)
\ No newline at end of file
+    search_fields = ('teacher__username',)
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'content', 'uploaded_by', 'total_size', 'status', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('filename', 'uploaded_by__username')
+    raw_id_fields = ('content', 'uploaded_by')
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'created_at')
+    search_fields = ('name', 'digest')
+    readonly_fields = ('name', 'digest', 'size', 'created_at', 'updated_at')
+
+@admin.register(SyncTombstone)
+class SyncTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('model', 'object_id', 'course_id', 'user_id', 'deleted_at')
+    list_filter = ('model',)
+    readonly_fields = ('model', 'object_id', 'course_id', 'user_id', 'deleted_at')
+
+@admin.register(CourseDailyStats)
+class CourseDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('course', 'date', 'enrollments', 'completions', 'comments', 'feedback_count', 'rating_sum')
+    list_filter = ('date',)
+    raw_id_fields = ('course',)
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('source', 'last_id', 'updated_at')
+    readonly_fields = ('source', 'last_id', 'updated_at')
+
+@admin.register(CourseRecommendation)
+class CourseRecommendationAdmin(admin.ModelAdmin):
+    list_display = ('course', 'rank', 'recommended', 'score', 'common_students')
+    raw_id_fields = ('course', 'recommended')
@@ -0,0 +1,273 @@
+"""Per-course completion matrix kept in memory for vectorized progress analytics
+
+One row per course member and one bit per content (columns in content id
+order), packed with NumPy so 50k students × 1k contents take about 6 MB. A
+matrix is loaded in one pass over members, contents and completions, then
+kept up to date by the completion endpoints; enrollments and content
+creation/deletion drop it (see signals.py). Matrices live in the process
+for COMPLETION_MATRIX_TTL seconds, which also bounds how stale a worker
+gets when another process records a completion.
+
+The drop-off funnel is built from the database rather than from a matrix
+that may be stale in this process, and goes to the shared cache keyed by a
+per-course version (bumped on commit by completion and enrollment signals)
+and by the current content order, so reordering or editing contents yields a
+new entry.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import orjson
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from lms_core.models import ContentCompletion, CourseContent, CourseMember
+
+# Set bits per byte value
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+# Rows unpacked at a time when summing per content, bounds the temporary array
+UNPACK_ROWS = 4096
+
+_matrices = OrderedDict()
+# Bumped on every write, so a matrix loaded while a write happened is not cached
+_generations = {}
+_lock = threading.Lock()
+
+class CompletionMatrix:
+    def __init__(self, course_id, student_ids, content_ids, bits):
+        self.course_id = course_id
+        self.student_ids = student_ids
+        self.content_ids = content_ids
+        self.bits = bits
+
+    @classmethod
+    def load(cls, course_id):
+        student_ids = np.array(
+            CourseMember.objects.filter(course_id=course_id).order_by('user_id').values_list('user_id', flat=True),
+            dtype=np.int64,
+        )
+        content_ids = np.array(
+            CourseContent.objects.filter(course_id=course_id).order_by('id').values_list('id', flat=True),
+            dtype=np.int64,
+        )
+        bits = np.zeros((len(student_ids), (len(content_ids) + 7) // 8), dtype=np.uint8)
+
+        pairs = np.array(
+            ContentCompletion.objects.filter(content__course_id=course_id).values_list('student_id', 'content_id'),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        rows, row_found = cls._positions(student_ids, pairs[:, 0])
+        columns, column_found = cls._positions(content_ids, pairs[:, 1])
+        # Completions of former members are not part of the matrix
+        found = row_found & column_found
+        rows, columns = rows[found], columns[found]
+        np.bitwise_or.at(bits, (rows, columns >> 3), (0x80 >> (columns & 7)).astype(np.uint8))
+        return cls(course_id, student_ids, content_ids, bits)
+
+    @staticmethod
+    def _positions(sorted_ids, ids):
+        positions = np.searchsorted(sorted_ids, ids)
+        clipped = np.minimum(positions, max(len(sorted_ids) - 1, 0))
+        found = (positions < len(sorted_ids)) & (sorted_ids[clipped] == ids) if len(sorted_ids) else positions < 0
+        return clipped, found
+
+    def _cell(self, student_id, content_id):
+        row, row_found = self._positions(self.student_ids, np.array([student_id]))
+        column, column_found = self._positions(self.content_ids, np.array([content_id]))
+        if not (row_found[0] and column_found[0]):
+            return None
+        return int(row[0]), int(column[0])
+
+    def set(self, student_id, content_id, completed):
+        """Flip one cell, False if the student or content is not part of the matrix"""
+        cell = self._cell(student_id, content_id)
+        if cell is None:
+            return False
+        row, column = cell
+        mask = 0x80 >> (column & 7)
+        if completed:
+            self.bits[row, column >> 3] |= mask
+        else:
+            self.bits[row, column >> 3] &= ~mask & 0xFF
+        return True
+
+    @property
+    def shape(self):
+        return len(self.student_ids), len(self.content_ids)
+
+    def total_completions(self):
+        return int(POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def completion_rate(self):
+        """Completed cells over members × contents, in percent"""
+        students, contents = self.shape
+        if not students or not contents:
+            return 0.0
+        return self.total_completions() / (students * contents) * 100
+
+    def completed_per_student(self):
+        return POPCOUNT[self.bits].sum(axis=1, dtype=np.int64)
+
+    def completed_per_content(self):
+        counts = np.zeros(len(self.content_ids), dtype=np.int64)
+        for start in range(0, len(self.student_ids), UNPACK_ROWS):
+            chunk = self.bits[start:start + UNPACK_ROWS]
+            counts += np.unpackbits(chunk, axis=1, count=len(self.content_ids)).sum(axis=0, dtype=np.int64)
+        return counts
+
+    def content_rates(self):
+        """{content_id: share of members who completed it, 0..1}"""
+        if not len(self.student_ids):
+            return {int(content_id): 0.0 for content_id in self.content_ids}
+        rates = self.completed_per_content() / len(self.student_ids)
+        return dict(zip(self.content_ids.tolist(), rates.tolist()))
+
+    def students_completing(self, content_ids):
+        """Ids of members who completed every one of ``content_ids``"""
+        columns, found = self._positions(self.content_ids, np.asarray(list(content_ids), dtype=np.int64))
+        columns = columns[found]
+        mask = np.zeros(self.bits.shape[1], dtype=np.uint8)
+        np.bitwise_or.at(mask, columns >> 3, (0x80 >> (columns & 7)).astype(np.uint8))
+        complete = ((self.bits & mask) == mask).all(axis=1)
+        return self.student_ids[complete].tolist()
+
+def get_completion_matrix(course_id):
+    ttl = getattr(settings, 'COMPLETION_MATRIX_TTL', 300)
+    now = time.monotonic()
+    with _lock:
+        entry = _matrices.get(course_id)
+        if entry is not None and now - entry[1] < ttl:
+            _matrices.move_to_end(course_id)
+            return entry[0]
+        generation = _generations.get(course_id, 0)
+
+    matrix = CompletionMatrix.load(course_id)
+    with _lock:
+        if _generations.get(course_id, 0) != generation:
+            return matrix
+        _matrices[course_id] = (matrix, now)
+        _matrices.move_to_end(course_id)
+        while len(_matrices) > getattr(settings, 'COMPLETION_MATRIX_MAX_COURSES', 256):
+            _matrices.popitem(last=False)
+    return matrix
+
+def invalidate_completion_matrix(course_id):
+    with _lock:
+        _generations[course_id] = _generations.get(course_id, 0) + 1
+        _matrices.pop(course_id, None)
+
+def record_completion(course_id, student_id, content_id, completed):
+    """Apply one completion write to the cached matrix of the course, if loaded"""
+    with _lock:
+        _generations[course_id] = _generations.get(course_id, 0) + 1
+        entry = _matrices.get(course_id)
+        if entry is not None and not entry[0].set(student_id, content_id, completed):
+            del _matrices[course_id]
+
+def funnel_version_key(course_id):
+    return f"funnel-version:{course_id}"
+
+def bump_funnel_version(course_id):
+    # After commit, so a funnel built meanwhile is not cached under the new version
+    transaction.on_commit(lambda: cache.set(funnel_version_key(course_id), uuid.uuid4().hex, None))
+
+def _median(values):
+    return float(np.median(values)) if len(values) else None
+
+def completion_steps(course_id, student_ids, content_ids):
+    """One pass over the course's completions by ``student_ids`` (sorted)
+
+    Returns the completions per content in ``content_ids`` order and the median
+    seconds between consecutive completions, per step in course order and
+    overall in time order.
+    """
+    rows = ContentCompletion.objects.filter(content__course_id=course_id).values_list(
+        'student_id', 'content_id', 'completed_at'
+    )
+    students, contents, times = [], [], []
+    for student_id, content_id, completed_at in rows.iterator(chunk_size=getattr(settings, 'GRADEBOOK_CHUNK_SIZE', 2000)):
+        students.append(student_id)
+        contents.append(content_id)
+        times.append(completed_at.timestamp())
+    students = np.array(students, dtype=np.int64)
+    contents = np.array(contents, dtype=np.int64)
+    times = np.array(times, dtype=np.float64)
+
+    # Step of each completion in course order; completions of former members are left out
+    order = np.asarray(content_ids, dtype=np.int64)
+    sorter = np.argsort(order)
+    positions, found = CompletionMatrix._positions(order[sorter], contents)
+    _, member = CompletionMatrix._positions(student_ids, students)
+    keep = found & member
+    students, times, steps = students[keep], times[keep], sorter[positions[keep]]
+    completed = np.bincount(steps, minlength=len(order)).tolist()
+
+    step_medians = [None] * len(order)
+    by_step = np.lexsort((steps, students))
+    s, st, t = students[by_step], steps[by_step], times[by_step]
+    # A student's completion of step k following their completion of step k-1
+    follows = (s[1:] == s[:-1]) & (st[1:] == st[:-1] + 1) & (t[1:] >= t[:-1])
+    gap_steps, gaps = st[1:][follows], (t[1:] - t[:-1])[follows]
+    if len(gaps):
+        grouped = np.argsort(gap_steps, kind='stable')
+        gap_steps, gaps = gap_steps[grouped], gaps[grouped]
+        unique_steps, starts = np.unique(gap_steps, return_index=True)
+        for step, step_gaps in zip(unique_steps.tolist(), np.split(gaps, starts[1:])):
+            step_medians[step] = _median(step_gaps)
+
+    by_time = np.lexsort((times, students))
+    s, t = students[by_time], times[by_time]
+    overall = _median((t[1:] - t[:-1])[s[1:] == s[:-1]])
+    return completed, step_medians, overall
+
+def build_funnel(course_id, contents):
+    student_ids = np.array(
+        CourseMember.objects.filter(course_id=course_id).order_by('user_id').values_list('user_id', flat=True),
+        dtype=np.int64,
+    )
+    total_students = len(student_ids)
+    completed, step_medians, overall = completion_steps(
+        course_id, student_ids, [content_id for content_id, _, _ in contents]
+    )
+
+    steps = []
+    previous_rate = None
+    for index, (content_id, name, status) in enumerate(contents):
+        count = completed[index]
+        rate = count / total_students * 100 if total_students else 0.0
+        steps.append({
+            "position": index + 1,
+            "content_id": content_id,
+            "name": name,
+            "status": status,
+            "completed": count,
+            "completion_rate": rate,
+            "drop_off": previous_rate - rate if previous_rate is not None else 0.0,
+            "median_seconds_from_previous": step_medians[index],
+        })
+        previous_rate = rate
+    return {
+        "total_students": total_students,
+        "steps": steps,
+        "median_seconds_between_completions": overall,
+    }
+
+def get_course_funnel(course_id):
+    """Per-content completion rates in course order with completion gaps, cached per course"""
+    contents = list(CourseContent.objects.filter(course_id=course_id).order_by('position', 'id').values_list(
+        'id', 'name', 'status'
+    ))
+    version = cache.get(funnel_version_key(course_id))
+    fingerprint = hashlib.sha256(orjson.dumps([version, contents])).hexdigest()
+    key = f"funnel:{course_id}:{fingerprint}"
+    funnel = cache.get(key)
+    if funnel is None:
+        funnel = build_funnel(course_id, contents)
+        cache.set(key, funnel, getattr(settings, 'FUNNEL_CACHE_TIMEOUT', 3600))
+    return funnel
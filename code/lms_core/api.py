@@ -1,20 +1,90 @@
+import os
+from uuid import UUID
+
 from ninja import NinjaAPI, UploadedFile, File
 from ninja.responses import Response
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, aget_object_or_404
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
 
 from lms_core.schema import *
 from lms_core.models import *
 from lms_core.utils import *
+from lms_core.certificates import render_certificate_html, stream_certificates_zip
+from lms_core.workers import get_process_pool, run_in_background
+from lms_core.images import schedule_image_variants, clear_image_variants
+from lms_core.downloads import serve_file
+from lms_core.uploads import write_part, received_parts, assemble_upload, remove_assembled, discard_upload
+from lms_core.fieldsets import build_plan, parse_paths, EXPAND_ALL
+from lms_core.compact import compact_payload
+from lms_core.projection import project
+from lms_core.renderers import NegotiatingNinjaAPI
+from lms_core.batch import run_batch
+from lms_core.sync import sync_changes, read_token
+from lms_core.events import event_stream, publish_course_event, schedule_announcement, cancel_scheduled_announcement
+from lms_core.feed import get_feed, bump_version
+from lms_core.positions import REBALANCE_LENGTH, key_between, keys_between
+from lms_core.cloning import clone_course_row, clone_course_contents
+from lms_core.gradebook import stream_csv, stream_jsonl
+from lms_core.analytics import get_completion_matrix, record_completion, get_course_funnel
+from lms_core.rollups import course_timeseries
+from lms_core.ratings import apply_rating_change
+from lms_core.recommendations import get_recommendations
+from lms_core.catalog import catalog_count
 from ninja_simple_jwt.auth.views.api import mobile_auth_router
 from ninja_simple_jwt.auth.ninja_auth import HttpJwtAuth
 from ninja.pagination import paginate, PageNumberPagination
 from rest_framework_simplejwt.tokens import RefreshToken
 
-apiv1 = NinjaAPI()
+apiv1 = NegotiatingNinjaAPI(
+    renderer=import_string(settings.API_RENDERER)(),
+    parser=import_string(settings.API_PARSER)()
+)
 apiv1.add_router("/auth/", mobile_auth_router)
 apiAuth = JWTAuth()
 
+def fieldset_response(request, queryset, schema, fields=None, expand=None, compact=False):
+    """Apply ?fields=, ?expand= and ?compact= to a list endpoint
+
+    Without any of them every relation is embedded (joined in the same query)
+    and the queryset is validated against the endpoint schema as usual.
+    ``compact`` returns each embedded object once in an ``included`` map.
+    """
+    if compact:
+        return apiv1.create_response(request, compact_payload(queryset, schema, parse_paths(fields)), status=200)
+    if fields is None and expand is None:
+        return build_plan(schema, queryset.model, None, EXPAND_ALL).apply(queryset)
+    plan = build_plan(schema, queryset.model, parse_paths(fields), parse_paths(expand) or frozenset())
+    return apiv1.create_response(request, plan.serialize(queryset), status=200)
+
+def projection_response(request, queryset, schema):
+    """Read-only list fast path: rows go from .values() straight to the renderer"""
+    return apiv1.create_response(request, project(queryset, schema), status=200)
+
+def paginated_projection_response(request, queryset, schema, page, count, page_size=10):
+    """Same as projection_response with PageNumberPagination's {items, count} shape plus has_next
+
+    One extra row is fetched to tell whether another page follows; ``count()``
+    returns the total and is only called when the page does not settle it.
+    """
+    if page < 1:
+        raise HttpError(400, "Page must be 1 or greater")
+    offset = (page - 1) * page_size
+    items = project(queryset[offset:offset + page_size + 1], schema)
+    has_next = len(items) > page_size
+    if has_next:
+        del items[page_size:]
+    data = {
+        "items": items,
+        "count": offset + len(items) if not has_next and (items or not offset) else count(),
+        "has_next": has_next
+    }
+    return apiv1.create_response(request, data, status=200)
+
 # =================== USER PROFILE MANAGEMENT ===================
 
 def generate_tokens_for_user(user):
@@ -62,7 +132,9 @@ def register_user(request, data: UserRegisterIn, profile_picture: UploadedFile =
     if profile_picture:
         profile_data['profile_picture'] = profile_picture
     
-    UserProfile.objects.create(**profile_data)
+    profile = UserProfile.objects.create(**profile_data)
+    if profile_picture:
+        schedule_image_variants(profile, 'profile_picture')
 
     token = generate_tokens_for_user(user)
     
@@ -77,7 +149,7 @@ def register_user(request, data: UserRegisterIn, profile_picture: UploadedFile =
         "message": "Registrasi berhasil"
     }
 
-@apiv1.get("/profile/{user_id}", response=UserFullProfileOut, auth=apiAuth)
+@apiv1.get("/profile/{int:user_id}", response=UserFullProfileOut, auth=apiAuth)
 def show_profile(request, user_id: int):
 
     """Show full profile of a user including courses"""
@@ -92,6 +164,9 @@ def show_profile(request, user_id: int):
             "phone_number": profile.phone_number,
             "description": profile.description,
             "profile_picture": profile.profile_picture.url if profile.profile_picture else None,
+            "profile_picture_thumbnail": profile.profile_picture_thumbnail.url if profile.profile_picture_thumbnail else None,
+            "profile_picture_card": profile.profile_picture_card.url if profile.profile_picture_card else None,
+            "profile_picture_full": profile.profile_picture_full.url if profile.profile_picture_full else None,
         }
     
     # Get courses enrolled and created
@@ -133,8 +208,11 @@ def edit_profile(request, data: UserProfileIn, profile_picture: UploadedFile = F
         profile.description = data.description
     if profile_picture:
         profile.profile_picture = profile_picture
+        clear_image_variants(profile, 'profile_picture')
     
     profile.save()
+    if profile_picture:
+        schedule_image_variants(profile, 'profile_picture')
     
     return {"message": "Profile updated successfully"}
 
@@ -153,7 +231,7 @@ def create_category(request, data: CourseCategoryIn):
 @apiv1.get("/categories", response=List[CourseCategoryOut])
 def list_categories(request):
     """List all categories"""
-    return CourseCategory.objects.all()
+    return projection_response(request, CourseCategory.objects.all(), CourseCategoryOut)
 
 @apiv1.delete("/categories/{category_id}", response=MessageResponse, auth=apiAuth)
 def delete_category(request, category_id: int):
@@ -183,10 +261,11 @@ def create_announcement(request, course_id: int, data: CourseAnnouncementIn):
         created_by=request.auth,
         publish_date=data.publish_date
     )
+    schedule_announcement(announcement)
     return announcement
 
 @apiv1.get("/courses/{course_id}/announcements", response=List[CourseAnnouncementOut], auth=apiAuth)
-def list_announcements(request, course_id: int):
+def list_announcements(request, course_id: int, fields: str = None, expand: str = None, compact: bool = False):
     """List course announcements"""
     course = get_object_or_404(Course, id=course_id)
     
@@ -199,7 +278,9 @@ def list_announcements(request, course_id: int):
         course=course,
         publish_date__lte=timezone.now()
     )
-    return announcements
+    if fields is None and expand is None and not compact:
+        return projection_response(request, announcements, CourseAnnouncementOut)
+    return fieldset_response(request, announcements, CourseAnnouncementOut, fields, expand, compact)
 
 @apiv1.put("/courses/{course_id}/announcements/{announcement_id}", response=CourseAnnouncementOut, auth=apiAuth)
 def update_announcement(request, course_id: int, announcement_id: int, data: CourseAnnouncementUpdate):
@@ -214,10 +295,16 @@ def update_announcement(request, course_id: int, announcement_id: int, data: Cou
         announcement.title = data.title
     if data.content is not None:
         announcement.content = data.content
+    previous_publish_date = announcement.publish_date
     if data.publish_date is not None:
         announcement.publish_date = data.publish_date
     
     announcement.save()
+    if announcement.publish_date != previous_publish_date:
+        schedule_announcement(announcement)
+    elif announcement.publish_date <= timezone.now():
+        # Already pushed: tell connected clients about the edit, not a new announcement
+        publish_course_event(course.id, 'announcement_updated', CourseAnnouncementOut.from_orm(announcement).model_dump())
     return announcement
 
 @apiv1.delete("/courses/{course_id}/announcements/{announcement_id}", response=MessageResponse, auth=apiAuth)
@@ -229,6 +316,8 @@ def delete_announcement(request, course_id: int, announcement_id: int):
     if not is_teacher_of_course(request.auth, course):
         raise HttpError(403, "Only teachers can delete announcements")
     
+    publish_course_event(course.id, 'announcement_deleted', {"id": announcement.id})
+    transaction.on_commit(lambda: cancel_scheduled_announcement(announcement_id))
     announcement.delete()
     return {"message": "Announcement deleted successfully"}
 
@@ -255,10 +344,11 @@ def mark_content_complete(request, content_id: int):
     if not created:
         raise HttpError(400, "Content already marked as completed")
     
+    transaction.on_commit(lambda: record_completion(content.course_id_id, request.auth.id, content.id, True))
     return completion
 
 @apiv1.get("/courses/{course_id}/completions", response=List[ContentCompletionOut], auth=apiAuth)
-def list_completions(request, course_id: int):
+def list_completions(request, course_id: int, fields: str = None, expand: str = None, compact: bool = False):
     """List user's completions for a course"""
     course = get_object_or_404(Course, id=course_id)
     
@@ -269,7 +359,7 @@ def list_completions(request, course_id: int):
         student=request.auth,
         content__course_id=course
     )
-    return completions
+    return fieldset_response(request, completions, ContentCompletionOut, fields, expand, compact)
 
 @apiv1.delete("/content/{content_id}/complete", response=MessageResponse, auth=apiAuth)
 def remove_completion(request, content_id: int):
@@ -278,6 +368,7 @@ def remove_completion(request, content_id: int):
     
     completion = get_object_or_404(ContentCompletion, student=request.auth, content=content)
     completion.delete()
+    transaction.on_commit(lambda: record_completion(content.course_id_id, request.auth.id, content.id, False))
     
     return {"message": "Completion removed successfully"}
 
@@ -291,49 +382,68 @@ def create_feedback(request, course_id: int, data: CourseFeedbackIn):
     if not is_member_of_course(request.auth, course):
         raise HttpError(403, "You must be enrolled in this course")
     
-    feedback, created = CourseFeedback.objects.update_or_create(
-        student=request.auth,
-        course=course,
-        defaults={
-            'rating': data.rating,
-            'feedback_text': data.feedback_text
-        }
-    )
+    with transaction.atomic():
+        # The course row lock serializes first submissions too, when there is no feedback row to lock
+        Course.objects.select_for_update().filter(id=course.id).values_list('id', flat=True).first()
+        previous_rating = CourseFeedback.objects.filter(
+            student=request.auth, course=course
+        ).values_list('rating', flat=True).first()
+        feedback, created = CourseFeedback.objects.update_or_create(
+            student=request.auth,
+            course=course,
+            defaults={
+                'rating': data.rating,
+                'feedback_text': data.feedback_text
+            }
+        )
+        apply_rating_change(course.id, None if created else previous_rating, feedback.rating)
     
     return feedback
 
 @apiv1.get("/courses/{course_id}/feedback", response=List[CourseFeedbackOut], auth=apiAuth)
-def list_feedback(request, course_id: int):
-    """List all feedback for a course"""
+def list_feedback(request, course_id: int, page: int = 1, fields: str = None, expand: str = None, compact: bool = False):
+    """List feedback for a course, newest first, one page at a time (total in course.rating_count)"""
     course = get_object_or_404(Course, id=course_id)
     
     # Only teacher and enrolled students can view feedback
     if not (is_teacher_of_course(request.auth, course) or is_member_of_course(request.auth, course)):
         raise HttpError(403, "Access denied")
-    
-    feedback = CourseFeedback.objects.filter(course=course)
-    return feedback
+    if page < 1:
+        raise HttpError(400, "Page must be 1 or greater")
+    
+    page_size = getattr(settings, 'FEEDBACK_PAGE_SIZE', 20)
+    offset = (page - 1) * page_size
+    feedback = CourseFeedback.objects.filter(course=course).order_by('-created_at', '-id')[offset:offset + page_size]
+    if fields is None and expand is None and not compact:
+        return projection_response(request, feedback, CourseFeedbackOut)
+    return fieldset_response(request, feedback, CourseFeedbackOut, fields, expand, compact)
 
 @apiv1.put("/courses/{course_id}/feedback", response=CourseFeedbackOut, auth=apiAuth)
 def update_feedback(request, course_id: int, data: CourseFeedbackUpdate):
     """Update own feedback"""
     course = get_object_or_404(Course, id=course_id)
-    feedback = get_object_or_404(CourseFeedback, student=request.auth, course=course)
     
-    if data.rating is not None:
-        feedback.rating = data.rating
-    if data.feedback_text is not None:
-        feedback.feedback_text = data.feedback_text
-    
-    feedback.save()
+    with transaction.atomic():
+        feedback = get_object_or_404(CourseFeedback.objects.select_for_update(), student=request.auth, course=course)
+        previous_rating = feedback.rating
+        if data.rating is not None:
+            feedback.rating = data.rating
+        if data.feedback_text is not None:
+            feedback.feedback_text = data.feedback_text
+        
+        feedback.save()
+        apply_rating_change(course.id, previous_rating, feedback.rating)
     return feedback
 
 @apiv1.delete("/courses/{course_id}/feedback", response=MessageResponse, auth=apiAuth)
 def delete_feedback(request, course_id: int):
     """Delete own feedback"""
     course = get_object_or_404(Course, id=course_id)
-    feedback = get_object_or_404(CourseFeedback, student=request.auth, course=course)
-    feedback.delete()
+    
+    with transaction.atomic():
+        feedback = get_object_or_404(CourseFeedback.objects.select_for_update(), student=request.auth, course=course)
+        # The rating summary is updated by the post_delete receiver
+        feedback.delete()
     
     return {"message": "Feedback deleted successfully"}
 
@@ -361,10 +471,10 @@ def create_bookmark(request, content_id: int):
     return bookmark
 
 @apiv1.get("/bookmarks", response=List[ContentBookmarkOut], auth=apiAuth)
-def list_bookmarks(request):
+def list_bookmarks(request, fields: str = None, expand: str = None, compact: bool = False):
     """List user's bookmarks"""
     bookmarks = ContentBookmark.objects.filter(student=request.auth)
-    return bookmarks
+    return fieldset_response(request, bookmarks, ContentBookmarkOut, fields, expand, compact)
 
 @apiv1.delete("/content/{content_id}/bookmark", response=MessageResponse, auth=apiAuth)
 def delete_bookmark(request, content_id: int):
@@ -397,13 +507,66 @@ def create_course(request, data: CourseSchemaIn, image: UploadedFile = File(None
         course_data['image'] = image
     
     course = Course.objects.create(**course_data)
+    if image:
+        schedule_image_variants(course, 'image')
     return course
 
-@apiv1.get("/courses", response=List[CourseSchemaOut])
-@paginate(PageNumberPagination, page_size=10)
-def list_courses(request):
-    """List all courses"""
-    return Course.objects.all()
+@apiv1.post("/courses/{course_id}/clone", response={200: CourseCloneOut, 202: CourseCloneOut}, auth=apiAuth)
+def clone_course(request, course_id: int, data: CourseCloneIn):
+    """Copy a course with its content tree, announcements and attachments (teacher only)"""
+    source = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, source):
+        raise HttpError(403, "Only the teacher can clone this course")
+    
+    total = CourseContent.objects.filter(course_id=source).count()
+    with transaction.atomic():
+        # Counted with the clone, a failed clone does not use up the daily limit
+        check_course_creation_limit(request.auth)
+        clone = clone_course_row(source, request.auth, data.name)
+        if total <= getattr(settings, 'COURSE_CLONE_SYNC_LIMIT', 500):
+            clone_course_contents(source.id, clone.id)
+            return 200, {"course": clone, "status": "completed", "contents": total}
+        # Large courses: the course row exists now, its contents follow in the background
+        run_in_background(clone_course_contents, source.id, clone.id)
+    return 202, {"course": clone, "status": "processing", "contents": total}
+
+COURSE_SORTS = {
+    'recent': ('-created_at', '-id'),
+    'popular': ('-enrollment_count', '-id'),
+    'rating': ('-rating_average', '-rating_count', '-id'),
+}
+
+@apiv1.get("/courses", response=CourseListOut)
+def list_courses(request, page: int = 1, category_id: int = None, min_price: int = None, max_price: int = None,
+                 sort: Literal['recent', 'popular', 'rating'] = 'recent'):
+    """List courses, optionally filtered by category and price range"""
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HttpError(400, "min_price must not be greater than max_price")
+    
+    # Each sort (with or without category) walks one of the Course.Meta indexes;
+    # price is in none of them, a price range is checked on the rows walked
+    courses = Course.objects.order_by(*COURSE_SORTS[sort])
+    if category_id is not None:
+        courses = courses.filter(category_id=category_id)
+    if min_price is not None:
+        courses = courses.filter(price__gte=min_price)
+    if max_price is not None:
+        courses = courses.filter(price__lte=max_price)
+    filters = {"category_id": category_id, "min_price": min_price, "max_price": max_price}
+    return paginated_projection_response(
+        request, courses, CourseSchemaOut, page, lambda: catalog_count(courses, filters)
+    )
+
+@apiv1.get("/courses/{course_id}/recommendations", response=List[CourseRecommendationOut], auth=apiAuth)
+def list_course_recommendations(request, course_id: int, limit: int = 10):
+    """Courses most often taken by students of this course (rebuilt offline, served from cache)"""
+    course = get_object_or_404(Course.objects.only('id'), id=course_id)
+    if limit < 1:
+        raise HttpError(400, "Limit must be 1 or greater")
+    
+    items = get_recommendations(course.id, CourseSchemaOut, limit)
+    return apiv1.create_response(request, items, status=200)
 
 @apiv1.get("/courses/{course_id}", response=CourseSchemaOut, auth=apiAuth)
 def get_course(request, course_id: int):
@@ -436,7 +599,7 @@ def list_course_content(request, course_id: int):
     return contents
 
 @apiv1.get("/courses/{course_id}/content", response=List[CourseContentFull], auth=apiAuth)
-def list_course_content(request, course_id: int):
+def list_course_content(request, course_id: int, fields: str = None, expand: str = None, compact: bool = False):
     """List course content with publish status filtering"""
     course = get_object_or_404(Course, id=course_id)
     
@@ -449,7 +612,7 @@ def list_course_content(request, course_id: int):
     if not is_teacher_of_course(request.auth, course):
         contents = contents.filter(status='published')
     
-    return contents
+    return fieldset_response(request, contents, CourseContentFull, fields, expand, compact)
 
 @apiv1.put("/content/{content_id}", response=CourseContentFull, auth=apiAuth)
 def update_content(request, content_id: int, data: CourseContentUpdate, file_attachment: UploadedFile = File(None)):
@@ -473,6 +636,113 @@ def update_content(request, content_id: int, data: CourseContentUpdate, file_att
     content.save()
     return content
 
+@apiv1.get("/content/{content_id}/download", auth=apiAuth)
+def download_content_attachment(request, content_id: int):
+    """Download content attachment with Range and conditional request support"""
+    content = get_object_or_404(CourseContent.objects.select_related('course_id'), id=content_id)
+    
+    if not (is_teacher_of_course(request.auth, content.course_id) or is_member_of_course(request.auth, content.course_id)):
+        raise HttpError(403, "Access denied")
+    
+    if not can_view_content(request.auth, content):
+        raise HttpError(403, "Content is not available")
+    
+    if not content.file_attachment:
+        raise HttpError(404, "Content has no attachment")
+    
+    # Stored names are content digests, offer the content title instead
+    extension = os.path.splitext(content.file_attachment.name)[1]
+    return serve_file(request, content.file_attachment, filename=f"{content.name}{extension}")
+
+# =================== CHUNKED UPLOADS ===================
+
+def upload_status(upload):
+    return {
+        "id": upload.id,
+        "filename": upload.filename,
+        "total_size": upload.total_size,
+        "chunk_size": upload.chunk_size,
+        "total_parts": upload.total_parts,
+        "received_parts": received_parts(upload),
+        "status": upload.status
+    }
+
+def get_own_upload(request, upload_id, queryset=ChunkedUpload.objects):
+    upload = get_object_or_404(queryset, id=upload_id)
+    if upload.uploaded_by_id != request.auth.id:
+        raise HttpError(403, "You can only access your own uploads")
+    return upload
+
+@apiv1.post("/content/{content_id}/uploads", response=ChunkedUploadOut, auth=apiAuth)
+def init_chunked_upload(request, content_id: int, data: ChunkedUploadIn):
+    """Start a resumable chunked upload of a content attachment (teacher only)"""
+    content = get_object_or_404(CourseContent, id=content_id)
+    
+    if not is_teacher_of_course(request.auth, content.course_id):
+        raise HttpError(403, "Only teachers can update content")
+    
+    max_size = getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+    if not 0 < data.total_size <= max_size:
+        raise HttpError(400, f"File size must be between 1 and {max_size} bytes")
+    
+    upload = ChunkedUpload.objects.create(
+        content=content,
+        uploaded_by=request.auth,
+        filename=os.path.basename(data.filename),
+        total_size=data.total_size,
+        chunk_size=getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024),
+        checksum=data.checksum or ''
+    )
+    return upload_status(upload)
+
+@apiv1.get("/uploads/{upload_id}", response=ChunkedUploadOut, auth=apiAuth)
+def get_chunked_upload(request, upload_id: UUID):
+    """Get upload progress, including the parts already received"""
+    return upload_status(get_own_upload(request, upload_id))
+
+@apiv1.put("/uploads/{upload_id}/parts/{part_number}", response=ChunkedUploadPartOut, auth=apiAuth)
+def upload_part(request, upload_id: UUID, part_number: int):
+    """Upload one part as the raw request body (optional X-Chunk-Checksum: SHA-256 hex)"""
+    upload = get_own_upload(request, upload_id)
+    
+    if upload.status != 'pending':
+        raise HttpError(400, "Upload already completed")
+    
+    size, checksum = write_part(upload, part_number, request, request.headers.get('X-Chunk-Checksum'))
+    return {"part_number": part_number, "size": size, "checksum": checksum}
+
+@apiv1.post("/uploads/{upload_id}/complete", response=CourseContentFull, auth=apiAuth)
+def complete_chunked_upload(request, upload_id: UUID):
+    """Assemble the parts and attach the file to the content"""
+    with transaction.atomic():
+        # The row lock makes a concurrent complete wait, then see the new status
+        upload = get_own_upload(request, upload_id, ChunkedUpload.objects.select_for_update())
+        
+        if upload.status != 'pending':
+            raise HttpError(400, "Upload already completed")
+        
+        content = upload.content
+        assembled = assemble_upload(upload)
+        try:
+            content.file_attachment.save(upload.filename, assembled, save=True)
+        finally:
+            remove_assembled(assembled)
+        
+        upload.status = 'completed'
+        upload.save()
+        # Parts stay on disk until the upload is completed, so a failed save can be retried
+        transaction.on_commit(lambda: discard_upload(upload))
+    return content
+
+@apiv1.delete("/uploads/{upload_id}", response=MessageResponse, auth=apiAuth)
+def abort_chunked_upload(request, upload_id: UUID):
+    """Abort an upload and delete its stored parts"""
+    upload = get_own_upload(request, upload_id)
+    discard_upload(upload)
+    upload.delete()
+    
+    return {"message": "Upload aborted successfully"}
+
 @apiv1.patch("/content/{content_id}/publish", response=MessageResponse, auth=apiAuth)
 def toggle_content_publish(request, content_id: int):
     """Toggle content publish status"""
@@ -509,11 +779,12 @@ def create_comment(request, content_id: int, data: CourseCommentIn):
         member_id=member,
         comment=data.comment
     )
+    publish_course_event(content.course_id_id, 'comment', CourseCommentOut.from_orm(comment).model_dump())
     
     return comment
 
 @apiv1.get("/content/{content_id}/comments", response=List[CourseCommentOut], auth=apiAuth)
-def list_comments(request, content_id: int):
+def list_comments(request, content_id: int, fields: str = None, expand: str = None, compact: bool = False):
     """List content comments (only approved for students)"""
     content = get_object_or_404(CourseContent, id=content_id)
     
@@ -529,7 +800,7 @@ def list_comments(request, content_id: int):
     else:
         comments = get_approved_comments(content)
     
-    return comments
+    return fieldset_response(request, comments, CourseCommentOut, fields, expand, compact)
 
 # =================== STATISTICS & ANALYTICS ===================
 
@@ -541,20 +812,12 @@ def get_course_stats(request, course_id: int):
     if not is_teacher_of_course(request.auth, course):
         raise HttpError(403, "Only teachers can view course statistics")
     
-    total_students = CourseMember.objects.filter(course_id=course).count()
-    total_contents = CourseContent.objects.filter(course_id=course).count()
+    # Members, contents and completion rate come from the cached completion matrix
+    matrix = get_completion_matrix(course.id)
+    total_students, total_contents = matrix.shape
+    completion_rate = matrix.completion_rate()
     total_announcements = CourseAnnouncement.objects.filter(course=course).count()
     
-    # Calculate completion rate
-    if total_contents > 0 and total_students > 0:
-        total_possible_completions = total_contents * total_students
-        actual_completions = ContentCompletion.objects.filter(
-            content__course_id=course
-        ).count()
-        completion_rate = (actual_completions / total_possible_completions) * 100
-    else:
-        completion_rate = 0.0
-    
     return {
         "total_students": total_students,
         "total_contents": total_contents,
@@ -626,10 +889,71 @@ def moderate_comment(request, content_id: int, comment_id: int, data: CommentMod
     
     comment.is_approved = data.is_approved
     comment.save()
+    publish_course_event(content.course_id_id, 'comment_moderated', {
+        "id": comment.id,
+        "content_id": content.id,
+        "is_approved": data.is_approved
+    })
+    if data.is_approved:
+        # Subscribers get the approved comment itself, as for a new comment
+        publish_course_event(content.course_id_id, 'comment', CourseCommentOut.from_orm(comment).model_dump())
     
     status = "approved" if data.is_approved else "hidden"
     return {"message": f"Comment {status} successfully"}
 
+@apiv1.post("/courses/{course_id}/comments/moderate", response=CommentBulkModerationOut, auth=apiAuth)
+def bulk_moderate_comments(request, course_id: int, data: CommentBulkModerationIn):
+    """Approve or hide many comments of a course at once (teacher only)"""
+    course = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can moderate comments")
+    
+    filters = {}
+    if data.comment_ids is not None:
+        filters['id__in'] = data.comment_ids
+    if data.content_id is not None:
+        filters['content_id'] = data.content_id
+    if data.author_id is not None:
+        filters['member_id__user_id'] = data.author_id
+    if data.created_after is not None:
+        filters['created_at__gte'] = data.created_after
+    if data.created_before is not None:
+        filters['created_at__lt'] = data.created_before
+    if not filters:
+        raise HttpError(400, "Select comments by ids, content, author or date range")
+    
+    comments = Comment.objects.filter(content_id__course_id=course, **filters).exclude(is_approved=data.is_approved)
+    comment_ids = list(comments.values_list('id', flat=True))
+    # One UPDATE; update() skips auto_now, so updated_at is set here for /sync
+    updated = Comment.objects.filter(id__in=comment_ids).update(
+        is_approved=data.is_approved,
+        updated_at=timezone.now()
+    )
+    if comment_ids:
+        publish_course_event(course.id, 'comments_moderated', {
+            "ids": comment_ids,
+            "is_approved": data.is_approved
+        })
+    if comment_ids and data.is_approved:
+        for comment in project(Comment.objects.filter(id__in=comment_ids).order_by('id'), CourseCommentOut):
+            publish_course_event(course.id, 'comment', comment)
+    
+    status = "approved" if data.is_approved else "hidden"
+    return {"message": f"{updated} comments {status} successfully", "updated": updated}
+
+@apiv1.get("/courses/{course_id}/comments/pending", response=List[CourseCommentOut], auth=apiAuth)
+@paginate(PageNumberPagination, page_size=20)
+def list_pending_comments(request, course_id: int):
+    """Comments waiting for approval, oldest first (teacher only)"""
+    course = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can moderate comments")
+    
+    pending = Comment.objects.filter(content_id__course_id=course, is_approved=False).order_by('created_at', 'id')
+    return build_plan(CourseCommentOut, Comment, None, EXPAND_ALL).apply(pending)
+
 # =================== ENHANCED USER STATS ===================
 
 @apiv1.get("/profile/activity-dashboard", response=UserActivityDashboardOut, auth=apiAuth)
@@ -661,35 +985,53 @@ def get_course_analytics(request, course_id: int):
     if not is_teacher_of_course(request.auth, course):
         raise HttpError(403, "Only teachers can view course analytics")
     
-    total_students = CourseMember.objects.filter(course_id=course).count()
-    total_contents = CourseContent.objects.filter(course_id=course).count()
+    matrix = get_completion_matrix(course.id)
+    total_students, total_contents = matrix.shape
+    completion_rate = matrix.completion_rate()
     total_announcements = CourseAnnouncement.objects.filter(course=course).count()
     total_comments = Comment.objects.filter(content_id__course_id=course).count()
-    total_feedback = CourseFeedback.objects.filter(course=course).count()
-    
-    # Calculate completion rate
-    if total_contents > 0 and total_students > 0:
-        total_possible_completions = total_contents * total_students
-        actual_completions = ContentCompletion.objects.filter(
-            content__course_id=course
-        ).count()
-        completion_rate = (actual_completions / total_possible_completions) * 100
-    else:
-        completion_rate = 0.0
-    
-    # Calculate average rating
-    avg_rating = CourseFeedback.objects.filter(course=course).aggregate(
-        avg_rating=models.Avg('rating')
-    )['avg_rating'] or 0.0
     
     return {
         "total_students": total_students,
         "total_contents": total_contents,
         "total_announcements": total_announcements,
         "total_comments": total_comments,
-        "total_feedback": total_feedback,
+        "total_feedback": course.rating_count,
         "completion_rate": completion_rate,
-        "average_rating": round(avg_rating, 2)
+        "average_rating": round(course.rating_average, 2)
+    }
+
+@apiv1.get("/courses/{course_id}/analytics/funnel", response=CourseFunnelOut, auth=apiAuth)
+def get_course_funnel_analytics(request, course_id: int):
+    """Completion rate of each content in course order, with drop-off and completion gaps (teacher only)"""
+    course = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can view course analytics")
+    
+    return get_course_funnel(course.id)
+
+@apiv1.get("/courses/{course_id}/analytics/timeseries", response=CourseTimeseriesOut, auth=apiAuth)
+def get_course_timeseries(request, course_id: int, interval: Literal['day', 'week'] = 'day',
+                          start: date = None, end: date = None):
+    """Enrollments, completions, comments and feedback per day or week, from the daily rollups (teacher only)"""
+    course = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can view course analytics")
+    
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=29 if interval == 'day' else 7 * 11)
+    if start > end:
+        raise HttpError(400, "start must not be after end")
+    if (end - start).days >= getattr(settings, 'ROLLUP_MAX_DAYS', 366):
+        raise HttpError(400, "Requested range is too long")
+    
+    return {
+        "interval": interval,
+        "start": start,
+        "end": end,
+        "points": course_timeseries(course.id, interval, start, end),
     }
 
 # =================== CONTENT SCHEDULING ===================
@@ -707,6 +1049,113 @@ def schedule_content(request, content_id: int, data: ContentScheduleIn):
     
     return {"message": "Content scheduled successfully"}
 
+# =================== BULK CONTENT OPERATIONS ===================
+
+def get_course_contents(course, content_ids):
+    """Contents of ``course`` by id, 404 if any id is not part of the course"""
+    contents = {content.id: content for content in CourseContent.objects.filter(course_id=course, id__in=content_ids)}
+    missing = sorted(set(content_ids) - set(contents))
+    if missing:
+        raise HttpError(404, f"Content not found in this course: {', '.join(map(str, missing))}")
+    return contents
+
+@apiv1.post("/courses/{course_id}/content/bulk-publish", response=BulkUpdateOut, auth=apiAuth)
+def bulk_publish_content(request, course_id: int, data: ContentBulkPublishIn):
+    """Publish or unpublish many contents at once (teacher only)"""
+    course = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can publish/unpublish content")
+    
+    get_course_contents(course, data.content_ids)
+    updated = CourseContent.objects.filter(course_id=course, id__in=data.content_ids).update(
+        status=data.status,
+        updated_at=timezone.now()
+    )
+    bump_version(course.id)
+    
+    return {"message": f"{updated} contents set to {data.status}", "updated": updated}
+
+@apiv1.post("/courses/{course_id}/content/bulk-schedule", response=BulkUpdateOut, auth=apiAuth)
+def bulk_schedule_content(request, course_id: int, data: ContentBulkScheduleIn):
+    """Set or clear the release time of many contents at once (teacher only)"""
+    course = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can schedule content")
+    
+    contents = get_course_contents(course, [item.content_id for item in data.items])
+    now = timezone.now()
+    for item in data.items:
+        contents[item.content_id].scheduled_release = item.scheduled_release
+        contents[item.content_id].updated_at = now
+    with transaction.atomic():
+        CourseContent.objects.bulk_update(contents.values(), ['scheduled_release', 'updated_at'], batch_size=500)
+    bump_version(course.id)
+    
+    return {"message": f"{len(contents)} contents scheduled successfully", "updated": len(contents)}
+
+@apiv1.post("/courses/{course_id}/content/reorder", response=BulkUpdateOut, auth=apiAuth)
+def reorder_content(request, course_id: int, data: ContentReorderIn):
+    """Set the order of all contents of a course (teacher only)"""
+    course = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can reorder content")
+    
+    if len(set(data.content_ids)) != len(data.content_ids):
+        raise HttpError(400, "Content ids must be unique")
+    contents = get_course_contents(course, data.content_ids)
+    if CourseContent.objects.filter(course_id=course).count() != len(contents):
+        raise HttpError(400, "The new order must list every content of the course")
+    
+    ordered = [contents[content_id] for content_id in data.content_ids]
+    with transaction.atomic():
+        CourseContent.lock_order(course.id)
+        CourseContent.assign_positions(ordered, keys_between(None, None, len(ordered)), timezone.now())
+    bump_version(course.id)
+    
+    return {"message": f"{len(ordered)} contents reordered successfully", "updated": len(ordered)}
+
+@apiv1.post("/content/{content_id}/move", response=CourseContentFull, auth=apiAuth)
+def move_content(request, content_id: int, data: ContentMoveIn):
+    """Move a content right after or before another one; only the moved row changes"""
+    content = get_object_or_404(CourseContent.objects.select_related('course_id'), id=content_id)
+    course = content.course_id
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can reorder content")
+    if (data.after_id is None) == (data.before_id is None):
+        raise HttpError(400, "Provide exactly one of after_id or before_id")
+    
+    anchor_id = data.after_id if data.after_id is not None else data.before_id
+    if anchor_id == content.id:
+        raise HttpError(400, "A content cannot be moved next to itself")
+    try:
+        with transaction.atomic():
+            # Neighbours are read under the course lock, so concurrent moves cannot pick the same key
+            CourseContent.lock_order(course.id)
+            content.position = key_between(*move_bounds(course, content, anchor_id, data.after_id is not None))
+            content.save(update_fields=['position', 'updated_at'])
+            if len(content.position) > REBALANCE_LENGTH:
+                CourseContent.rebalance(course.id)
+                content.refresh_from_db(fields=['position', 'updated_at'])
+    except (IntegrityError, ValueError):
+        # A key taken meanwhile, or neighbours that no longer leave a gap
+        raise HttpError(409, "The content order changed meanwhile, please retry")
+    
+    return content
+
+def move_bounds(course, content, anchor_id, after):
+    """Keys of the two rows ``content`` goes between, next to ``anchor_id``"""
+    anchor = get_course_contents(course, [anchor_id])[anchor_id]
+    siblings = CourseContent.objects.filter(course_id=course).exclude(id=content.id)
+    if after:
+        upper = siblings.filter(position__gt=anchor.position).order_by('position').values_list('position', flat=True).first()
+        return anchor.position, upper
+    lower = siblings.filter(position__lt=anchor.position).order_by('-position').values_list('position', flat=True).first()
+    return lower, anchor.position
+
 # =================== COURSE ENROLLMENT LIMITS ===================
 
 @apiv1.patch("/courses/{course_id}/enrollment-limit", response=MessageResponse, auth=apiAuth)
@@ -769,92 +1218,14 @@ def get_course_certificate(request, course_id: int):
     if completed_contents < total_contents:
         raise HttpError(400, "Course not completed yet")
     
-    # Generate certificate HTML
-    certificate_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Course Completion Certificate</title>
-        <style>
-            body {{ 
-                font-family: 'Georgia', serif; 
-                text-align: center; 
-                padding: 50px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                margin: 0;
-            }}
-            .certificate {{
-                background: white;
-                border: 10px solid #gold;
-                border-radius: 20px;
-                padding: 60px;
-                max-width: 800px;
-                margin: 0 auto;
-                box-shadow: 0 0 30px rgba(0,0,0,0.3);
-            }}
-            .header {{ 
-                font-size: 48px; 
-                color: #2c3e50; 
-                margin-bottom: 20px;
-                font-weight: bold;
-            }}
-            .subheader {{ 
-                font-size: 24px; 
-                color: #7f8c8d; 
-                margin-bottom: 40px;
-            }}
-            .recipient {{ 
-                font-size: 36px; 
-                color: #2980b9; 
-                margin: 30px 0;
-                font-weight: bold;
-            }}
-            .course-title {{ 
-                font-size: 28px; 
-                color: #27ae60; 
-                margin: 20px 0;
-                font-style: italic;
-            }}
-            .completion-date {{ 
-                font-size: 18px; 
-                color: #95a5a6; 
-                margin-top: 40px;
-            }}
-            .signature {{ 
-                margin-top: 60px; 
-                font-size: 16px; 
-                color: #2c3e50;
-            }}
-            .ornament {{ 
-                font-size: 60px; 
-                color: #f1c40f; 
-                margin: 20px 0;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="certificate">
-            <div class="ornament">🏆</div>
-            <div class="header">CERTIFICATE OF COMPLETION</div>
-            <div class="subheader">This is to certify that</div>
-            <div class="recipient">{request.auth.first_name} {request.auth.last_name}</div>
-            <div class="subheader">has successfully completed the course</div>
-            <div class="course-title">"{course.name}"</div>
-            <div class="subheader">with {completed_contents} out of {total_contents} contents completed</div>
-            <div class="completion-date">
-                Completed on: {timezone.now().strftime('%B %d, %Y')}
-            </div>
-            <div class="signature">
-                <hr style="width: 300px; margin: 40px auto;">
-                <strong>{course.teacher.first_name} {course.teacher.last_name}</strong><br>
-                Course Instructor
-            </div>
-            <div class="ornament">✨</div>
-        </div>
-    </body>
-    </html>
-    """
+    certificate_html = render_certificate_html(
+        recipient_name=f"{request.auth.first_name} {request.auth.last_name}",
+        course_name=course.name,
+        teacher_name=f"{course.teacher.first_name} {course.teacher.last_name}",
+        completed_contents=completed_contents,
+        total_contents=total_contents,
+        completion_date=timezone.now()
+    )
     
     return Response(certificate_html, content_type="text/html")
 
@@ -920,4 +1291,120 @@ def list_user_certificates(request):
                 "completed_contents": completed_contents
             })
     
-    return certificates
\ No newline at end of file
+    return certificates
+
+@apiv1.get("/courses/{course_id}/certificates/export", auth=apiAuth)
+def export_course_certificates(request, course_id: int):
+    """Export certificates of all eligible students as a ZIP archive (teacher only)"""
+    course = get_object_or_404(Course.objects.select_related('teacher'), id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can export certificates")
+    
+    total_contents = CourseContent.objects.filter(
+        course_id=course, 
+        status='published'
+    ).count()
+    
+    if total_contents == 0:
+        raise HttpError(400, "Course has no published content")
+    
+    # Eligibility of every member in one grouped query
+    course_completions = models.Q(contentcompletion__content__course_id=course)
+    eligible_students = User.objects.filter(
+        coursemember__course_id=course
+    ).annotate(
+        completed_contents=models.Count('contentcompletion', filter=course_completions),
+        completion_date=models.Max('contentcompletion__completed_at', filter=course_completions)
+    ).filter(
+        completed_contents__gte=total_contents
+    ).order_by('id').values_list('username', 'first_name', 'last_name', 'completed_contents', 'completion_date')
+    
+    teacher_name = f"{course.teacher.first_name} {course.teacher.last_name}"
+    entries = (
+        (f"certificate-{username}.html", {
+            "recipient_name": f"{first_name} {last_name}",
+            "course_name": course.name,
+            "teacher_name": teacher_name,
+            "completed_contents": completed_contents,
+            "total_contents": total_contents,
+            "completion_date": completion_date
+        })
+        for username, first_name, last_name, completed_contents, completion_date in eligible_students.iterator()
+    )
+    
+    response = StreamingHttpResponse(
+        stream_certificates_zip(entries, get_process_pool(), getattr(settings, 'CERTIFICATE_EXPORT_BATCH_SIZE', 200)),
+        content_type="application/zip"
+    )
+    response["Content-Disposition"] = f'attachment; filename="certificates-course-{course.id}.zip"'
+    return response
+
+# =================== REQUEST BATCHING ===================
+
+@apiv1.post("/batch", response=BatchOut, auth=apiAuth, url_name="batch_requests")
+def batch_requests(request, data: BatchIn):
+    """Run several API requests in one round trip, sharing the caller's authentication"""
+    max_requests = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+    if not data.requests:
+        raise HttpError(400, "At least one request is required")
+    if len(data.requests) > max_requests:
+        raise HttpError(400, f"Maximum {max_requests} requests per batch")
+    if len({item.id for item in data.requests}) != len(data.requests):
+        raise HttpError(400, "Request ids must be unique")
+    
+    return {"responses": run_batch(request, apiv1, data.requests)}
+
+# =================== DELTA SYNC ===================
+
+@apiv1.get("/sync", response=SyncOut, auth=apiAuth)
+def sync(request, since: str = None):
+    """Rows changed or deleted in the user's courses since the previous sync token"""
+    return sync_changes(request.auth, read_token(since) if since else None)
+
+# =================== LIVE EVENTS ===================
+
+@apiv1.get("/courses/{course_id}/events", auth=AsyncJWTAuth())
+async def course_events(request, course_id: int):
+    """Stream new comments, moderation changes and announcements of a course (Server-Sent Events)"""
+    course = await aget_object_or_404(Course.objects.select_related('teacher'), id=course_id)
+    
+    allowed = await sync_to_async(
+        lambda: is_teacher_of_course(request.auth, course) or is_member_of_course(request.auth, course)
+    )()
+    if not allowed:
+        raise HttpError(403, "You must be enrolled in this course")
+    
+    response = StreamingHttpResponse(event_stream(course.id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+# =================== HOME FEED ===================
+
+@apiv1.get("/feed", response=FeedOut, auth=apiAuth)
+def get_home_feed(request, cursor: str = None, limit: int = 20):
+    """Announcements and released content of all enrolled courses, newest first"""
+    return get_feed(request.auth, cursor, limit)
+
+# =================== GRADEBOOK EXPORT ===================
+
+def gradebook_response(request, course_id, stream, content_type, extension):
+    course = get_object_or_404(Course, id=course_id)
+    
+    if not is_teacher_of_course(request.auth, course):
+        raise HttpError(403, "Only teachers can export the gradebook")
+    
+    response = StreamingHttpResponse(stream(course.id), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="gradebook-course-{course.id}.{extension}"'
+    return response
+
+@apiv1.get("/courses/{course_id}/gradebook.csv", auth=apiAuth)
+def export_gradebook_csv(request, course_id: int):
+    """Stream completion times of every member for every content as CSV (teacher only)"""
+    return gradebook_response(request, course_id, stream_csv, "text/csv; charset=utf-8", "csv")
+
+@apiv1.get("/courses/{course_id}/gradebook.jsonl", auth=apiAuth)
+def export_gradebook_jsonl(request, course_id: int):
+    """Stream completion times of every member for every content as JSON Lines (teacher only)"""
+    return gradebook_response(request, course_id, stream_jsonl, "application/x-ndjson", "jsonl")
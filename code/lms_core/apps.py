@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class LmsCoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lms_core'
+
+    def ready(self):
+        from lms_core import signals  # noqa: F401
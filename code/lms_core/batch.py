@@ -0,0 +1,117 @@
+"""In-process dispatch of /batch sub-requests through the NinjaAPI URLconf
+
+Sub-requests reuse the user authenticated by the batch request (JWTAuth
+returns ``request.batch_user`` instead of decoding the token again). Reads
+between two writes run concurrently in the batch thread pool; every write
+runs alone, in order, on the request thread, so later sub-requests see its
+effect.
+"""
+import logging
+from urllib.parse import urlsplit
+
+import orjson
+from asgiref.sync import iscoroutinefunction
+from django.db import connection
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve, reverse
+
+from lms_core.workers import get_batch_pool
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Copied from the batch request, everything else describes the sub-request itself
+INHERITED_META = ('HTTP_AUTHORIZATION', 'HTTP_USER_AGENT', 'HTTP_X_FORWARDED_FOR',
+                  'REMOTE_ADDR', 'SERVER_NAME', 'SERVER_PORT', 'SERVER_PROTOCOL', 'wsgi.url_scheme')
+
+def api_root(api):
+    return reverse(f"{api.urls_namespace}:api-root")
+
+def build_subrequest(request, api, item):
+    """Build the HttpRequest and resolver match of one sub-request"""
+    parts = urlsplit(item.path)
+    path = api_root(api).rstrip('/') + '/' + parts.path.lstrip('/')
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None, None
+    if match.namespace != api.urls_namespace or match.url_name == 'batch_requests':
+        return None, None
+
+    sub = HttpRequest()
+    sub.method = item.method.upper()
+    sub.path = sub.path_info = path
+    sub.META = {key: request.META[key] for key in INHERITED_META if key in request.META}
+    sub.META.update({
+        'REQUEST_METHOD': sub.method,
+        'PATH_INFO': path,
+        'QUERY_STRING': parts.query,
+        # Results are embedded in the batch response, which is negotiated as a whole
+        'HTTP_ACCEPT': 'application/json',
+    })
+    sub.GET = QueryDict(parts.query)
+    body = b'' if item.body is None else orjson.dumps(item.body)
+    sub._body = body
+    sub.META['CONTENT_TYPE'] = 'application/json'
+    sub.META['CONTENT_LENGTH'] = str(len(body))
+    sub.resolver_match = match
+    sub.user = request.auth
+    sub.batch_user = request.auth
+    return sub, match
+
+def decode_response(response):
+    if response.streaming:
+        return None
+    content_type = response.get('Content-Type', '')
+    if not response.content:
+        return None
+    if content_type.startswith('application/json'):
+        return orjson.loads(response.content)
+    return response.content.decode(response.charset or 'utf-8', errors='replace')
+
+def dispatch(request, api, item):
+    """Run one sub-request and return its entry of the batch response"""
+    sub, match = build_subrequest(request, api, item)
+    if match is None:
+        return {"id": item.id, "status": 404, "body": {"detail": "Not Found"}}
+    if iscoroutinefunction(match.func):
+        # Async views (event streams) need the event loop of an ASGI request
+        return {"id": item.id, "status": 400, "body": {"detail": "Async endpoints cannot be batched"}}
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+        return {"id": item.id, "status": response.status_code, "body": decode_response(response)}
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", item.method, item.path)
+        return {"id": item.id, "status": 500, "body": {"detail": "Internal server error"}}
+
+def _dispatch_in_thread(request, api, item):
+    try:
+        return dispatch(request, api, item)
+    finally:
+        # Pool threads hold their own connection, release it after each sub-request
+        connection.close()
+
+def run_batch(request, api, items):
+    """Dispatch ``items`` and return their results in request order"""
+    results = {}
+    pending_reads = []
+
+    def flush_reads():
+        if len(pending_reads) == 1:
+            results[pending_reads[0].id] = dispatch(request, api, pending_reads[0])
+        elif pending_reads:
+            pool = get_batch_pool()
+            futures = [(item.id, pool.submit(_dispatch_in_thread, request, api, item)) for item in pending_reads]
+            for item_id, future in futures:
+                results[item_id] = future.result()
+        pending_reads.clear()
+
+    for item in items:
+        if item.method.upper() in SAFE_METHODS:
+            pending_reads.append(item)
+            continue
+        flush_reads()
+        results[item.id] = dispatch(request, api, item)
+    flush_reads()
+    return [results[item.id] for item in items]
@@ -0,0 +1,59 @@
+"""Synthetic payloads and timing helpers shared by the benchmark_* commands"""
+import time
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from lms_core.models import Comment, Course, CourseCategory, CourseContent, CourseMember
+from lms_core.schema import CourseCommentOut, CourseContentFull
+
+def measure(func, repeat=5):
+    """Best wall-clock time of ``repeat`` runs, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _course():
+    now = timezone.now()
+    teacher = User(id=1, username='teacher', email='teacher@example.com', first_name='Ada', last_name='Lovelace')
+    category = CourseCategory(id=1, name='Programming', description='Programming courses',
+                              created_by=teacher, created_at=now, updated_at=now)
+    return Course(id=1, name='Introduction to Django', description='Build web apps with Django. ' * 8,
+                  price=150000, teacher=teacher, category=category, created_at=now, updated_at=now)
+
+def content_list_payload(size):
+    """Validated list_course_content response with ``size`` items"""
+    now = timezone.now()
+    course = _course()
+    contents = [
+        CourseContent(id=i, name=f'Lecture {i}', description='Lecture notes and exercises. ' * 10,
+                      video_url=f'https://videos.example.com/{i}', course_id=course, status='published',
+                      created_at=now, updated_at=now)
+        for i in range(1, size + 1)
+    ]
+    return [CourseContentFull.from_orm(content).model_dump() for content in contents]
+
+def comment_list_payload(size):
+    """Validated list_comments response with ``size`` items"""
+    now = timezone.now()
+    course = _course()
+    content = CourseContent(id=1, name='Lecture 1', description='Lecture notes. ' * 10,
+                            course_id=course, status='published', created_at=now, updated_at=now)
+    comments = []
+    for i in range(1, size + 1):
+        student = User(id=i + 1, username=f'student{i}', email=f'student{i}@example.com',
+                       first_name='Student', last_name=str(i))
+        member = CourseMember(id=i, course_id=course, user_id=student, roles='std', created_at=now, updated_at=now)
+        comments.append(Comment(id=i, content_id=content, member_id=member,
+                                comment='Thanks, this lecture was really helpful! ' * 3,
+                                created_at=now, updated_at=now))
+    return [CourseCommentOut.from_orm(comment).model_dump() for comment in comments]
+
+PAYLOADS = {
+    'contents': content_list_payload,
+    'comments': comment_list_payload,
+}
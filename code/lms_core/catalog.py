@@ -0,0 +1,29 @@
+"""Course catalog totals, cached per filter combination
+
+Listing a page fetches one row past it to know whether another page follows,
+so only the total needs a COUNT. It is kept in the shared cache under a
+catalog version bumped on commit whenever a course is saved or deleted, and
+expires after CATALOG_COUNT_CACHE_TIMEOUT seconds at the latest.
+"""
+import hashlib
+import uuid
+
+import orjson
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = 'catalog-version'
+
+def bump_catalog_version():
+    transaction.on_commit(lambda: cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, None))
+
+def catalog_count(queryset, filters):
+    """Number of courses matching ``filters`` (a JSON-serializable dict), counted by ``queryset`` on a miss"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    key = "catalog-count:" + hashlib.sha256(orjson.dumps([version, filters], option=orjson.OPT_SORT_KEYS)).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'CATALOG_COUNT_CACHE_TIMEOUT', 300))
+    return count
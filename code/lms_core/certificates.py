@@ -0,0 +1,132 @@
+import zipfile
+
+def render_certificate_html(recipient_name, course_name, teacher_name, completed_contents, total_contents, completion_date):
+    """Render the HTML page of a course completion certificate"""
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Course Completion Certificate</title>
+        <style>
+            body {{ 
+                font-family: 'Georgia', serif; 
+                text-align: center; 
+                padding: 50px;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                min-height: 100vh;
+                margin: 0;
+            }}
+            .certificate {{
+                background: white;
+                border: 10px solid #gold;
+                border-radius: 20px;
+                padding: 60px;
+                max-width: 800px;
+                margin: 0 auto;
+                box-shadow: 0 0 30px rgba(0,0,0,0.3);
+            }}
+            .header {{ 
+                font-size: 48px; 
+                color: #2c3e50; 
+                margin-bottom: 20px;
+                font-weight: bold;
+            }}
+            .subheader {{ 
+                font-size: 24px; 
+                color: #7f8c8d; 
+                margin-bottom: 40px;
+            }}
+            .recipient {{ 
+                font-size: 36px; 
+                color: #2980b9; 
+                margin: 30px 0;
+                font-weight: bold;
+            }}
+            .course-title {{ 
+                font-size: 28px; 
+                color: #27ae60; 
+                margin: 20px 0;
+                font-style: italic;
+            }}
+            .completion-date {{ 
+                font-size: 18px; 
+                color: #95a5a6; 
+                margin-top: 40px;
+            }}
+            .signature {{ 
+                margin-top: 60px; 
+                font-size: 16px; 
+                color: #2c3e50;
+            }}
+            .ornament {{ 
+                font-size: 60px; 
+                color: #f1c40f; 
+                margin: 20px 0;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="certificate">
+            <div class="ornament">🏆</div>
+            <div class="header">CERTIFICATE OF COMPLETION</div>
+            <div class="subheader">This is to certify that</div>
+            <div class="recipient">{recipient_name}</div>
+            <div class="subheader">has successfully completed the course</div>
+            <div class="course-title">"{course_name}"</div>
+            <div class="subheader">with {completed_contents} out of {total_contents} contents completed</div>
+            <div class="completion-date">
+                Completed on: {completion_date.strftime('%B %d, %Y')}
+            </div>
+            <div class="signature">
+                <hr style="width: 300px; margin: 40px auto;">
+                <strong>{teacher_name}</strong><br>
+                Course Instructor
+            </div>
+            <div class="ornament">✨</div>
+        </div>
+    </body>
+    </html>
+    """
+
+def _render_certificate_entry(entry):
+    filename, kwargs = entry
+    return filename, render_certificate_html(**kwargs)
+
+class _ZipStream:
+    """Write-only buffer that lets zipfile produce an archive piece by piece"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+def stream_certificates_zip(entries, pool, batch_size=200):
+    """Render certificates in the process pool and yield the ZIP archive in chunks
+
+    ``entries`` is an iterable of ``(filename, render_kwargs)`` tuples. Only one
+    batch of rendered certificates is held in memory at a time.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                for filename, html in pool.map(_render_certificate_entry, batch, chunksize=16):
+                    archive.writestr(filename, html)
+                batch = []
+                yield stream.pop()
+        if batch:
+            for filename, html in pool.map(_render_certificate_entry, batch, chunksize=16):
+                archive.writestr(filename, html)
+    yield stream.pop()
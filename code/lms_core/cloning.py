@@ -0,0 +1,98 @@
+"""Deep copy of a course: its content tree, announcements and attachments
+
+Rows are copied with bulk_create and parent links remapped with one
+bulk_update. Files are not duplicated: blob names are shared and their
+MediaBlob reference counts raised, so deleting either copy keeps the file
+for the other.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from lms_core.models import Course, CourseAnnouncement, CourseContent, MediaBlob
+from lms_core.storage import is_blob_name
+
+def share_files(instances):
+    """Let copied instances reference the same files as their originals"""
+    references = Counter()
+    for instance in instances:
+        for field in instance._meta.fields:
+            if not hasattr(field, 'storage'):
+                continue
+            file = getattr(instance, field.attname)
+            if not file:
+                continue
+            if is_blob_name(file.name):
+                references[file.name] += 1
+            else:
+                # Files stored before content addressing are owned by one row; store a blob copy
+                with field.storage.open(file.name) as source:
+                    setattr(instance, field.attname, field.storage.save(file.name, File(source)))
+
+    by_count = defaultdict(list)
+    for name, count in references.items():
+        by_count[count].append(name)
+    for count, names in by_count.items():
+        MediaBlob.objects.filter(name__in=names).update(ref_count=F('ref_count') + count, updated_at=timezone.now())
+
+def clone_course_row(source, teacher, name=None):
+    clone = Course(
+        name=name or f"{source.name} (copy)",
+        description=source.description,
+        price=source.price,
+        image=source.image.name or None,
+        image_thumbnail=source.image_thumbnail.name or None,
+        image_card=source.image_card.name or None,
+        image_full=source.image_full.name or None,
+        teacher=teacher,
+        max_enrollment=source.max_enrollment,
+        category_id=source.category_id,
+    )
+    share_files([clone])
+    clone.save()
+    return clone
+
+def clone_course_contents(source_id, clone_id):
+    """Copy contents (with their hierarchy) and announcements of one course into another"""
+    batch_size = getattr(settings, 'COURSE_CLONE_BATCH_SIZE', 500)
+    with transaction.atomic():
+        originals = list(CourseContent.objects.filter(course_id=source_id).order_by('id'))
+        copies = [
+            CourseContent(
+                name=content.name,
+                description=content.description,
+                video_url=content.video_url,
+                file_attachment=content.file_attachment.name or None,
+                course_id_id=clone_id,
+                status=content.status,
+                scheduled_release=content.scheduled_release,
+                position=content.position,
+            )
+            for content in originals
+        ]
+        share_files(copies)
+        CourseContent.objects.bulk_create(copies, batch_size=batch_size)
+
+        new_ids = {original.id: copy.id for original, copy in zip(originals, copies)}
+        children = []
+        for original, copy in zip(originals, copies):
+            if original.parent_id_id is not None:
+                copy.parent_id_id = new_ids[original.parent_id_id]
+                children.append(copy)
+        CourseContent.objects.bulk_update(children, ['parent_id'], batch_size=batch_size)
+
+        CourseAnnouncement.objects.bulk_create([
+            CourseAnnouncement(
+                title=announcement.title,
+                content=announcement.content,
+                course_id=clone_id,
+                created_by_id=announcement.created_by_id,
+                publish_date=announcement.publish_date,
+            )
+            for announcement in CourseAnnouncement.objects.filter(course_id=source_id).order_by('id')
+        ], batch_size=batch_size)
+    return len(copies)
@@ -0,0 +1,55 @@
+"""Normalized (``?compact=true``) list responses
+
+Every embedded object is serialized once into ``included[type][id]`` and the
+rows, like the included objects themselves, refer to it by id. ``relations``
+tells the client which type each relation attribute points at::
+
+    {
+        "data": [{"id": 7, "content_id": 3, "member_id": 12, ...}],
+        "included": {"coursecontent": {"3": {...}}, "coursemember": {"12": {...}}, ...},
+        "relations": {"comment": {"content_id": "coursecontent", "member_id": "coursemember"}, ...}
+    }
+"""
+from lms_core.fieldsets import EXPAND_ALL, build_plan, relation_schema
+
+class CompactSerializer:
+    """Builds the rows, the included map and the relation map in one pass"""
+
+    def __init__(self):
+        self.included = {}
+        self.relations = {}
+
+    def serialize_object(self, obj, schema, fields=None):
+        model = type(obj)
+        plan = build_plan(schema, model, fields, frozenset())
+        data = plan.schema.from_orm(obj).model_dump()
+
+        for name, field_info in schema.model_fields.items():
+            nested, _ = relation_schema(field_info.annotation)
+            if nested is None or name not in plan.schema.model_fields:
+                continue
+            related = getattr(obj, name)
+            if related is None:
+                continue
+            type_name = related._meta.model_name
+            self.relations.setdefault(model._meta.model_name, {})[name] = type_name
+            bucket = self.included.setdefault(type_name, {})
+            key = str(related.pk)
+            if key not in bucket:
+                # Reserve the slot first so cyclic references stop here
+                bucket[key] = None
+                bucket[key] = self.serialize_object(related, nested)
+        return data
+
+    def serialize(self, queryset, schema, fields=None):
+        # One query: join every relation the compact payload will include
+        queryset = build_plan(schema, queryset.model, fields, EXPAND_ALL).apply(queryset)
+        rows = [self.serialize_object(obj, schema, fields) for obj in queryset]
+        return {
+            "data": rows,
+            "included": self.included,
+            "relations": self.relations,
+        }
+
+def compact_payload(queryset, schema, fields=None):
+    return CompactSerializer().serialize(queryset, schema, fields)
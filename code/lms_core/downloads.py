@@ -0,0 +1,126 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from ninja.errors import HttpError
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range_header(header, size):
+    """Parse a single-range ``Range`` header into an inclusive (start, end) pair
+
+    Returns None when the header should be ignored (missing, malformed or
+    multiple ranges), in which case the whole file is served.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+def file_chunks(path, start, length, chunk_size):
+    """Yield ``length`` bytes of a file from ``start`` without loading it whole"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    if_range_date = parse_http_date_safe(if_range)
+    return if_range_date is not None and if_range_date >= last_modified
+
+def serve_file(request, field_file, filename=None):
+    """Serve a stored file with Range and conditional request support
+
+    ``filename`` is the name offered to the client, defaulting to the stored
+    file's name. When ``FILE_DOWNLOAD_OFFLOAD`` is set the body is left to the
+    front web server through X-Sendfile or X-Accel-Redirect.
+    """
+    path = field_file.path
+    try:
+        stat = os.stat(path)
+    except OSError:
+        # The row points at a file that is gone from storage
+        raise HttpError(404, "File not found")
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{size:x}")
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    filename = filename or os.path.basename(field_file.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Accept-Ranges': 'bytes',
+        'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename)}",
+    }
+
+    offload = getattr(settings, 'FILE_DOWNLOAD_OFFLOAD', None)
+    if offload == 'x-sendfile':
+        headers['X-Sendfile'] = path
+        return HttpResponse(content_type=content_type, headers=headers)
+    if offload == 'x-accel-redirect':
+        prefix = getattr(settings, 'FILE_DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+        headers['X-Accel-Redirect'] = prefix + quote(field_file.name)
+        return HttpResponse(content_type=content_type, headers=headers)
+
+    try:
+        byte_range = None
+        if _if_range_matches(request, etag, last_modified):
+            byte_range = parse_range_header(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        headers['Content-Range'] = f"bytes */{size}"
+        return HttpResponse(status=416, headers=headers)
+
+    status = 200
+    start, length = 0, size
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        status = 206
+        headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+    headers['Content-Length'] = str(length)
+
+    chunk_size = getattr(settings, 'FILE_DOWNLOAD_CHUNK_SIZE', 64 * 1024)
+    return StreamingHttpResponse(
+        file_chunks(path, start, length, chunk_size),
+        status=status,
+        content_type=content_type,
+        headers=headers
+    )
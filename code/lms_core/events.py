@@ -0,0 +1,171 @@
+"""Per-course live events, delivered to clients as Server-Sent Events
+
+Views publish events through ``publish_course_event``; the SSE endpoint
+subscribes one asyncio queue per connection. The broker class is set by
+EVENT_BROKER. InProcessBroker only reaches connections served by the same
+process, so running several workers needs a broker backed by a shared
+pub/sub (it only has to implement ``subscribe``/``unsubscribe``/``publish``).
+"""
+import asyncio
+import itertools
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from lms_core.models import CourseAnnouncement
+from lms_core.renderers import ORJSONRenderer
+from lms_core.schema import CourseAnnouncementOut
+
+logger = logging.getLogger(__name__)
+
+_renderer = ORJSONRenderer()
+_broker = None
+_broker_lock = threading.Lock()
+# One pending timer per scheduled announcement id
+_timers = {}
+_timers_lock = threading.Lock()
+
+def course_channel(course_id):
+    return f"course:{course_id}"
+
+class Subscription:
+    def __init__(self, channel, queue, loop):
+        self.channel = channel
+        self.queue = queue
+        self.loop = loop
+
+    def offer(self, event):
+        # Runs on the subscriber's loop; a consumer that fell behind loses its oldest events
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+class InProcessBroker:
+    """Fan-out to asyncio queues of the current process, publish() is thread-safe"""
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=getattr(settings, 'EVENT_QUEUE_SIZE', 100))
+        subscription = Subscription(channel, queue, asyncio.get_running_loop())
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[subscription.channel]
+
+    def publish(self, channel, event_type, data):
+        event = {"id": next(self.ids), "event": event_type, "data": data}
+        with self.lock:
+            subscribers = list(self.subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop is closed, the connection is gone
+                self.unsubscribe(subscription)
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'EVENT_BROKER', 'lms_core.events.InProcessBroker'))()
+    return _broker
+
+def publish_course_event(course_id, event_type, data):
+    """Publish ``data`` (JSON-serializable) to a course once the transaction commits"""
+    payload = _renderer.render(None, data, response_status=200).decode()
+    transaction.on_commit(lambda: get_broker().publish(course_channel(course_id), event_type, payload))
+
+def format_event(event):
+    lines = [f"id: {event['id']}", f"event: {event['event']}"]
+    lines.extend(f"data: {line}" for line in event['data'].splitlines())
+    return "\n".join(lines) + "\n\n"
+
+async def event_stream(course_id):
+    """SSE body for one connection: events of the course, with heartbeat comments"""
+    broker = get_broker()
+    subscription = broker.subscribe(course_channel(course_id))
+    heartbeat = getattr(settings, 'EVENT_HEARTBEAT_SECONDS', 15)
+    try:
+        yield f"retry: {getattr(settings, 'EVENT_RETRY_MS', 5000)}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+def publish_announcement(announcement_id, publish_date=None):
+    """Publish an announcement, skipped if it was deleted or rescheduled meanwhile"""
+    announcement = CourseAnnouncement.objects.filter(id=announcement_id).select_related(
+        'course__teacher', 'course__category__created_by', 'created_by'
+    ).first()
+    if announcement is None or (publish_date is not None and announcement.publish_date != publish_date):
+        return
+    data = CourseAnnouncementOut.from_orm(announcement).model_dump()
+    get_broker().publish(course_channel(announcement.course_id), 'announcement',
+                         _renderer.render(None, data, response_status=200).decode())
+
+def schedule_announcement(announcement):
+    """Publish now if the announcement is due, otherwise when its publish_date arrives
+
+    Replaces the timer of an earlier schedule of the same announcement, so
+    call it only when the announcement is new or its publish_date changed.
+    """
+    delay = (announcement.publish_date - timezone.now()).total_seconds()
+    if delay <= 0:
+        transaction.on_commit(lambda: _publish_now(announcement.id))
+        return
+    # In-process timer: announcements due while no process runs are not pushed,
+    # clients still get them from list_announcements or /sync
+    timer = threading.Timer(delay, _publish_scheduled, args=(announcement.id, announcement.publish_date))
+    timer.daemon = True
+    transaction.on_commit(lambda: _start_timer(announcement.id, timer))
+
+def cancel_scheduled_announcement(announcement_id):
+    with _timers_lock:
+        timer = _timers.pop(announcement_id, None)
+    if timer is not None:
+        timer.cancel()
+
+def _publish_now(announcement_id):
+    cancel_scheduled_announcement(announcement_id)
+    publish_announcement(announcement_id)
+
+def _start_timer(announcement_id, timer):
+    with _timers_lock:
+        previous = _timers.get(announcement_id)
+        _timers[announcement_id] = timer
+    if previous is not None:
+        previous.cancel()
+    timer.start()
+
+def _publish_scheduled(announcement_id, publish_date):
+    with _timers_lock:
+        if _timers.get(announcement_id) is threading.current_thread():
+            del _timers[announcement_id]
+    try:
+        publish_announcement(announcement_id, publish_date)
+    except Exception:
+        logger.exception("Publishing announcement %s failed", announcement_id)
+    finally:
+        connection.close()
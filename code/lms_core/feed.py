@@ -0,0 +1,132 @@
+"""Home feed: published announcements and released content of the user's courses
+
+One UNION query, ordered by (time, type, id) descending and paginated with
+a cursor holding the last item's key. Pages are cached per user; the cache
+key carries a version per course, bumped by signals whenever announcements
+or contents of the course change, and entries expire when the next scheduled
+item of those courses is released.
+"""
+import base64
+import binascii
+import hashlib
+import uuid
+from datetime import datetime
+
+import orjson
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import CharField, F, Min, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from lms_core.models import CourseAnnouncement, CourseContent, CourseMember
+
+# Order of the types for rows released at the same instant (descending)
+ANNOUNCEMENT = 'announcement'
+CONTENT = 'content'
+
+def version_key(course_id):
+    return f"feed-version:{course_id}"
+
+def bump_version(course_id):
+    # After commit, so a page built meanwhile is not cached under the new version
+    transaction.on_commit(lambda: cache.set(version_key(course_id), uuid.uuid4().hex, None))
+
+def encode_cursor(item):
+    raw = orjson.dumps([item['at'].isoformat(), item['type'], item['id']])
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        at, item_type, item_id = orjson.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(at), str(item_type), int(item_id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise HttpError(400, "Invalid cursor")
+
+def after_cursor(item_type, cursor):
+    """Rows of ``item_type`` that come after the cursor in (at, type, id) descending order"""
+    at, cursor_type, cursor_id = cursor
+    q = Q(at__lt=at)
+    if item_type < cursor_type:
+        q |= Q(at=at)
+    elif item_type == cursor_type:
+        q |= Q(at=at, id__lt=cursor_id)
+    return q
+
+def feed_querysets(course_ids, now):
+    announcements = CourseAnnouncement.objects.filter(course__in=course_ids).annotate(
+        type=Value(ANNOUNCEMENT, output_field=CharField()),
+        at=F('publish_date'),
+        course_name=F('course__name'),
+        headline=F('title'),
+        body=F('content'),
+    ).filter(at__lte=now)
+    contents = CourseContent.objects.filter(course_id__in=course_ids, status='published').annotate(
+        type=Value(CONTENT, output_field=CharField()),
+        at=Coalesce('scheduled_release', 'created_at'),
+        course_name=F('course_id__name'),
+        headline=F('name'),
+        body=F('description'),
+    ).filter(at__lte=now)
+    return announcements, contents
+
+def next_release(course_ids, now):
+    """When the next announcement or content of these courses is released, or None"""
+    times = [
+        CourseAnnouncement.objects.filter(course__in=course_ids, publish_date__gt=now)
+        .aggregate(at=Min('publish_date'))['at'],
+        CourseContent.objects.filter(course_id__in=course_ids, status='published', scheduled_release__gt=now)
+        .aggregate(at=Min('scheduled_release'))['at'],
+    ]
+    times = [at for at in times if at is not None]
+    return min(times) if times else None
+
+def build_page(course_ids, cursor, limit, now):
+    announcements, contents = feed_querysets(course_ids, now)
+    if cursor is not None:
+        announcements = announcements.filter(after_cursor(ANNOUNCEMENT, cursor))
+        contents = contents.filter(after_cursor(CONTENT, cursor))
+
+    # Same column list on both sides; titles are annotations on both so the SELECTs line up
+    columns = ('id', 'course_id', 'type', 'at', 'course_name', 'headline', 'body')
+    feed = announcements.order_by().values_list(*columns).union(
+        contents.order_by().values_list(*columns), all=True
+    ).order_by('-at', '-type', '-id')[:limit + 1]
+    items = [
+        {"type": item_type, "id": item_id, "course_id": course_id, "course_name": course_name,
+         "title": headline, "body": body, "at": at}
+        for item_id, course_id, item_type, at, course_name, headline, body in feed
+    ]
+
+    page = items[:limit]
+    return {
+        "items": page,
+        "next_cursor": encode_cursor(page[-1]) if len(items) > limit else None,
+    }
+
+def get_feed(user, cursor=None, limit=20):
+    limit = max(1, min(limit, getattr(settings, 'FEED_MAX_LIMIT', 100)))
+    parsed_cursor = decode_cursor(cursor) if cursor else None
+    course_ids = sorted(CourseMember.objects.filter(user_id=user).values_list('course_id', flat=True))
+    if not course_ids:
+        return {"items": [], "next_cursor": None}
+
+    versions = cache.get_many([version_key(course_id) for course_id in course_ids])
+    fingerprint = hashlib.sha256(orjson.dumps([
+        course_ids, [versions.get(version_key(course_id)) for course_id in course_ids], cursor, limit
+    ])).hexdigest()
+    key = f"feed:{user.id}:{fingerprint}"
+    page = cache.get(key)
+    if page is not None:
+        return page
+
+    now = timezone.now()
+    page = build_page(course_ids, parsed_cursor, limit, now)
+    timeout = getattr(settings, 'FEED_CACHE_TIMEOUT', 300)
+    released = next_release(course_ids, now)
+    if released is not None:
+        timeout = max(1, min(timeout, int((released - now).total_seconds()) + 1))
+    cache.set(key, page, timeout)
+    return page
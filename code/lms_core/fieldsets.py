@@ -0,0 +1,123 @@
+"""Sparse fieldsets (``?fields=``) and relation expansion (``?expand=``) for list endpoints
+
+``fields`` lists the attributes to return, dotted paths select attributes of a
+nested object (``fields=id,name,course_id.name``). ``expand`` lists the
+relations to embed as objects (``*`` embeds all of them); every other relation
+is returned as its id and is never joined or loaded.
+"""
+import types
+from copy import copy
+from functools import lru_cache
+from typing import Optional, Union, get_args, get_origin
+
+from django.core.exceptions import FieldDoesNotExist
+from ninja import Schema
+from ninja.errors import HttpError
+from pydantic import Field, create_model
+
+EXPAND_ALL = frozenset({'*'})
+
+def parse_paths(value):
+    """Split a comma separated query parameter into a frozenset of paths"""
+    if value is None:
+        return None
+    return frozenset(path.strip() for path in value.split(',') if path.strip())
+
+def relation_schema(annotation):
+    """Return (nested schema, nullable) when a field embeds another Schema"""
+    nullable = False
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        nullable = len(args) < len(get_args(annotation))
+        if len(args) != 1:
+            return None, False
+        annotation = args[0]
+    if isinstance(annotation, type) and issubclass(annotation, Schema):
+        return annotation, nullable
+    return None, False
+
+def _split(paths, name):
+    """Paths below ``name``, e.g. 'course_id.name' -> 'name'"""
+    prefix = name + '.'
+    return frozenset(path[len(prefix):] for path in paths if path.startswith(prefix))
+
+class FieldsetPlan:
+    """Output schema plus the select_related/only calls that load exactly its columns"""
+
+    def __init__(self, schema, select_related, only):
+        self.schema = schema
+        self.select_related = select_related
+        self.only = only
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.only is not None:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+    def serialize(self, queryset):
+        return [self.schema.from_orm(obj).model_dump() for obj in self.apply(queryset)]
+
+@lru_cache(maxsize=256)
+def build_plan(schema, model, fields=None, expand=frozenset()):
+    """Build (and cache) the sparse version of ``schema`` for ``model``
+
+    ``fields`` of None keeps every attribute. Relations not listed in
+    ``expand`` (or implied by a dotted path in ``fields``) become ids.
+    """
+    top_fields = None if fields is None else {path.split('.')[0] for path in fields}
+    expanded = {path.split('.')[0] for path in expand}
+    if '*' in expanded:
+        expanded = set(schema.model_fields)
+    if fields:
+        expanded |= {path.split('.')[0] for path in fields if '.' in path}
+
+    unknown = (top_fields or set()) - set(schema.model_fields)
+    unknown |= expanded - set(schema.model_fields) - {'*'}
+    if unknown:
+        raise HttpError(400, f"Unknown field: {', '.join(sorted(unknown))}")
+
+    definitions = {}
+    select_related = []
+    only = []
+    for name, field_info in schema.model_fields.items():
+        if top_fields is not None and name not in top_fields and name != 'id':
+            continue
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            model_field = None
+
+        nested, nullable = relation_schema(field_info.annotation)
+        if nested is None or model_field is None or not model_field.is_relation:
+            definitions[name] = (field_info.annotation, copy(field_info))
+            if model_field is not None and only is not None:
+                only.append(name)
+            else:
+                # Computed attribute, its inputs are unknown so load every column
+                only = None
+            continue
+
+        if only is not None:
+            only.append(name)
+        if name not in expanded:
+            definitions[name] = (Optional[int], Field(None, alias=model_field.attname))
+            continue
+
+        nested_fields = (_split(fields, name) or None) if fields else None
+        nested_expand = EXPAND_ALL if '*' in expand else _split(expand, name)
+        plan = build_plan(nested, model_field.related_model, nested_fields, nested_expand)
+        definitions[name] = (Optional[plan.schema] if nullable else plan.schema, copy(field_info))
+        select_related.append(name)
+        select_related.extend(f"{name}__{path}" for path in plan.select_related)
+        if only is not None and plan.only is not None:
+            only.extend(f"{name}__{path}" for path in plan.only)
+        else:
+            only = None
+
+    sparse = create_model(f"{schema.__name__}Sparse", __base__=Schema, **definitions)
+    sparse._ninja_resolvers = {
+        name: resolver for name, resolver in schema._ninja_resolvers.items() if name in definitions
+    }
+    return FieldsetPlan(sparse, select_related, only)
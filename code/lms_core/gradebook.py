@@ -0,0 +1,73 @@
+"""Streaming members × contents completion matrix of a course (CSV or JSON Lines)
+
+Members and completions are read with iterator() (server-side cursors on
+PostgreSQL), both ordered by user id, and merge-joined while rows are
+written, so memory depends on the number of contents, not of students.
+"""
+import csv
+
+import orjson
+from django.conf import settings
+
+from lms_core.models import ContentCompletion, CourseContent, CourseMember
+
+class Echo:
+    """File-like object whose write() returns the line, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+def gradebook_rows(course):
+    """Yield (contents, None) once, then (member, {content_id: completed_at}) per member"""
+    chunk_size = getattr(settings, 'GRADEBOOK_CHUNK_SIZE', 2000)
+    contents = list(CourseContent.objects.filter(course_id=course).order_by('position', 'id').values_list('id', 'name'))
+    yield contents, None
+
+    members = CourseMember.objects.filter(course_id=course).order_by('user_id').values_list(
+        'user_id', 'user_id__username', 'user_id__email', 'user_id__first_name', 'user_id__last_name'
+    ).iterator(chunk_size=chunk_size)
+    completions = ContentCompletion.objects.filter(content__course_id=course).order_by('student_id').values_list(
+        'student_id', 'content_id', 'completed_at'
+    ).iterator(chunk_size=chunk_size)
+
+    pending = next(completions, None)
+    for member in members:
+        user_id = member[0]
+        completed = {}
+        # Skip completions of users who are no longer members
+        while pending is not None and pending[0] < user_id:
+            pending = next(completions, None)
+        while pending is not None and pending[0] == user_id:
+            completed[pending[1]] = pending[2]
+            pending = next(completions, None)
+        yield member, completed
+
+def stream_csv(course):
+    writer = csv.writer(Echo())
+    rows = gradebook_rows(course)
+    contents, _ = next(rows)
+    content_ids = [content_id for content_id, _ in contents]
+    yield writer.writerow(
+        ['user_id', 'username', 'email', 'first_name', 'last_name', 'completed']
+        + [f"{content_id}: {name}" for content_id, name in contents]
+    )
+    for member, completed in rows:
+        yield writer.writerow(
+            list(member) + [len(completed)]
+            + [completed[content_id].isoformat() if content_id in completed else '' for content_id in content_ids]
+        )
+
+def stream_jsonl(course):
+    rows = gradebook_rows(course)
+    contents, _ = next(rows)
+    yield orjson.dumps({"contents": [{"id": content_id, "name": name} for content_id, name in contents]}) + b"\n"
+    for (user_id, username, email, first_name, last_name), completed in rows:
+        yield orjson.dumps({
+            "user_id": user_id,
+            "username": username,
+            "email": email,
+            "first_name": first_name,
+            "last_name": last_name,
+            "completed": len(completed),
+            "completions": completed,
+        }, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z) + b"\n"
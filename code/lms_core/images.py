@@ -0,0 +1,70 @@
+import io
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from lms_core.workers import run_in_background
+
+# Variant name -> bounding box (width, height), the aspect ratio is preserved
+IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (640, 360),
+    'full': (1600, 1600),
+}
+
+def render_image_variants(source):
+    """Resize and recompress an image file into every variant, returns name -> bytes"""
+    image_format = getattr(settings, 'IMAGE_VARIANT_FORMAT', 'WEBP')
+    quality = getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+        if image_format == 'JPEG' and original.mode == 'RGBA':
+            original = original.convert('RGB')
+
+        variants = {}
+        for name, size in IMAGE_VARIANTS.items():
+            variant = original.copy()
+            variant.thumbnail(size, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, format=image_format, quality=quality, optimize=True)
+            variants[name] = buffer.getvalue()
+    return variants
+
+def generate_image_variants(model_label, pk, field_name):
+    """Build the variants of an instance's image field and store them next to the original"""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    source = getattr(instance, field_name)
+    if not source:
+        return
+
+    with source.open('rb') as f:
+        variants = render_image_variants(f)
+
+    extension = getattr(settings, 'IMAGE_VARIANT_FORMAT', 'WEBP').lower()
+    basename = os.path.splitext(os.path.basename(source.name))[0]
+    updates = {}
+    for name, data in variants.items():
+        field = model._meta.get_field(f"{field_name}_{name}")
+        filename = field.generate_filename(instance, f"{basename}_{name}.{extension}")
+        updates[field.name] = field.storage.save(filename, ContentFile(data))
+
+    # Skip the write if the original was replaced while we were busy
+    model.objects.filter(pk=pk, **{field_name: source.name}).update(**updates)
+
+def schedule_image_variants(instance, field_name):
+    """Queue variant generation for an image that was just uploaded"""
+    run_in_background(generate_image_variants, instance._meta.label, instance.pk, field_name)
+
+def clear_image_variants(instance, field_name):
+    """Drop the variants of an image that is about to be replaced"""
+    for name in IMAGE_VARIANTS:
+        setattr(instance, f"{field_name}_{name}", None)
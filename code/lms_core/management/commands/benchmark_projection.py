@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from lms_core.api import apiv1
+from lms_core.benchmarks import measure
+from lms_core.models import Course, CourseCategory
+from lms_core.projection import project
+from lms_core.schema import CourseSchemaOut
+
+class Command(BaseCommand):
+    help = "Compare model+schema serialization with the values() projection on a large course list"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Courses to create (rolled back afterwards)")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement, the best is reported")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.create_rows(options['rows'])
+            self.run(options['repeat'])
+            transaction.set_rollback(True)
+
+    def create_rows(self, rows):
+        teacher = User.objects.create(username='benchmark-teacher', email='teacher@example.com',
+                                      first_name='Ada', last_name='Lovelace')
+        category = CourseCategory.objects.create(name='benchmark-category', created_by=teacher)
+        Course.objects.bulk_create(
+            [Course(name=f'Course {i}', description='Course description. ' * 8, price=100000 + i,
+                    teacher=teacher, category=category) for i in range(rows)],
+            batch_size=1000
+        )
+
+    def run(self, repeat):
+        request = RequestFactory().get('/')
+        queryset = Course.objects.filter(teacher__username='benchmark-teacher')
+        renderer = apiv1.renderer
+
+        def orm_schema():
+            objs = queryset.select_related('teacher', 'category__created_by')
+            data = [CourseSchemaOut.from_orm(obj).model_dump() for obj in objs]
+            return renderer.render(request, data, response_status=200)
+
+        def projection():
+            return renderer.render(request, project(queryset, CourseSchemaOut), response_status=200)
+
+        assert orm_schema() == projection(), "Projection output differs from the schema output"
+
+        baseline = measure(orm_schema, repeat)
+        fast = measure(projection, repeat)
+        rows = queryset.count()
+        self.stdout.write(f"{'path':<16} {'time (ms)':>10} {'rows/s':>10}")
+        self.stdout.write(f"{'orm + schema':<16} {baseline * 1000:>10.1f} {rows / baseline:>10.0f}")
+        self.stdout.write(f"{'projection':<16} {fast * 1000:>10.1f} {rows / fast:>10.0f}")
+        self.stdout.write(f"speedup: {baseline / fast:.1f}x")
@@ -0,0 +1,47 @@
+import json
+
+import orjson
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from ninja.renderers import JSONRenderer
+
+from lms_core.benchmarks import PAYLOADS, measure
+from lms_core.renderers import ORJSONRenderer, MsgPackRenderer, msgpack
+
+class Command(BaseCommand):
+    help = "Compare encode/decode time and size of the API renderers on large content and comment lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=2000, help="Items per list")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement, the best is reported")
+
+    def renderers(self):
+        """name -> (renderer, decoder used by the client)"""
+        renderers = {
+            'json': (JSONRenderer(), json.loads),
+            'orjson': (ORJSONRenderer(), orjson.loads),
+        }
+        if msgpack is not None:
+            renderers['msgpack'] = (MsgPackRenderer(), msgpack.unpackb)
+        return renderers
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        renderers = self.renderers()
+
+        self.stdout.write(
+            f"{'payload':<10} {'renderer':<10} {'encode (ms)':>12} {'decode (ms)':>12} {'size (KB)':>10} {'speedup':>8}"
+        )
+        for payload_name, build in PAYLOADS.items():
+            data = build(options['size'])
+            baseline = None
+            for name, (renderer, decode) in renderers.items():
+                render = lambda: renderer.render(request, data, response_status=200)
+                encoded = render()
+                elapsed = measure(render, options['repeat'])
+                decoded = measure(lambda: decode(encoded), options['repeat'])
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f"{payload_name:<10} {name:<10} {elapsed * 1000:>12.2f} {decoded * 1000:>12.2f} "
+                    f"{len(encoded) / 1024:>10.1f} {baseline / elapsed:>7.1f}x"
+                )
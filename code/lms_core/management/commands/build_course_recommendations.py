@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lms_core.recommendations import build_course_recommendations
+
+class Command(BaseCommand):
+    help = "Rebuild co-enrollment course recommendations (cosine similarity, top-K per course)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, help="Neighbours stored per course (default RECOMMENDATION_TOP_K)")
+        parser.add_argument('--min-common', type=int,
+                            help="Shared students needed to recommend a course (default RECOMMENDATION_MIN_COMMON_STUDENTS)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            stored = build_course_recommendations(options['top_k'], options['min_common'])
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(f"Stored {stored} recommendations in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,94 @@
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.utils import timezone
+
+from lms_core.models import MediaBlob
+from lms_core.storage import BLOB_DIR, ContentAddressedStorage, is_blob_name
+
+class Command(BaseCommand):
+    help = "Recount media blob references and delete blobs no longer used by any file field"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help="Keep unreferenced blobs younger than this, uploads may still be in flight")
+        parser.add_argument('--dry-run', action='store_true', help="Report without changing anything")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError("Default storage is not ContentAddressedStorage")
+
+        dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        references = self.count_references()
+
+        recounted = []
+        orphans = []
+        now = timezone.now()
+        for blob in MediaBlob.objects.iterator():
+            ref_count = references.get(blob.name, 0)
+            if ref_count == 0 and blob.ref_count == 0 and blob.updated_at < cutoff:
+                orphans.append(blob)
+            elif ref_count != blob.ref_count:
+                # A recount restarts the grace period, the rows counted may not have committed yet
+                blob.ref_count = ref_count
+                blob.updated_at = now
+                recounted.append(blob)
+
+        untracked = self.find_untracked_files(cutoff)
+
+        self.stdout.write(f"{len(recounted)} blob(s) recounted, {len(orphans)} orphaned blob(s), "
+                          f"{len(untracked)} untracked file(s)")
+        if dry_run:
+            return
+
+        MediaBlob.objects.bulk_update(recounted, ['ref_count', 'updated_at'], batch_size=500)
+        purged = 0
+        for blob in orphans:
+            # Re-check under a row lock: an upload may have referenced the blob since the scan
+            with transaction.atomic():
+                unused = MediaBlob.objects.select_for_update().filter(
+                    pk=blob.pk, ref_count=0, updated_at__lt=cutoff
+                ).first()
+                if unused is None:
+                    continue
+                unused.delete()
+                default_storage.purge(blob.name)
+                purged += 1
+        for name in untracked:
+            default_storage.purge(name)
+        self.stdout.write(self.style.SUCCESS(f"Garbage collection finished, {purged} blob(s) purged"))
+
+    def count_references(self):
+        """Count how many rows of every file field point at each blob"""
+        references = Counter()
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                if not isinstance(field, models.FileField):
+                    continue
+                names = model._default_manager.filter(
+                    **{f"{field.name}__startswith": BLOB_DIR + '/'}
+                ).values_list(field.name, flat=True)
+                references.update(names.iterator())
+        return references
+
+    def find_untracked_files(self, cutoff):
+        """Blob files left on disk without a MediaBlob row (interrupted saves)"""
+        root = default_storage.path(BLOB_DIR)
+        if not os.path.isdir(root):
+            return []
+        tracked = set(MediaBlob.objects.values_list('name', flat=True))
+        untracked = []
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, default_storage.location).replace(os.sep, '/')
+                if (is_blob_name(name) and name not in tracked
+                        and os.path.getmtime(path) < cutoff.timestamp()):
+                    untracked.append(name)
+        return untracked
@@ -0,0 +1,15 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from lms_core.models import SyncTombstone
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS (older tokens already get 410)"
+
+    def handle(self, *args, **options):
+        retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+        deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=timezone.now() - retention).delete()
+        self.stdout.write(f"Deleted {deleted} tombstones")
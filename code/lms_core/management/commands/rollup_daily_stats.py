@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from lms_core.rollups import SOURCES, rollup_daily_stats
+
+class Command(BaseCommand):
+    help = "Add rows created since the last run to the per-course daily stats (run periodically, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', action='append', choices=list(SOURCES), help="Only roll up this source (repeatable)")
+
+    def handle(self, *args, **options):
+        for source, rows in rollup_daily_stats(options['source']).items():
+            self.stdout.write(f"{source}: {rows} new rows")
@@ -0,0 +1,176 @@
+"""Content-negotiated response compression (zstd, brotli, gzip)
+
+The encoding is picked from ``Accept-Encoding`` (q-values respected, ties
+broken by COMPRESSION_ENCODINGS order). brotli and zstd are used only when
+their packages are installed. Responses whose path matches
+COMPRESSION_CACHE_PATHS are compressed once at a higher level and the
+compressed body is cached under the hash of the uncompressed body, so repeated
+catalog responses skip the compression work.
+"""
+import gzip
+import hashlib
+import re
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/msgpack',
+    'image/svg+xml',
+)
+
+def available_encodings():
+    encodings = getattr(settings, 'COMPRESSION_ENCODINGS', ['zstd', 'br', 'gzip'])
+    installed = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+    return [encoding for encoding in encodings if installed.get(encoding)]
+
+def negotiate_encoding(header, encodings):
+    """Pick the encoding with the highest q-value the client accepts, or None"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(body, encoding, level=None):
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level or 3).compress(body)
+    if encoding == 'br':
+        return brotli.compress(body, quality=level or 5)
+    return gzip.compress(body, compresslevel=level or 6, mtime=0)
+
+class _StreamCompressor:
+    """Incremental compressor; every chunk is flushed so streams stay live"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'zstd':
+            self.compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        elif encoding == 'br':
+            self.compressor = brotli.Compressor(quality=5)
+        else:
+            self.compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data):
+        if self.encoding == 'zstd':
+            return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == 'br':
+            return self.compressor.process(data) + self.compressor.flush()
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+def compress_sequence(sequence, encoding):
+    compressor = _StreamCompressor(encoding)
+    for item in sequence:
+        data = compressor.chunk(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+async def acompress_sequence(sequence, encoding):
+    compressor = _StreamCompressor(encoding)
+    async for item in sequence:
+        data = compressor.chunk(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with the best encoding the client accepts"""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.encodings = available_encodings()
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.cache_paths = [re.compile(pattern) for pattern in getattr(settings, 'COMPRESSION_CACHE_PATHS', [])]
+
+    def compressible(self, response):
+        if response.status_code != 200 or response.has_header('Content-Encoding'):
+            return False
+        # Files handed to the web server are sent by it, not by Django
+        if response.has_header('X-Sendfile') or response.has_header('X-Accel-Redirect'):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def process_response(self, request, response):
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_sequence(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < self.min_size:
+                return response
+            if request.method == 'GET' and any(pattern.search(request.path) for pattern in self.cache_paths):
+                compressed = self.cached_compress(response.content, encoding)
+            else:
+                compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The compressed representation differs byte-wise, keep the ETag weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def cached_compress(self, body, encoding):
+        cache = caches[getattr(settings, 'COMPRESSION_CACHE_ALIAS', 'default')]
+        key = f"compressed:{encoding}:{hashlib.sha256(body).hexdigest()}"
+        compressed = cache.get(key)
+        if compressed is None:
+            levels = getattr(settings, 'COMPRESSION_CACHE_LEVELS', {'zstd': 19, 'br': 11, 'gzip': 9})
+            compressed = compress(body, encoding, levels.get(encoding))
+            cache.set(key, compressed, getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 60 * 60))
+        return compressed
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='image_card',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='course/variants', verbose_name='Gambar (kartu)'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='image_full',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='course/variants', verbose_name='Gambar (penuh)'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='course/variants', verbose_name='Gambar (thumbnail)'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_picture_card',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profiles/variants/', verbose_name='Foto Profil (kartu)'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_picture_full',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profiles/variants/', verbose_name='Foto Profil (penuh)'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_picture_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profiles/variants/', verbose_name='Foto Profil (thumbnail)'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:02
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0002_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Nama File')),
+                ('total_size', models.BigIntegerField(verbose_name='Ukuran Total')),
+                ('chunk_size', models.IntegerField(verbose_name='Ukuran Bagian')),
+                ('checksum', models.CharField(blank=True, max_length=64, verbose_name='Checksum SHA-256')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed')], default='pending', max_length=10, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Dibuat pada')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Diperbarui pada')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lms_core.coursecontent', verbose_name='Konten')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Diunggah oleh')),
+            ],
+            options={
+                'verbose_name': 'Unggahan Bertahap',
+                'verbose_name_plural': 'Unggahan Bertahap',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0003_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Nama File')),
+                ('digest', models.CharField(db_index=True, max_length=64, verbose_name='SHA-256')),
+                ('size', models.BigIntegerField(verbose_name='Ukuran')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='Jumlah Referensi')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Dibuat pada')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Diperbarui pada')),
+            ],
+            options={
+                'verbose_name': 'Blob Media',
+                'verbose_name_plural': 'Blob Media',
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0004_mediablob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('content', 'Konten'), ('announcement', 'Pengumuman'), ('comment', 'Komentar'), ('completion', 'Penyelesaian')], max_length=20, verbose_name='Jenis Data')),
+                ('object_id', models.BigIntegerField(verbose_name='ID Data')),
+                ('course_id', models.BigIntegerField(verbose_name='ID Kursus')),
+                ('user_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID Pengguna')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Dihapus pada')),
+            ],
+            options={
+                'verbose_name': 'Tombstone Sinkronisasi',
+                'verbose_name_plural': 'Tombstone Sinkronisasi',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_id', 'updated_at'], name='comment_content_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentcompletion',
+            index=models.Index(fields=['student', 'completed_at'], name='completion_student_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseannouncement',
+            index=models.Index(fields=['course', 'updated_at'], name='announce_course_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseannouncement',
+            index=models.Index(fields=['course', 'publish_date'], name='announce_course_publish_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecontent',
+            index=models.Index(fields=['course_id', 'updated_at'], name='content_course_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['course_id', 'deleted_at'], name='tombstone_course_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0005_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursecontent',
+            index=models.Index(fields=['course_id', 'status', 'scheduled_release'], name='content_course_release_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0006_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_approved',
+            field=models.BooleanField(default=True, verbose_name='Is Approved'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', False)), fields=['content_id', 'created_at'], name='comment_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:18
+
+from django.db import migrations, models
+
+from lms_core.positions import keys_between
+
+
+def assign_positions(apps, schema_editor):
+    """Number existing contents of each course in creation (id) order"""
+    CourseContent = apps.get_model('lms_core', 'CourseContent')
+    course_ids = CourseContent.objects.values_list('course_id', flat=True).distinct()
+    for course_id in course_ids:
+        contents = list(CourseContent.objects.filter(course_id=course_id).order_by('id').only('id'))
+        for content, position in zip(contents, keys_between(None, None, len(contents))):
+            content.position = position
+        CourseContent.objects.bulk_update(contents, ['position'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0007_comment_moderation'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='coursecontent',
+            options={'ordering': ['position', 'id'], 'verbose_name': 'Konten Matkul', 'verbose_name_plural': 'Konten Matkul'},
+        ),
+        migrations.AddField(
+            model_name='coursecontent',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Urutan'),
+        ),
+        migrations.AddIndex(
+            model_name='coursecontent',
+            index=models.Index(fields=['course_id', 'position'], name='content_course_position_idx'),
+        ),
+        migrations.RunPython(assign_positions, migrations.RunPython.noop),
+    ]
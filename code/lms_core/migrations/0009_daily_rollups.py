@@ -0,0 +1,45 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0008_content_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('enrollments', 'Pendaftaran'), ('completions', 'Penyelesaian Konten'), ('comments', 'Komentar'), ('feedback', 'Umpan Balik')], max_length=20, unique=True, verbose_name='Sumber')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='ID Terakhir')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Diperbarui pada')),
+            ],
+            options={
+                'verbose_name': 'Watermark Rollup',
+                'verbose_name_plural': 'Watermark Rollup',
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tanggal')),
+                ('enrollments', models.IntegerField(default=0, verbose_name='Pendaftaran')),
+                ('completions', models.IntegerField(default=0, verbose_name='Penyelesaian Konten')),
+                ('comments', models.IntegerField(default=0, verbose_name='Komentar')),
+                ('feedback_count', models.IntegerField(default=0, verbose_name='Umpan Balik')),
+                ('rating_sum', models.IntegerField(default=0, verbose_name='Jumlah Rating')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lms_core.course', verbose_name='Kursus')),
+            ],
+            options={
+                'verbose_name': 'Statistik Harian Kursus',
+                'verbose_name_plural': 'Statistik Harian Kursus',
+                'unique_together': {('course', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+def backfill_ratings(apps, schema_editor):
+    """Summarize existing feedback of every course"""
+    Course = apps.get_model('lms_core', 'Course')
+    CourseFeedback = apps.get_model('lms_core', 'CourseFeedback')
+    summaries = CourseFeedback.objects.order_by().values('course_id').annotate(
+        count=models.Count('id'),
+        total=models.Sum('rating'),
+        **{f'stars_{star}': models.Count('id', filter=models.Q(rating=star)) for star in range(1, 6)}
+    )
+    courses = []
+    for summary in summaries:
+        course = Course(id=summary['course_id'], rating_count=summary['count'], rating_sum=summary['total'],
+                        rating_average=summary['total'] / summary['count'])
+        for star in range(1, 6):
+            setattr(course, f'rating_count_{star}', summary[f'stars_{star}'])
+        courses.append(course)
+    Course.objects.bulk_update(courses, ['rating_count', 'rating_sum', 'rating_average'] +
+                               [f'rating_count_{star}' for star in range(1, 6)], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0009_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_average',
+            field=models.FloatField(default=0.0, editable=False, verbose_name='Rata-rata Rating'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Jumlah Rating'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_1',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Rating 1'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_2',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Rating 2'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_3',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Rating 3'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_4',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Rating 4'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_5',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Rating 5'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Total Rating'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
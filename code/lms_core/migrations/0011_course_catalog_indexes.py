@@ -0,0 +1,55 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_enrollment_counts(apps, schema_editor):
+    Course = apps.get_model('lms_core', 'Course')
+    CourseMember = apps.get_model('lms_core', 'CourseMember')
+    counts = CourseMember.objects.order_by().values('course_id').annotate(count=models.Count('id'))
+    Course.objects.bulk_update(
+        [Course(id=row['course_id'], enrollment_count=row['count']) for row in counts],
+        ['enrollment_count'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0010_course_rating_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Jumlah Peserta'),
+        ),
+        migrations.RunPython(backfill_enrollment_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-created_at', '-id'], name='course_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-enrollment_count', '-id'], name='course_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-rating_average', '-rating_count', '-id'], name='course_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='course_cat_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['category', '-enrollment_count', '-id'], name='course_cat_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['category', '-rating_average', '-rating_count', '-id'], name='course_cat_rating_idx'),
+        ),
+    ]
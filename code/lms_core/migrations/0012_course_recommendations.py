@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0011_course_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Peringkat')),
+                ('score', models.FloatField(verbose_name='Skor Kemiripan')),
+                ('common_students', models.IntegerField(verbose_name='Siswa yang Sama')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='lms_core.course', verbose_name='Kursus')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='lms_core.course', verbose_name='Kursus Rekomendasi')),
+            ],
+            options={
+                'verbose_name': 'Rekomendasi Kursus',
+                'verbose_name_plural': 'Rekomendasi Kursus',
+                'indexes': [models.Index(fields=['course', 'rank'], name='recommendation_course_rank_idx')],
+                'unique_together': {('course', 'recommended')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:56
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from lms_core.positions import keys_between
+
+
+def renumber_duplicates(apps, schema_editor):
+    """Give fresh keys to courses where concurrent writes stored one key twice"""
+    CourseContent = apps.get_model('lms_core', 'CourseContent')
+    course_ids = CourseContent.objects.values('course_id', 'position').annotate(rows=Count('id')) \
+        .filter(rows__gt=1).values_list('course_id', flat=True).distinct()
+    for course_id in course_ids:
+        contents = list(CourseContent.objects.filter(course_id=course_id).order_by('position', 'id').only('id'))
+        for content in contents:
+            content.position = f"~{content.pk}"
+        CourseContent.objects.bulk_update(contents, ['position'], batch_size=1000)
+        for content, position in zip(contents, keys_between(None, None, len(contents))):
+            content.position = position
+        CourseContent.objects.bulk_update(contents, ['position'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0012_course_recommendations'),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='coursecontent',
+            name='content_course_position_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='coursecontent',
+            constraint=models.UniqueConstraint(fields=('course_id', 'position'), name='content_course_position_uniq'),
+        ),
+    ]
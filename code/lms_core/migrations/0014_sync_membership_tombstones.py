@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0013_content_position_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='synctombstone',
+            name='model',
+            field=models.CharField(choices=[('content', 'Konten'), ('announcement', 'Pengumuman'), ('comment', 'Komentar'), ('completion', 'Penyelesaian'), ('membership', 'Keanggotaan')], max_length=20, verbose_name='Jenis Data'),
+        ),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
+from django.utils import timezone
+
+from lms_core.positions import REBALANCE_LENGTH, key_between, keys_between
 
 class CourseCategory(models.Model):
     name = models.CharField("Nama Kategori", max_length=100, unique=True)
@@ -23,9 +28,23 @@ class Course(models.Model):
     description = models.TextField("Deskripsi")
     price = models.IntegerField("Harga")
     image = models.ImageField("Gambar", upload_to="course", blank=True, null=True)
+    image_thumbnail = models.ImageField("Gambar (thumbnail)", upload_to="course/variants", blank=True, null=True, editable=False)
+    image_card = models.ImageField("Gambar (kartu)", upload_to="course/variants", blank=True, null=True, editable=False)
+    image_full = models.ImageField("Gambar (penuh)", upload_to="course/variants", blank=True, null=True, editable=False)
     teacher = models.ForeignKey(User, verbose_name="Pengajar", on_delete=models.RESTRICT)
     max_enrollment = models.IntegerField("Maximum Enrollment", null=True, blank=True)
     category = models.ForeignKey(CourseCategory, verbose_name="Kategori", on_delete=models.SET_NULL, blank=True, null=True)
+    # Members, kept current by CourseMember signals
+    enrollment_count = models.IntegerField("Jumlah Peserta", default=0, editable=False)
+    # Rating summary of CourseFeedback, kept current by lms_core.ratings
+    rating_count = models.IntegerField("Jumlah Rating", default=0, editable=False)
+    rating_sum = models.IntegerField("Total Rating", default=0, editable=False)
+    rating_average = models.FloatField("Rata-rata Rating", default=0.0, editable=False)
+    rating_count_1 = models.IntegerField("Rating 1", default=0, editable=False)
+    rating_count_2 = models.IntegerField("Rating 2", default=0, editable=False)
+    rating_count_3 = models.IntegerField("Rating 3", default=0, editable=False)
+    rating_count_4 = models.IntegerField("Rating 4", default=0, editable=False)
+    rating_count_5 = models.IntegerField("Rating 5", default=0, editable=False)
     created_at = models.DateTimeField("Dibuat pada", auto_now_add=True)
     updated_at = models.DateTimeField("Diperbarui pada", auto_now=True)
 
@@ -36,6 +55,29 @@ class Course(models.Model):
         verbose_name = "Mata Kuliah"
         verbose_name_plural = "Data Mata Kuliah"
         ordering = ["-created_at"]
+        # One per catalog sort, with and without the category filter
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='course_recent_idx'),
+            models.Index(fields=['-enrollment_count', '-id'], name='course_popular_idx'),
+            models.Index(fields=['-rating_average', '-rating_count', '-id'], name='course_rating_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='course_cat_recent_idx'),
+            models.Index(fields=['category', '-enrollment_count', '-id'], name='course_cat_popular_idx'),
+            models.Index(fields=['category', '-rating_average', '-rating_count', '-id'], name='course_cat_rating_idx'),
+        ]
+
+    COUNTER_FIELDS = frozenset(
+        ['enrollment_count', 'rating_count', 'rating_sum', 'rating_average'] + [f'rating_count_{star}' for star in range(1, 6)]
+    )
+
+    def save(self, *args, **kwargs):
+        # Counter columns only change through F() updates; saving an instance loaded
+        # earlier must not write back stale values over concurrent writes
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def is_member(self, user):
         return CourseMember.objects.filter(course_id=self, user_id=user).exists()
@@ -70,30 +112,111 @@ class CourseContent(models.Model):
                                 on_delete=models.RESTRICT, null=True, blank=True)
     status = models.CharField("Status", max_length=10, choices=CONTENT_STATUS, default='draft')
     scheduled_release = models.DateTimeField("Scheduled Release", null=True, blank=True)
+    position = models.CharField("Urutan", max_length=255, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Konten Matkul"
         verbose_name_plural = "Konten Matkul"
+        ordering = ['position', 'id']
+        indexes = [
+            models.Index(fields=['course_id', 'updated_at'], name='content_course_updated_idx'),
+            models.Index(fields=['course_id', 'status', 'scheduled_release'], name='content_course_release_idx'),
+        ]
+        constraints = [
+            # Also the index contents are listed in order by
+            models.UniqueConstraint(fields=['course_id', 'position'], name='content_course_position_uniq'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.course_id} {self.name}'
 
-class Comment(models.Model):
-    content_id = models.ForeignKey(CourseContent, verbose_name="konten", on_delete=models.CASCADE)
-    member_id = models.ForeignKey(CourseMember, verbose_name="pengguna", on_delete=models.CASCADE)
-    comment = models.TextField('komentar')
-    is_approved = models.BooleanField("Is Approved", default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
+    def save(self, *args, **kwargs):
+        if self.position:
+            return super().save(*args, **kwargs)
+        # New contents go to the end of their course
+        with transaction.atomic():
+            CourseContent.lock_order(self.course_id_id)
+            last = CourseContent.objects.filter(course_id=self.course_id_id).exclude(position='') \
+                .order_by('-position').values_list('position', flat=True).first()
+            self.position = key_between(last, None)
+            super().save(*args, **kwargs)
+            if len(self.position) > REBALANCE_LENGTH:
+                CourseContent.rebalance(self.course_id_id)
+
+    @staticmethod
+    def lock_order(course_id):
+        """Serialize position writes of a course on its row, call inside a transaction"""
+        Course.objects.select_for_update().filter(pk=course_id).values_list('id', flat=True).first()
+
+    @staticmethod
+    def assign_positions(contents, positions, now=None):
+        """Store ``positions`` on ``contents`` (one course), in two passes so no key is ever held twice"""
+        contents = list(contents)
+        fields = ['position'] if now is None else ['position', 'updated_at']
+        for content in contents:
+            # Outside the key alphabet, so distinct from every key of the course
+            content.position = f"~{content.pk}"
+        CourseContent.objects.bulk_update(contents, ['position'], batch_size=500)
+        for content, position in zip(contents, positions):
+            content.position = position
+            if now is not None:
+                content.updated_at = now
+        CourseContent.objects.bulk_update(contents, fields, batch_size=500)
+
+    @classmethod
+    def rebalance(cls, course_id):
+        """Give every content of a course a short key in the current order"""
+        contents = list(cls.objects.filter(course_id=course_id).order_by('position', 'id').only('id', 'position'))
+        # updated_at moves too, so delta sync sends the new keys
+        cls.assign_positions(contents, keys_between(None, None, len(contents)), timezone.now())
+
+UPLOAD_STATUS = [('pending', 'Pending'), ('completed', 'Completed')]
+
+class ChunkedUpload(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    content = models.ForeignKey(CourseContent, verbose_name="Konten", on_delete=models.CASCADE)
+    uploaded_by = models.ForeignKey(User, verbose_name="Diunggah oleh", on_delete=models.CASCADE)
+    filename = models.CharField("Nama File", max_length=255)
+    total_size = models.BigIntegerField("Ukuran Total")
+    chunk_size = models.IntegerField("Ukuran Bagian")
+    checksum = models.CharField("Checksum SHA-256", max_length=64, blank=True)
+    status = models.CharField("Status", max_length=10, choices=UPLOAD_STATUS, default='pending')
+    created_at = models.DateTimeField("Dibuat pada", auto_now_add=True)
+    updated_at = models.DateTimeField("Diperbarui pada", auto_now=True)
+
     class Meta:
-        verbose_name = "Komentar"
-        verbose_name_plural = "Komentar"
+        verbose_name = "Unggahan Bertahap"
+        verbose_name_plural = "Unggahan Bertahap"
 
-    def __str__(self) -> str:
-        return "Komen: "+self.member_id.user_id+"-"+self.comment
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def total_parts(self):
+        return max(-(-self.total_size // self.chunk_size), 1)
+
+    def part_size(self, part_number):
+        """Expected size of a part, the last one may be shorter"""
+        if part_number < self.total_parts - 1:
+            return self.chunk_size
+        return self.total_size - self.chunk_size * (self.total_parts - 1)
+
+class MediaBlob(models.Model):
+    name = models.CharField("Nama File", max_length=255, unique=True)
+    digest = models.CharField("SHA-256", max_length=64, db_index=True)
+    size = models.BigIntegerField("Ukuran")
+    ref_count = models.IntegerField("Jumlah Referensi", default=0)
+    created_at = models.DateTimeField("Dibuat pada", auto_now_add=True)
+    updated_at = models.DateTimeField("Diperbarui pada", auto_now=True)
+
+    class Meta:
+        verbose_name = "Blob Media"
+        verbose_name_plural = "Blob Media"
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} ref)"
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -101,6 +224,9 @@ class UserProfile(models.Model):
     phone_number = models.CharField("Nomor Telepon", validators=[phone_regex], max_length=17, blank=True, null=True)
     description = models.TextField("Deskripsi", blank=True, null=True)
     profile_picture = models.ImageField("Foto Profil", upload_to="profiles/", blank=True, null=True)
+    profile_picture_thumbnail = models.ImageField("Foto Profil (thumbnail)", upload_to="profiles/variants/", blank=True, null=True, editable=False)
+    profile_picture_card = models.ImageField("Foto Profil (kartu)", upload_to="profiles/variants/", blank=True, null=True, editable=False)
+    profile_picture_full = models.ImageField("Foto Profil (penuh)", upload_to="profiles/variants/", blank=True, null=True, editable=False)
     created_at = models.DateTimeField("Dibuat pada", auto_now_add=True)
     updated_at = models.DateTimeField("Diperbarui pada", auto_now=True)
 
@@ -115,12 +241,19 @@ class Comment(models.Model):
     content_id = models.ForeignKey(CourseContent, verbose_name="konten", on_delete=models.CASCADE)
     member_id = models.ForeignKey(CourseMember, verbose_name="pengguna", on_delete=models.CASCADE)
     comment = models.TextField('komentar')
+    is_approved = models.BooleanField("Is Approved", default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Komentar"
         verbose_name_plural = "Komentar"
+        indexes = [
+            models.Index(fields=['content_id', 'updated_at'], name='comment_content_updated_idx'),
+            # Moderation queue: only the (few) comments waiting for approval are indexed
+            models.Index(fields=['content_id', 'created_at'], condition=models.Q(is_approved=False),
+                         name='comment_pending_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"Komen: {self.member_id.user_id}-{self.comment}"
@@ -138,6 +271,10 @@ class CourseAnnouncement(models.Model):
         verbose_name = "Pengumuman"
         verbose_name_plural = "Pengumuman"
         ordering = ["-publish_date"]
+        indexes = [
+            models.Index(fields=['course', 'updated_at'], name='announce_course_updated_idx'),
+            models.Index(fields=['course', 'publish_date'], name='announce_course_publish_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.name} - {self.title}"
@@ -151,6 +288,9 @@ class ContentCompletion(models.Model):
         verbose_name = "Penyelesaian Konten"
         verbose_name_plural = "Penyelesaian Konten"
         unique_together = ['student', 'content']
+        indexes = [
+            models.Index(fields=['student', 'completed_at'], name='completion_student_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.username} - {self.content.name}"
@@ -221,4 +361,81 @@ class ContentCreationLimit(models.Model):
     
     class Meta:
         verbose_name = "Batas Pembuatan Konten"
-        verbose_name_plural = "Batas Pembuatan Konten"
\ No newline at end of file
+        verbose_name_plural = "Batas Pembuatan Konten"
+
+# Delta sync
+SYNC_MODELS = [('content', 'Konten'), ('announcement', 'Pengumuman'), ('comment', 'Komentar'), ('completion', 'Penyelesaian'),
+               ('membership', 'Keanggotaan')]
+
+class SyncTombstone(models.Model):
+    """Record of a deleted row so /sync can tell clients to drop it"""
+    model = models.CharField("Jenis Data", max_length=20, choices=SYNC_MODELS)
+    object_id = models.BigIntegerField("ID Data")
+    course_id = models.BigIntegerField("ID Kursus")
+    user_id = models.BigIntegerField("ID Pengguna", null=True, blank=True)
+    deleted_at = models.DateTimeField("Dihapus pada", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Tombstone Sinkronisasi"
+        verbose_name_plural = "Tombstone Sinkronisasi"
+        indexes = [
+            models.Index(fields=['course_id', 'deleted_at'], name='tombstone_course_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} (deleted {self.deleted_at})"
+
+# Time-series rollups
+class CourseDailyStats(models.Model):
+    """Per-course, per-day counts of new rows, filled by the rollup_daily_stats command"""
+    course = models.ForeignKey(Course, verbose_name="Kursus", on_delete=models.CASCADE)
+    date = models.DateField("Tanggal")
+    enrollments = models.IntegerField("Pendaftaran", default=0)
+    completions = models.IntegerField("Penyelesaian Konten", default=0)
+    comments = models.IntegerField("Komentar", default=0)
+    feedback_count = models.IntegerField("Umpan Balik", default=0)
+    rating_sum = models.IntegerField("Jumlah Rating", default=0)
+
+    class Meta:
+        verbose_name = "Statistik Harian Kursus"
+        verbose_name_plural = "Statistik Harian Kursus"
+        unique_together = ['course', 'date']
+
+    def __str__(self):
+        return f"{self.course_id} - {self.date}"
+
+ROLLUP_SOURCES = [('enrollments', 'Pendaftaran'), ('completions', 'Penyelesaian Konten'), ('comments', 'Komentar'), ('feedback', 'Umpan Balik')]
+
+class RollupWatermark(models.Model):
+    """Highest source row id already added to CourseDailyStats"""
+    source = models.CharField("Sumber", max_length=20, choices=ROLLUP_SOURCES, unique=True)
+    last_id = models.BigIntegerField("ID Terakhir", default=0)
+    updated_at = models.DateTimeField("Diperbarui pada", auto_now=True)
+
+    class Meta:
+        verbose_name = "Watermark Rollup"
+        verbose_name_plural = "Watermark Rollup"
+
+    def __str__(self):
+        return f"{self.source}: {self.last_id}"
+
+# Co-enrollment recommendations
+class CourseRecommendation(models.Model):
+    """Precomputed "students who took this also took" neighbour, rebuilt by build_course_recommendations"""
+    course = models.ForeignKey(Course, verbose_name="Kursus", on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Course, verbose_name="Kursus Rekomendasi", on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField("Peringkat")
+    score = models.FloatField("Skor Kemiripan")
+    common_students = models.IntegerField("Siswa yang Sama")
+
+    class Meta:
+        verbose_name = "Rekomendasi Kursus"
+        verbose_name_plural = "Rekomendasi Kursus"
+        unique_together = ['course', 'recommended']
+        indexes = [
+            models.Index(fields=['course', 'rank'], name='recommendation_course_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.recommended_id} ({self.score:.3f})"
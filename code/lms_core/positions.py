@@ -0,0 +1,53 @@
+"""Fractional position keys for ordering CourseContent
+
+Keys are base-36 strings (digits and lowercase letters, which sort the same
+way under byte and locale collations) that never end in '0', so there is
+always room for another key between two neighbours and a move rewrites only
+the moved row. Keys still grow when items keep landing in the same gap;
+once one gets longer than ``REBALANCE_LENGTH`` the course is renumbered.
+"""
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+# Longest key before a course's contents get fresh keys (the column holds 255)
+REBALANCE_LENGTH = 32
+
+def key_between(lower=None, upper=None):
+    """A key sorting strictly between ``lower`` and ``upper`` (None = unbounded)"""
+    lower = lower or ''
+    if upper is not None and lower >= upper:
+        raise ValueError(f"{lower!r} must sort before {upper!r}")
+
+    # Appending steps one digit up (prepending one down) instead of halving the
+    # gap, so keys grow by one character per 35 items at either end, not per 6
+    append = upper is None and bool(lower)
+    prepend = not lower and upper is not None
+    key = ''
+    i = 0
+    while True:
+        low = DIGITS.index(lower[i]) if i < len(lower) else 0
+        high = DIGITS.index(upper[i]) if upper is not None else BASE
+        if low == high:
+            key += DIGITS[low]
+            i += 1
+            continue
+        if append:
+            middle = low + 1
+        elif prepend:
+            middle = high - 1
+        else:
+            middle = (low + high) // 2
+        if middle > low and middle < high:
+            return key + DIGITS[middle]
+        # Adjacent digits: keep lower's digit, anything after it is below upper
+        key += DIGITS[low]
+        upper = None
+        i += 1
+
+def keys_between(lower, upper, count):
+    """``count`` ascending keys between ``lower`` and ``upper``, split by bisection to stay short"""
+    if count <= 0:
+        return []
+    middle = key_between(lower, upper)
+    left = count // 2
+    return keys_between(lower, middle, left) + [middle] + keys_between(middle, upper, count - left - 1)
@@ -0,0 +1,74 @@
+"""values()-to-JSON fast path for read-only list endpoints
+
+An output Schema is compiled once into the ``values_list`` lookups it needs,
+including the join paths of nested schemas. Rows then go from the database
+cursor straight into plain dicts shaped like the schema, without building
+model instances or validating every object.
+"""
+from functools import lru_cache
+
+from django.db import models
+
+from lms_core.fieldsets import relation_schema
+
+class _Node:
+    """Compiled schema level: (name, column index, converter, nested node) entries"""
+
+    def __init__(self):
+        self.entries = []
+        self.pk_index = None
+
+    def build(self, row):
+        obj = {}
+        for name, index, converter, nested in self.entries:
+            if nested is not None:
+                obj[name] = None if row[nested.pk_index] is None else nested.build(row)
+            elif converter is not None:
+                value = row[index]
+                obj[name] = converter(value) if value else None
+            else:
+                obj[name] = row[index]
+        return obj
+
+def _file_url(field):
+    return field.storage.url
+
+def _compile(schema, model, prefix, columns):
+    node = _Node()
+    for name, field_info in schema.model_fields.items():
+        field = model._meta.get_field(name)
+        nested, _ = relation_schema(field_info.annotation)
+        if nested is not None and field.is_relation:
+            node.entries.append((name, None, None, _compile(nested, field.related_model, f"{prefix}{name}__", columns)))
+            continue
+        if field.is_relation:
+            raise ValueError(f"{schema.__name__}.{name} is a relation without a nested schema")
+        converter = _file_url(field) if isinstance(field, models.FileField) else None
+        node.entries.append((name, len(columns), converter, None))
+        if field.primary_key:
+            node.pk_index = len(columns)
+        columns.append(prefix + name)
+
+    if node.pk_index is None:
+        node.pk_index = len(columns)
+        columns.append(prefix + 'pk')
+    return node
+
+class Projection:
+    def __init__(self, schema, model):
+        self.columns = []
+        self.root = _compile(schema, model, '', self.columns)
+
+    def rows(self, queryset):
+        """Yield one dict per row, shaped like the compiled schema"""
+        build = self.root.build
+        for row in queryset.values_list(*self.columns).iterator(chunk_size=2000):
+            yield build(row)
+
+@lru_cache(maxsize=None)
+def get_projection(schema, model):
+    return Projection(schema, model)
+
+def project(queryset, schema):
+    """Project a queryset through ``schema`` into a list of dicts"""
+    return list(get_projection(schema, queryset.model).rows(queryset))
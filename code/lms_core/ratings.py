@@ -0,0 +1,41 @@
+"""Per-course rating summary (count, sum, average and count per star)
+
+Feedback writes call ``apply_rating_change`` with the rating before and
+after the write. It issues a single UPDATE whose right-hand sides read the
+current column values, so concurrent reviews of one course never lose an
+increment and the average is computed from the same row it is stored in.
+"""
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+from lms_core.models import Course
+
+STARS = range(1, 6)
+
+def rating_updates(old=None, new=None):
+    """Column updates (F() expressions) turning a rating ``old`` into ``new``; None means no rating"""
+    count_delta = (new is not None) - (old is not None)
+    sum_delta = (new or 0) - (old or 0)
+    updates = {}
+    if count_delta:
+        updates['rating_count'] = F('rating_count') + count_delta
+    if sum_delta:
+        updates['rating_sum'] = F('rating_sum') + sum_delta
+    if old != new:
+        if old is not None:
+            updates[f'rating_count_{old}'] = F(f'rating_count_{old}') - 1
+        if new is not None:
+            updates[f'rating_count_{new}'] = F(f'rating_count_{new}') + 1
+    if count_delta or sum_delta:
+        count = F('rating_count') + count_delta
+        updates['rating_average'] = Case(
+            When(**{'rating_count__gt': -count_delta}, then=Cast(F('rating_sum') + sum_delta, FloatField()) / count),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    return updates
+
+def apply_rating_change(course_id, old=None, new=None):
+    updates = rating_updates(old, new)
+    if updates:
+        Course.objects.filter(id=course_id).update(**updates)
@@ -0,0 +1,108 @@
+"""Item-item course recommendations from co-enrollment
+
+An offline job (build_course_recommendations) puts CourseMember into a
+sparse course × student matrix and multiplies it by its transpose, a block
+of courses at a time, so each product row holds how many students a course
+shares with every other one. Dividing by the norms gives cosine similarity;
+the top-K neighbours per course are stored in CourseRecommendation.
+The endpoint reads them from that table through the cache, which every
+rebuild invalidates by changing a version key, and projects the courses live.
+"""
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from scipy import sparse
+
+from lms_core.models import Course, CourseMember, CourseRecommendation
+from lms_core.projection import project
+
+VERSION_KEY = "recommendations-version"
+
+def enrollment_matrix():
+    """(course ids, CSR course × student matrix of 1.0 per enrollment)"""
+    pairs = np.array(CourseMember.objects.values_list('course_id', 'user_id'), dtype=np.int64).reshape(-1, 2)
+    course_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    user_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float64), (rows, columns)),
+        shape=(len(course_ids), len(user_ids)),
+    )
+    return course_ids, matrix
+
+def top_neighbours(course_ids, matrix, top_k, min_common, block_size):
+    """Yield (course id, [(neighbour id, cosine, common students), ...]) best first"""
+    norms = np.sqrt(np.asarray(matrix.sum(axis=1)).ravel())
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[0], block_size):
+        # Students shared by each course of the block with every course
+        common = (matrix[start:start + block_size] @ transposed).tocsr()
+        for offset in range(common.shape[0]):
+            row = start + offset
+            begin, end = common.indptr[offset], common.indptr[offset + 1]
+            neighbours, counts = common.indices[begin:end], common.data[begin:end]
+            keep = (neighbours != row) & (counts >= min_common)
+            neighbours, counts = neighbours[keep], counts[keep]
+            if not len(neighbours):
+                continue
+            scores = counts / (norms[row] * norms[neighbours])
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                neighbours, counts, scores = neighbours[best], counts[best], scores[best]
+            order = np.lexsort((course_ids[neighbours], -scores))
+            yield int(course_ids[row]), [
+                (int(course_ids[neighbours[i]]), float(scores[i]), int(counts[i])) for i in order
+            ]
+
+def build_course_recommendations(top_k=None, min_common=None):
+    """Recompute every course's neighbours and replace the table, returns the number of stored rows"""
+    if top_k is None:
+        top_k = getattr(settings, 'RECOMMENDATION_TOP_K', 20)
+    if min_common is None:
+        min_common = getattr(settings, 'RECOMMENDATION_MIN_COMMON_STUDENTS', 2)
+    block_size = getattr(settings, 'RECOMMENDATION_BLOCK_SIZE', 1000)
+    if top_k < 1:
+        raise ValueError("top_k must be 1 or greater")
+    if min_common < 1:
+        raise ValueError("min_common must be 1 or greater")
+
+    course_ids, matrix = enrollment_matrix()
+    rows = [
+        CourseRecommendation(course_id=course_id, recommended_id=neighbour, rank=rank, score=score,
+                             common_students=common)
+        for course_id, neighbours in top_neighbours(course_ids, matrix, top_k, min_common, block_size)
+        for rank, (neighbour, score, common) in enumerate(neighbours, start=1)
+    ]
+    with transaction.atomic():
+        CourseRecommendation.objects.all().delete()
+        CourseRecommendation.objects.bulk_create(rows, batch_size=1000)
+        transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+    return len(rows)
+
+def get_recommendations(course_id, course_schema, limit):
+    """Up to ``limit`` stored neighbours of a course, best first
+
+    Only (course id, rank, score, shared students) are cached until the next
+    rebuild; the recommended courses are projected through ``course_schema``
+    on every call, so edits show at once and deleted courses drop out.
+    """
+    key = f"recommendations:{cache.get(VERSION_KEY)}:{course_id}"
+    neighbours = cache.get(key)
+    if neighbours is None:
+        neighbours = list(CourseRecommendation.objects.filter(course_id=course_id).order_by('rank').values_list(
+            'recommended_id', 'rank', 'score', 'common_students'
+        ))
+        cache.set(key, neighbours, getattr(settings, 'RECOMMENDATION_CACHE_TIMEOUT', 3600))
+    neighbours = neighbours[:limit]
+
+    courses = {
+        course['id']: course
+        for course in project(Course.objects.filter(id__in=[neighbour[0] for neighbour in neighbours]), course_schema)
+    }
+    return [
+        {"recommended": courses[recommended_id], "rank": rank, "score": score, "common_students": common}
+        for recommended_id, rank, score, common in neighbours
+        if recommended_id in courses
+    ]
@@ -0,0 +1,142 @@
+from datetime import datetime
+from decimal import Decimal
+
+import orjson
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from ninja import NinjaAPI
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+_fallback_encoder = NinjaJSONEncoder()
+
+def _orjson_default(obj):
+    # orjson handles datetimes, UUIDs and dataclasses itself
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return _fallback_encoder.default(obj)
+
+class ORJSONRenderer(BaseRenderer):
+    """JSON renderer backed by orjson, output matches the default renderer's types"""
+    media_type = "application/json"
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, request, data, *, response_status):
+        return orjson.dumps(data, default=_orjson_default, option=self.options)
+
+class ORJSONParser(Parser):
+    """JSON request body parser backed by orjson"""
+
+    def parse_body(self, request):
+        return orjson.loads(request.body)
+
+def _msgpack_default(obj):
+    # Same strings as ORJSONRenderer so both formats carry identical values
+    if isinstance(obj, datetime):
+        value = obj.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return _fallback_encoder.default(obj)
+
+class MsgPackRenderer(BaseRenderer):
+    """MessagePack renderer, values msgpack lacks (datetimes, UUIDs, ...) are sent as in JSON"""
+    media_type = "application/msgpack"
+    charset = None
+
+    def render(self, request, data, *, response_status):
+        return msgpack.packb(data, default=_msgpack_default)
+
+class MsgPackParser(Parser):
+    """Parses MessagePack request bodies, any other body goes to the wrapped parser"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def parse_body(self, request):
+        if request.content_type in MSGPACK_MEDIA_TYPES:
+            return msgpack.unpackb(request.body)
+        return self.fallback.parse_body(request)
+
+    def parse_querydict(self, data, list_fields, request):
+        return self.fallback.parse_querydict(data, list_fields, request)
+
+def quality(accepted):
+    """The q parameter of an Accept entry, malformed values count as not acceptable"""
+    try:
+        value = float(accepted.params.get('q', 1))
+    except ValueError:
+        return 0.0
+    return min(max(value, 0.0), 1.0)
+
+def accepted_quality(request, media_type):
+    """Quality the request's Accept header gives ``media_type``, from its most specific matching entry"""
+    main_type, _, sub_type = media_type.partition('/')
+    best = None
+    for accepted in request.accepted_types:
+        if not accepted.match(media_type):
+            continue
+        specificity = (accepted.main_type == main_type) + (accepted.sub_type == sub_type)
+        if best is None or specificity > best[0]:
+            best = (specificity, quality(accepted))
+    return best[1] if best else 0.0
+
+def content_type_for(renderer):
+    if renderer.charset:
+        return f"{renderer.media_type}; charset={renderer.charset}"
+    return renderer.media_type
+
+class NegotiatingNinjaAPI(NinjaAPI):
+    """NinjaAPI that answers ``Accept: application/msgpack`` with MessagePack
+
+    The data is validated against the response schema first, only the final
+    encoding differs. Request bodies sent as MessagePack are parsed as well.
+    Without the msgpack package it behaves like a plain NinjaAPI.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.msgpack_renderer = None
+        if msgpack is not None:
+            self.msgpack_renderer = MsgPackRenderer()
+            self.parser = MsgPackParser(self.parser)
+
+    def get_renderer(self, request):
+        if self.msgpack_renderer is not None:
+            # Only a listed msgpack type selects it (*/* keeps JSON), and not below JSON's quality
+            msgpack_quality = max(
+                (quality(accepted) for accepted in request.accepted_types
+                 if f"{accepted.main_type}/{accepted.sub_type}" in MSGPACK_MEDIA_TYPES),
+                default=0.0
+            )
+            if msgpack_quality > 0 and msgpack_quality >= accepted_quality(request, self.renderer.media_type):
+                return self.msgpack_renderer
+        return self.renderer
+
+    def create_response(self, request, data, *, status=None, temporal_response=None):
+        if temporal_response:
+            status = temporal_response.status_code
+        assert status
+
+        renderer = self.get_renderer(request)
+        content = renderer.render(request, data, response_status=status)
+
+        if temporal_response:
+            response = temporal_response
+            response.content = content
+        else:
+            response = HttpResponse(content, status=status, content_type=content_type_for(renderer))
+        if self.msgpack_renderer is not None:
+            patch_vary_headers(response, ('Accept',))
+        return response
+
+    def create_temporal_response(self, request):
+        return HttpResponse("", content_type=content_type_for(self.get_renderer(request)))
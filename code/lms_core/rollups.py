@@ -0,0 +1,114 @@
+"""Incremental per-course, per-day rollups feeding the time-series endpoint
+
+Each source table has a watermark: the highest row id already counted.
+A run aggregates only rows above it, grouped by course and day, and adds
+them to CourseDailyStats in the same transaction that moves the watermark.
+Rows created less than ROLLUP_SETTLE_SECONDS ago are left for the next run
+and a run stops below the first of them. That covers transactions committing
+within the settle delay: a row whose transaction commits later than that,
+after a higher id was already counted, stays below the watermark and is
+never counted.
+
+Rollups count rows as they were created: later deletions and rating edits
+are not subtracted.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from lms_core.models import Comment, ContentCompletion, CourseDailyStats, CourseFeedback, CourseMember, RollupWatermark
+
+# source: (queryset, course id path, timestamp field, {stats field: aggregate})
+SOURCES = {
+    'enrollments': (CourseMember.objects.all(), 'course_id', 'created_at', {'enrollments': Count('id')}),
+    'completions': (ContentCompletion.objects.all(), 'content__course_id', 'completed_at', {'completions': Count('id')}),
+    'comments': (Comment.objects.all(), 'content_id__course_id', 'created_at', {'comments': Count('id')}),
+    'feedback': (CourseFeedback.objects.all(), 'course_id', 'created_at',
+                 {'feedback_count': Count('id'), 'rating_sum': Sum('rating')}),
+}
+
+def rollup_source(source, settled_before):
+    """Add rows of one source above its watermark to the daily stats, returns the number of rows"""
+    queryset, course_path, time_field, aggregates = SOURCES[source]
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.get_or_create(source=source)
+        # Serialize concurrent runs on the watermark row
+        watermark = RollupWatermark.objects.select_for_update().get(pk=watermark.pk)
+
+        pending = queryset.filter(id__gt=watermark.last_id)
+        # Stop below the first row that has not settled, so it is counted by a later run
+        unsettled = pending.filter(**{f"{time_field}__gte": settled_before}).aggregate(first=Min('id'))['first']
+        if unsettled is not None:
+            pending = pending.filter(id__lt=unsettled)
+        upper = pending.aggregate(upper=Max('id'))['upper']
+        if upper is None:
+            return 0
+        rows = pending.filter(id__lte=upper)
+        buckets = rows.order_by().values(rollup_course=F(course_path), rollup_day=TruncDate(time_field)).annotate(
+            rows=Count('id'), **aggregates
+        )
+
+        increments = {(bucket['rollup_course'], bucket['rollup_day']): bucket for bucket in buckets}
+        existing = {
+            (stats.course_id, stats.date): stats
+            for stats in CourseDailyStats.objects.select_for_update().filter(
+                course_id__in={course for course, _ in increments},
+                date__in={day for _, day in increments},
+            )
+        }
+        to_create, to_update, total = [], [], 0
+        for key, bucket in increments.items():
+            total += bucket['rows']
+            stats = existing.get(key)
+            if stats is None:
+                stats = CourseDailyStats(course_id=key[0], date=key[1])
+                to_create.append(stats)
+            else:
+                to_update.append(stats)
+            for field in aggregates:
+                setattr(stats, field, getattr(stats, field) + (bucket[field] or 0))
+
+        batch_size = getattr(settings, 'ROLLUP_BATCH_SIZE', 500)
+        CourseDailyStats.objects.bulk_create(to_create, batch_size=batch_size)
+        CourseDailyStats.objects.bulk_update(to_update, list(aggregates), batch_size=batch_size)
+        watermark.last_id = upper
+        watermark.save(update_fields=['last_id', 'updated_at'])
+    return total
+
+def rollup_daily_stats(sources=None):
+    """Run every source (or the given ones), returns {source: rows added}"""
+    settled_before = timezone.now() - timedelta(seconds=getattr(settings, 'ROLLUP_SETTLE_SECONDS', 60))
+    return {source: rollup_source(source, settled_before) for source in (sources or SOURCES)}
+
+STAT_FIELDS = ('enrollments', 'completions', 'comments', 'feedback_count', 'rating_sum')
+
+def course_timeseries(course_id, interval, start, end):
+    """Daily or weekly (Monday-based) points between ``start`` and ``end``, zero-filled, read from the rollups only"""
+    step = timedelta(days=1)
+    if interval == 'week':
+        # Snap first, so the first week holds its days before ``start`` too
+        start = start - timedelta(days=start.weekday())
+        step = timedelta(weeks=1)
+    stats = CourseDailyStats.objects.filter(course_id=course_id, date__gte=start, date__lte=end)
+    if interval == 'week':
+        stats = stats.annotate(period=TruncWeek('date'))
+    else:
+        stats = stats.annotate(period=F('date'))
+    totals = {
+        row['period']: row
+        for row in stats.order_by().values('period').annotate(**{field: Sum(field) for field in STAT_FIELDS})
+    }
+
+    points = []
+    period = start
+    while period <= end:
+        row = totals.get(period, {})
+        point = {"period": period, **{field: row.get(field) or 0 for field in STAT_FIELDS}}
+        point["average_rating"] = point["rating_sum"] / point["feedback_count"] if point["feedback_count"] else None
+        points.append(point)
+        period += step
+    return points
@@ -1,6 +1,7 @@
 from ninja import Schema
-from typing import Optional, List
-from datetime import datetime
+from typing import Any, Literal, Optional, List
+from datetime import date, datetime
+from uuid import UUID
 
 from django.contrib.auth.models import User
 
@@ -35,6 +36,9 @@ class UserProfileOut(Schema):
     phone_number: Optional[str]
     description: Optional[str]
     profile_picture: Optional[str]
+    profile_picture_thumbnail: Optional[str]
+    profile_picture_card: Optional[str]
+    profile_picture_full: Optional[str]
 
 class UserProfileIn(Schema):
     first_name: Optional[str]
@@ -72,11 +76,41 @@ class CourseSchemaOut(Schema):
     description: str
     price: int
     image: Optional[str]
+    image_thumbnail: Optional[str]
+    image_card: Optional[str]
+    image_full: Optional[str]
     teacher: UserOut
     category: Optional[CourseCategoryOut]
+    enrollment_count: int
+    rating_count: int
+    rating_average: float
+    rating_count_1: int
+    rating_count_2: int
+    rating_count_3: int
+    rating_count_4: int
+    rating_count_5: int
     created_at: datetime
     updated_at: datetime
 
+class CourseCloneIn(Schema):
+    name: Optional[str] = None
+
+class CourseCloneOut(Schema):
+    course: CourseSchemaOut
+    status: str
+    contents: int
+
+class CourseListOut(Schema):
+    items: List[CourseSchemaOut]
+    count: int
+    has_next: bool
+
+class CourseRecommendationOut(Schema):
+    recommended: CourseSchemaOut
+    rank: int
+    score: float
+    common_students: int
+
 class CourseMemberOut(Schema):
     id: int 
     course_id: CourseSchemaOut
@@ -110,6 +144,7 @@ class CourseContentFull(Schema):
     file_attachment: Optional[str]
     course_id: CourseSchemaOut
     status: str
+    position: str
     created_at: datetime
     updated_at: datetime
 
@@ -137,6 +172,26 @@ class CourseContentUpdate(Schema):
     video_url: Optional[str]
     status: Optional[str]
 
+# Chunked Upload Schemas
+class ChunkedUploadIn(Schema):
+    filename: str
+    total_size: int
+    checksum: Optional[str] = None
+
+class ChunkedUploadOut(Schema):
+    id: UUID
+    filename: str
+    total_size: int
+    chunk_size: int
+    total_parts: int
+    received_parts: List[int]
+    status: str
+
+class ChunkedUploadPartOut(Schema):
+    part_number: int
+    size: int
+    checksum: str
+
 class CourseAnnouncementOut(Schema):
     id: int
     title: str
@@ -225,6 +280,18 @@ class BatchEnrollIn(Schema):
 class CommentModerationIn(Schema):
     is_approved: bool
 
+class CommentBulkModerationIn(Schema):
+    is_approved: bool
+    comment_ids: Optional[List[int]] = None
+    content_id: Optional[int] = None
+    author_id: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class CommentBulkModerationOut(Schema):
+    message: str
+    updated: int
+
 # Enhanced User Activity Dashboard
 class UserActivityDashboardOut(Schema):
     courses_enrolled: int
@@ -243,10 +310,63 @@ class CourseAnalyticsOut(Schema):
     completion_rate: float
     average_rating: float
 
+class FunnelStepOut(Schema):
+    position: int
+    content_id: int
+    name: str
+    status: str
+    completed: int
+    completion_rate: float
+    drop_off: float
+    median_seconds_from_previous: Optional[float] = None
+
+class CourseFunnelOut(Schema):
+    total_students: int
+    steps: List[FunnelStepOut]
+    median_seconds_between_completions: Optional[float] = None
+
+class TimeseriesPointOut(Schema):
+    period: date
+    enrollments: int
+    completions: int
+    comments: int
+    feedback_count: int
+    rating_sum: int
+    average_rating: Optional[float] = None
+
+class CourseTimeseriesOut(Schema):
+    interval: str
+    start: date
+    end: date
+    points: List[TimeseriesPointOut]
+
 # Content Scheduling Schemas
 class ContentScheduleIn(Schema):
     scheduled_release: datetime
 
+# Bulk Content Schemas
+class ContentBulkPublishIn(Schema):
+    content_ids: List[int]
+    status: Literal['published', 'draft']
+
+class ContentScheduleItem(Schema):
+    content_id: int
+    scheduled_release: Optional[datetime] = None
+
+class ContentBulkScheduleIn(Schema):
+    items: List[ContentScheduleItem]
+
+class ContentReorderIn(Schema):
+    content_ids: List[int]
+
+class ContentMoveIn(Schema):
+    after_id: Optional[int] = None
+    before_id: Optional[int] = None
+
+class BulkUpdateOut(Schema):
+    message: str
+    updated: int
+
 # Enrollment Limit Schemas
 class EnrollmentLimitIn(Schema):
     max_enrollment: int
@@ -264,4 +384,49 @@ class UserCertificateOut(Schema):
     course_teacher: str
     completion_date: datetime
     total_contents: int
-    completed_contents: int
\ No newline at end of file
+    completed_contents: int
+
+# Batch Request Schemas
+class BatchRequestItem(Schema):
+    id: str
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+
+class BatchIn(Schema):
+    requests: List[BatchRequestItem]
+
+class BatchResponseItem(Schema):
+    id: str
+    status: int
+    body: Optional[Any] = None
+
+class BatchOut(Schema):
+    responses: List[BatchResponseItem]
+
+# Delta Sync Schemas
+class SyncChangesOut(Schema):
+    changed: List[dict]
+    deleted: List[int]
+
+class SyncOut(Schema):
+    token: str
+    full: bool
+    contents: SyncChangesOut
+    announcements: SyncChangesOut
+    comments: SyncChangesOut
+    completions: SyncChangesOut
+
+# Feed Schemas
+class FeedItemOut(Schema):
+    type: str
+    id: int
+    course_id: int
+    course_name: str
+    title: str
+    body: str
+    at: datetime
+
+class FeedOut(Schema):
+    items: List[FeedItemOut]
+    next_cursor: Optional[str] = None
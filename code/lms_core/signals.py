@@ -0,0 +1,87 @@
+"""Model signal receivers of lms_core, connected in LmsCoreConfig.ready()"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from lms_core.analytics import bump_funnel_version, invalidate_completion_matrix
+from lms_core.catalog import bump_catalog_version
+from lms_core.feed import bump_version
+from lms_core.models import (
+    Comment, ContentCompletion, Course, CourseAnnouncement, CourseContent, CourseFeedback, CourseMember, SyncTombstone
+)
+from lms_core.ratings import apply_rating_change
+
+@receiver(post_delete, sender=CourseContent)
+def tombstone_content(sender, instance, **kwargs):
+    SyncTombstone.objects.create(model='content', object_id=instance.pk, course_id=instance.course_id_id)
+
+@receiver(post_delete, sender=CourseAnnouncement)
+def tombstone_announcement(sender, instance, **kwargs):
+    SyncTombstone.objects.create(model='announcement', object_id=instance.pk, course_id=instance.course_id)
+
+@receiver(post_delete, sender=Comment)
+def tombstone_comment(sender, instance, **kwargs):
+    # Cascades delete comments before their content, so the content row still exists
+    course_id = CourseContent.objects.filter(pk=instance.content_id_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        SyncTombstone.objects.create(model='comment', object_id=instance.pk, course_id=course_id)
+
+@receiver(post_delete, sender=ContentCompletion)
+def tombstone_completion(sender, instance, **kwargs):
+    course_id = CourseContent.objects.filter(pk=instance.content_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        SyncTombstone.objects.create(model='completion', object_id=instance.pk, course_id=course_id,
+                                     user_id=instance.student_id)
+
+@receiver(post_delete, sender=CourseMember)
+def tombstone_membership(sender, instance, **kwargs):
+    # Tells the former member's next /sync to drop the whole course
+    SyncTombstone.objects.create(model='membership', object_id=instance.pk, course_id=instance.course_id_id,
+                                 user_id=instance.user_id_id)
+
+@receiver([post_save, post_delete], sender=CourseAnnouncement)
+def refresh_feed_for_announcement(sender, instance, **kwargs):
+    bump_version(instance.course_id)
+
+@receiver([post_save, post_delete], sender=CourseContent)
+def refresh_feed_for_content(sender, instance, **kwargs):
+    bump_version(instance.course_id_id)
+
+@receiver([post_save, post_delete], sender=CourseMember)
+def reshape_matrix_for_member(sender, instance, created=True, **kwargs):
+    if created:
+        course_id = instance.course_id_id
+        # After commit, so a matrix loaded before the write lands is not cached as current
+        transaction.on_commit(lambda: invalidate_completion_matrix(course_id))
+        bump_funnel_version(course_id)
+
+@receiver([post_save, post_delete], sender=CourseContent)
+def reshape_matrix_for_content(sender, instance, created=True, **kwargs):
+    if created:
+        course_id = instance.course_id_id
+        transaction.on_commit(lambda: invalidate_completion_matrix(course_id))
+
+@receiver([post_save, post_delete], sender=ContentCompletion)
+def refresh_funnel_for_completion(sender, instance, **kwargs):
+    course_id = CourseContent.objects.filter(pk=instance.content_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        bump_funnel_version(course_id)
+
+@receiver([post_save, post_delete], sender=Course)
+def refresh_catalog_counts(sender, instance, **kwargs):
+    bump_catalog_version()
+
+@receiver(post_save, sender=CourseMember)
+def count_enrollment(sender, instance, created, **kwargs):
+    if created:
+        Course.objects.filter(pk=instance.course_id_id).update(enrollment_count=F('enrollment_count') + 1)
+
+@receiver(post_delete, sender=CourseMember)
+def count_unenrollment(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id_id).update(enrollment_count=F('enrollment_count') - 1)
+
+@receiver(post_delete, sender=CourseFeedback)
+def remove_rating(sender, instance, **kwargs):
+    # Covers the API, the admin and cascades from deleted users
+    apply_rating_change(instance.course_id, instance.rating, None)
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+BLOB_DIR = 'blobs'
+
+def blob_name_for(digest, extension):
+    return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+def is_blob_name(name):
+    return name.startswith(BLOB_DIR + '/')
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that keeps each distinct upload once, under its SHA-256
+
+    Uploads are hashed while they are read; when a blob with the same digest
+    already exists nothing is written. Every save adds a reference to the
+    blob's MediaBlob row and ``delete`` only drops one, the files themselves
+    are removed by the ``gc_media_blobs`` management command.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from the content, an existing name holds the same bytes
+        return name
+
+    def _save(self, name, content):
+        content, digest, size = self._hash_content(content)
+        blob_name = blob_name_for(digest, os.path.splitext(name)[1].lower())
+
+        # Reference first: once the count is raised gc_media_blobs keeps the file
+        self._add_reference(blob_name, digest, size)
+        if not self.exists(blob_name):
+            self._write_blob(blob_name, content)
+        return blob_name
+
+    def _add_reference(self, blob_name, digest, size):
+        MediaBlob = apps.get_model('lms_core', 'MediaBlob')
+        while True:
+            if MediaBlob.objects.filter(name=blob_name).update(
+                ref_count=F('ref_count') + 1, updated_at=timezone.now()
+            ):
+                return
+            try:
+                with transaction.atomic():
+                    MediaBlob.objects.create(name=blob_name, digest=digest, size=size, ref_count=1)
+                return
+            except IntegrityError:
+                # Created by a concurrent upload of the same bytes, count on that row
+                continue
+
+    def _write_blob(self, blob_name, content):
+        """Store ``content`` under ``blob_name``, unless a concurrent upload stores it first"""
+        full_path = self.path(blob_name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if hasattr(content, 'temporary_file_path') and self._link_blob(content.temporary_file_path(), full_path):
+            return
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    temp.write(chunk)
+            self._link_blob(temp_path, full_path)
+        finally:
+            os.unlink(temp_path)
+
+    def _link_blob(self, source_path, full_path):
+        """Hard-link a complete file into place, False if it is on another file system"""
+        if self.file_permissions_mode is not None:
+            os.chmod(source_path, self.file_permissions_mode)
+        try:
+            # link() never replaces the target, readers never see a partial blob
+            os.link(source_path, full_path)
+        except FileExistsError:
+            # Same name, same digest: the bytes are already there
+            pass
+        except OSError:
+            return False
+        return True
+
+    def _hash_content(self, content):
+        """Hash the content in chunks, spooling it first if it can't be read twice"""
+        seekable = hasattr(content, 'temporary_file_path')
+        if not seekable:
+            try:
+                seekable = content.seekable()
+            except (AttributeError, ValueError):
+                seekable = False
+
+        digest = hashlib.sha256()
+        size = 0
+        if seekable:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                size += len(chunk)
+            return content, digest.hexdigest(), size
+
+        spooled = tempfile.SpooledTemporaryFile(max_size=File.DEFAULT_CHUNK_SIZE)
+        for chunk in content.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+            spooled.write(chunk)
+        spooled.seek(0)
+        return File(spooled, name=content.name), digest.hexdigest(), size
+
+    def delete(self, name):
+        if not is_blob_name(name):
+            return super().delete(name)
+        MediaBlob = apps.get_model('lms_core', 'MediaBlob')
+        MediaBlob.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, updated_at=timezone.now()
+        )
+
+    def purge(self, name):
+        """Remove a blob file from disk, used by garbage collection"""
+        super().delete(name)
@@ -0,0 +1,135 @@
+"""Delta sync (``/sync?since=<token>``) for offline-first clients
+
+A token is the signed server time of the previous sync. Rows are selected by
+their ``updated_at`` (``completed_at`` for completions) and by publication
+times that passed since the token (scheduled content, future announcements),
+deletes come from SyncTombstone. Rows the caller can no longer see are
+reported as deleted so the client drops its copy. A course joined since the
+token is sent whole, and every row of a course left since then is deleted.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from lms_core.fieldsets import build_plan
+from lms_core.models import (Comment, ContentCompletion, Course, CourseAnnouncement, CourseContent, CourseMember,
+                             SyncTombstone)
+from lms_core.schema import ContentCompletionOut, CourseAnnouncementOut, CourseCommentOut, CourseContentFull
+
+TOKEN_SALT = 'lms_core.sync'
+
+def make_token(at):
+    return signing.dumps(at.isoformat(), salt=TOKEN_SALT)
+
+def read_token(token):
+    """Return the time a token was issued at; 400 if forged, 410 if too old"""
+    try:
+        since = datetime.fromisoformat(signing.loads(token, salt=TOKEN_SALT))
+    except (signing.BadSignature, TypeError, ValueError):
+        raise HttpError(400, "Invalid sync token")
+    retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    if since < timezone.now() - retention:
+        raise HttpError(410, "Sync token expired, a full refresh is required")
+    return since
+
+def serialize(queryset, schema):
+    # Relations are sent as ids, the client already has (or syncs) the related rows
+    return build_plan(schema, queryset.model).serialize(queryset)
+
+def collect(queryset, visible, window, schema):
+    """Changed rows the caller can see, and ids of changed rows they no longer can"""
+    if window is not None:
+        queryset = queryset.filter(window)
+    if visible is None:
+        return serialize(queryset, schema), []
+    changed = serialize(queryset.filter(visible), schema)
+    hidden = [] if window is None else list(queryset.exclude(visible).values_list('id', flat=True))
+    return changed, hidden
+
+def sync_changes(user, since=None):
+    """Everything that changed in the user's courses since ``since`` (None: full snapshot)"""
+    now = timezone.now()
+    # Overlap the previous window a little so rows committed late are not missed
+    after = since - timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 5)) if since else None
+
+    courses = Course.objects.filter(Q(teacher=user) | Q(coursemember__user_id=user)).values('id')
+    taught = Course.objects.filter(teacher=user).values('id')
+    # Courses joined since the token are sent whole, their older rows are new to the client
+    joined = CourseMember.objects.filter(user_id=user, created_at__gt=after).values('course_id') if after else None
+
+    def window(course_field, *time_fields, released=None):
+        if after is None:
+            return None
+        q = Q(**{f"{course_field}__in": joined})
+        for field in time_fields:
+            q |= Q(**{f"{field}__gt": after})
+        if released:
+            q |= Q(**{f"{released}__gt": after, f"{released}__lte": now})
+        return q
+
+    released_content = Q(status='published') & (Q(scheduled_release__isnull=True) | Q(scheduled_release__lte=now))
+    contents = collect(
+        CourseContent.objects.filter(course_id__in=courses),
+        Q(course_id__in=taught) | released_content,
+        window('course_id', 'updated_at', released='scheduled_release'),
+        CourseContentFull
+    )
+    announcements = collect(
+        CourseAnnouncement.objects.filter(course__in=courses),
+        Q(publish_date__lte=now),
+        window('course', 'updated_at', released='publish_date'),
+        CourseAnnouncementOut
+    )
+    comments = collect(
+        Comment.objects.filter(content_id__course_id__in=courses),
+        Q(content_id__course_id__in=taught) | (
+            Q(is_approved=True) & Q(content_id__status='published')
+            & (Q(content_id__scheduled_release__isnull=True) | Q(content_id__scheduled_release__lte=now))
+        ),
+        window('content_id__course_id', 'updated_at', released='content_id__scheduled_release'),
+        CourseCommentOut
+    )
+    completions = collect(
+        ContentCompletion.objects.filter(student=user, content__course_id__in=courses),
+        None,
+        window('content__course_id', 'completed_at'),
+        ContentCompletionOut
+    )
+
+    deleted = {'content': [], 'announcement': [], 'comment': [], 'completion': []}
+    if after is not None:
+        tombstones = SyncTombstone.objects.filter(
+            Q(user_id__isnull=True) | Q(user_id=user.id),
+            course_id__in=courses,
+            deleted_at__gt=after
+        ).exclude(model='membership').values_list('model', 'object_id')
+        for model, object_id in tombstones:
+            deleted[model].append(object_id)
+
+        # Courses left since the token: every row of them goes
+        left = SyncTombstone.objects.filter(
+            model='membership', user_id=user.id, deleted_at__gt=after
+        ).exclude(course_id__in=courses).values('course_id')
+        deleted['content'] += CourseContent.objects.filter(course_id__in=left).values_list('id', flat=True)
+        deleted['announcement'] += CourseAnnouncement.objects.filter(course__in=left).values_list('id', flat=True)
+        deleted['comment'] += Comment.objects.filter(content_id__course_id__in=left).values_list('id', flat=True)
+        deleted['completion'] += ContentCompletion.objects.filter(
+            student=user, content__course_id__in=left
+        ).values_list('id', flat=True)
+
+    def section(result, model):
+        changed, hidden = result
+        return {"changed": changed, "deleted": hidden + deleted[model]}
+
+    return {
+        "token": make_token(now),
+        "full": since is None,
+        "contents": section(contents, 'content'),
+        "announcements": section(announcements, 'announcement'),
+        "comments": section(comments, 'comment'),
+        "completions": section(completions, 'completion'),
+    }
@@ -0,0 +1,1408 @@
+import gzip
+import hashlib
+import io
+import json
+import uuid
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+import msgpack
+import numpy as np
+import orjson
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from ninja.errors import HttpError
+from ninja.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from lms_core.analytics import CompletionMatrix, get_completion_matrix, get_course_funnel, invalidate_completion_matrix
+from lms_core.api import apiv1
+from lms_core.batch import dispatch, run_batch
+from lms_core.catalog import catalog_count
+from lms_core.certificates import stream_certificates_zip
+from lms_core.cloning import clone_course_contents
+from lms_core.compact import compact_payload
+from lms_core.downloads import RangeNotSatisfiable, parse_range_header, serve_file
+from lms_core.feed import get_feed, version_key
+from lms_core.fieldsets import build_plan, parse_paths
+from lms_core.gradebook import gradebook_rows, stream_csv, stream_jsonl
+from lms_core.images import generate_image_variants, render_image_variants, schedule_image_variants
+from lms_core.middleware import CompressionMiddleware, negotiate_encoding
+from lms_core.models import (
+    ChunkedUpload, Comment, ContentCompletion, Course, CourseAnnouncement, CourseCategory, CourseContent,
+    CourseDailyStats, CourseFeedback, CourseMember, CourseRecommendation, MediaBlob, RollupWatermark
+)
+from lms_core.positions import REBALANCE_LENGTH, key_between, keys_between
+from lms_core.projection import project
+from lms_core.ratings import apply_rating_change, rating_updates
+from lms_core.recommendations import (
+    build_course_recommendations, enrollment_matrix, get_recommendations, top_neighbours
+)
+from lms_core.renderers import MsgPackRenderer, ORJSONParser, ORJSONRenderer
+from lms_core.rollups import course_timeseries, rollup_daily_stats, rollup_source
+from lms_core.schema import BatchRequestItem, CourseAnnouncementOut, CourseCommentOut, CourseSchemaOut
+from lms_core.sync import make_token, read_token, sync_changes
+from lms_core.uploads import assemble_upload, discard_upload, received_parts, remove_assembled, upload_dir, write_part
+
+class RangeDownloadTests(SimpleTestCase):
+    def setUp(self):
+        handle, path = tempfile.mkstemp(suffix='.bin')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(bytes(range(100)))
+        self.addCleanup(os.unlink, path)
+        self.field_file = SimpleNamespace(path=path, name='files/data.bin')
+        self.factory = RequestFactory()
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_parse_range_header(self):
+        self.assertEqual(parse_range_header('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range_header('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range_header('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range_header('bytes=-500', 100), (0, 99))
+        self.assertEqual(parse_range_header('bytes=95-500', 100), (95, 99))
+
+    def test_ignored_range_headers(self):
+        for header in (None, '', 'bytes=-', 'items=0-9', 'bytes=0-9,20-29'):
+            self.assertIsNone(parse_range_header(header, 100), header)
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=100-', 'bytes=10-5', 'bytes=-0'):
+            with self.assertRaises(RangeNotSatisfiable, msg=header):
+                parse_range_header(header, 100)
+
+    def test_serves_partial_content(self):
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=10-19'), self.field_file)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.body(response), bytes(range(10, 20)))
+
+    def test_serves_whole_file_without_range(self):
+        response = serve_file(self.factory.get('/'), self.field_file)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.body(response), bytes(range(100)))
+
+    def test_unsatisfiable_range_is_416(self):
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=200-'), self.field_file)
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_stale_if_range_serves_whole_file(self):
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"'), self.field_file)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.body(response)), 100)
+
+    def test_matching_etag_is_304(self):
+        etag = serve_file(self.factory.get('/'), self.field_file)['ETag']
+        response = serve_file(self.factory.get('/', HTTP_IF_NONE_MATCH=etag), self.field_file)
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file_is_404(self):
+        missing = SimpleNamespace(path=self.field_file.path + '.gone', name='files/gone.bin')
+        with self.assertRaises(HttpError) as raised:
+            serve_file(self.factory.get('/'), missing)
+        self.assertEqual(raised.exception.status_code, 404)
+
+class ChunkedUploadAssemblyTests(SimpleTestCase):
+    data = bytes(range(256)) * 10
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(CHUNKED_UPLOAD_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_upload(self, checksum=None):
+        return ChunkedUpload(
+            filename='video.bin', total_size=len(self.data), chunk_size=1000,
+            checksum=hashlib.sha256(self.data).hexdigest() if checksum is None else checksum
+        )
+
+    def write_parts(self, upload, order):
+        for part_number in order:
+            part = self.data[part_number * upload.chunk_size:(part_number + 1) * upload.chunk_size]
+            write_part(upload, part_number, io.BytesIO(part), hashlib.sha256(part).hexdigest())
+
+    def leftovers(self, upload):
+        return sorted(path.name for path in upload_dir(upload).iterdir())
+
+    def test_parts_in_any_order_assemble_in_part_order(self):
+        upload = self.make_upload()
+        self.write_parts(upload, [2, 0, 1])
+        self.assertEqual(received_parts(upload), [0, 1, 2])
+        assembled = assemble_upload(upload)
+        try:
+            self.assertEqual(assembled.name, 'video.bin')
+            self.assertEqual(assembled.read(), self.data)
+        finally:
+            remove_assembled(assembled)
+        self.assertEqual(self.leftovers(upload), ['000000.part', '000001.part', '000002.part'])
+        discard_upload(upload)
+        self.assertFalse(upload_dir(upload).exists())
+
+    def test_missing_parts_are_listed(self):
+        upload = self.make_upload()
+        self.write_parts(upload, [1])
+        with self.assertRaises(HttpError) as raised:
+            assemble_upload(upload)
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertIn('0, 2', str(raised.exception))
+
+    def test_checksum_mismatch_keeps_parts_and_removes_assembled_file(self):
+        upload = self.make_upload(checksum='0' * 64)
+        self.write_parts(upload, [0, 1, 2])
+        with self.assertRaises(HttpError) as raised:
+            assemble_upload(upload)
+        self.assertEqual(raised.exception.status_code, 400)
+        self.assertEqual(self.leftovers(upload), ['000000.part', '000001.part', '000002.part'])
+
+    def test_part_of_wrong_size_is_rejected(self):
+        upload = self.make_upload()
+        with self.assertRaises(HttpError):
+            write_part(upload, 0, io.BytesIO(b'short'))
+        with self.assertRaises(HttpError):
+            write_part(upload, 3, io.BytesIO(b''))
+        self.assertEqual(received_parts(upload), [])
+        self.assertEqual(self.leftovers(upload), [])
+
+    def test_part_checksum_mismatch_is_rejected(self):
+        upload = self.make_upload()
+        with self.assertRaises(HttpError):
+            write_part(upload, 0, io.BytesIO(self.data[:1000]), '0' * 64)
+        self.assertEqual(received_parts(upload), [])
+
+class BatchOrderingTests(SimpleTestCase):
+    def run_items(self, specs):
+        events = []
+        lock = threading.Lock()
+
+        def fake_dispatch(request, api, item):
+            with lock:
+                events.append(('start', item.id, threading.current_thread() is threading.main_thread()))
+            if item.method == 'GET':
+                # Reads finish out of order, results must still follow the request
+                time.sleep(0.02 if item.id.endswith('1') else 0)
+            with lock:
+                events.append(('end', item.id, None))
+            return {"id": item.id, "status": 200, "body": item.method}
+
+        items = [BatchRequestItem(id=item_id, method=method, path='/courses') for item_id, method in specs]
+        with mock.patch('lms_core.batch.dispatch', side_effect=fake_dispatch):
+            results = run_batch(None, None, items)
+        return results, events
+
+    def position(self, events, kind, item_id):
+        return next(index for index, event in enumerate(events) if event[:2] == (kind, item_id))
+
+    def test_results_follow_request_order(self):
+        specs = [('r1', 'GET'), ('r2', 'GET'), ('w1', 'POST'), ('r3', 'GET'), ('w2', 'DELETE'), ('r4', 'GET')]
+        results, _ = self.run_items(specs)
+        self.assertEqual([(result['id'], result['body']) for result in results], specs)
+
+    def test_writes_wait_for_earlier_requests(self):
+        specs = [('r1', 'GET'), ('r2', 'GET'), ('w1', 'POST'), ('r3', 'GET'), ('r4', 'GET'), ('w2', 'PUT')]
+        _, events = self.run_items(specs)
+        self.assertGreater(self.position(events, 'start', 'w1'), self.position(events, 'end', 'r1'))
+        self.assertGreater(self.position(events, 'start', 'w1'), self.position(events, 'end', 'r2'))
+        self.assertGreater(self.position(events, 'start', 'r3'), self.position(events, 'end', 'w1'))
+        self.assertGreater(self.position(events, 'start', 'w2'), self.position(events, 'end', 'r3'))
+        self.assertGreater(self.position(events, 'start', 'w2'), self.position(events, 'end', 'r4'))
+
+    def test_writes_run_on_the_request_thread(self):
+        specs = [('r1', 'GET'), ('r2', 'GET'), ('w1', 'PATCH'), ('r3', 'GET')]
+        _, events = self.run_items(specs)
+        on_request_thread = {item_id: main for kind, item_id, main in events if kind == 'start'}
+        self.assertTrue(on_request_thread['w1'])
+        # A lone read between writes is not sent to the pool either
+        self.assertTrue(on_request_thread['r3'])
+        self.assertFalse(on_request_thread['r1'])
+        self.assertFalse(on_request_thread['r2'])
+
+class BatchDispatchTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().post('/api/v1/batch')
+        self.request.auth = None
+
+    def test_async_endpoint_is_rejected(self):
+        item = BatchRequestItem(id='events', path='/courses/1/events')
+        self.assertEqual(dispatch(self.request, apiv1, item)['status'], 400)
+
+    def test_unknown_path_is_404(self):
+        item = BatchRequestItem(id='missing', path='/no-such-endpoint')
+        self.assertEqual(dispatch(self.request, apiv1, item)['status'], 404)
+
+    def test_failing_view_is_500(self):
+        item = BatchRequestItem(id='broken', path='/courses')
+        with mock.patch('lms_core.batch.decode_response', side_effect=ValueError), self.assertLogs('lms_core.batch'):
+            self.assertEqual(dispatch(self.request, apiv1, item)['status'], 500)
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', 'teacher@example.com')
+        self.student = User.objects.create_user('student', 'student@example.com')
+        self.other = User.objects.create_user('other', 'other@example.com')
+        self.course = Course.objects.create(name='Python', description='-', price=0, teacher=self.teacher)
+        member = CourseMember.objects.create(course_id=self.course, user_id=self.student)
+        CourseMember.objects.create(course_id=self.course, user_id=self.other)
+        self.published = CourseContent.objects.create(name='Intro', course_id=self.course, status='published')
+        self.draft = CourseContent.objects.create(name='Draft', course_id=self.course)
+        self.visible_comment = Comment.objects.create(content_id=self.published, member_id=member, comment='Hi')
+        self.draft_comment = Comment.objects.create(content_id=self.draft, member_id=member, comment='Early')
+        self.completion = ContentCompletion.objects.create(student=self.student, content=self.published)
+        # Everything above happened well before the previous sync
+        self.since = timezone.now() - timedelta(minutes=10)
+        CourseContent.objects.update(updated_at=self.since - timedelta(hours=1))
+        Comment.objects.update(updated_at=self.since - timedelta(hours=1))
+        ContentCompletion.objects.update(completed_at=self.since - timedelta(hours=1))
+        CourseMember.objects.update(created_at=self.since - timedelta(hours=1))
+
+    def ids(self, section):
+        return sorted(row['id'] for row in section['changed'])
+
+    def test_token_round_trip(self):
+        at = timezone.now()
+        self.assertEqual(read_token(make_token(at)), at)
+
+    def test_forged_token_is_400(self):
+        with self.assertRaises(HttpError) as raised:
+            read_token(make_token(timezone.now()) + 'x')
+        self.assertEqual(raised.exception.status_code, 400)
+
+    @override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=30)
+    def test_token_older_than_tombstones_is_410(self):
+        with self.assertRaises(HttpError) as raised:
+            read_token(make_token(timezone.now() - timedelta(days=31)))
+        self.assertEqual(raised.exception.status_code, 410)
+
+    def test_full_snapshot_hides_unreleased_content_from_students(self):
+        changes = sync_changes(self.student)
+        self.assertTrue(changes['full'])
+        self.assertEqual(self.ids(changes['contents']), [self.published.id])
+        self.assertEqual(self.ids(changes['comments']), [self.visible_comment.id])
+        self.assertEqual(self.ids(changes['completions']), [self.completion.id])
+
+    def test_full_snapshot_shows_drafts_to_the_teacher(self):
+        changes = sync_changes(self.teacher)
+        self.assertEqual(self.ids(changes['contents']), [self.published.id, self.draft.id])
+        self.assertEqual(self.ids(changes['comments']), [self.visible_comment.id, self.draft_comment.id])
+
+    def test_delta_holds_only_rows_changed_since_the_token(self):
+        self.assertEqual(self.ids(sync_changes(self.student, self.since)['contents']), [])
+        self.published.name = 'Introduction'
+        self.published.save()
+        changes = sync_changes(self.student, self.since)
+        self.assertFalse(changes['full'])
+        self.assertEqual(self.ids(changes['contents']), [self.published.id])
+        self.assertEqual(self.ids(changes['comments']), [])
+
+    def test_scheduled_release_is_sent_when_it_passes(self):
+        self.draft.status = 'published'
+        self.draft.scheduled_release = timezone.now() + timedelta(hours=1)
+        self.draft.save()
+        CourseContent.objects.filter(pk=self.draft.pk).update(updated_at=self.since - timedelta(hours=1))
+        self.assertEqual(self.ids(sync_changes(self.student, self.since)['contents']), [])
+
+        CourseContent.objects.filter(pk=self.draft.pk).update(scheduled_release=timezone.now() - timedelta(minutes=1))
+        changes = sync_changes(self.student, self.since)
+        self.assertEqual(self.ids(changes['contents']), [self.draft.id])
+        self.assertEqual(self.ids(changes['comments']), [self.draft_comment.id])
+
+    def test_content_hidden_again_is_reported_deleted(self):
+        self.published.status = 'draft'
+        self.published.save()
+        changes = sync_changes(self.student, self.since)
+        self.assertEqual(changes['contents']['deleted'], [self.published.id])
+        self.assertEqual(self.ids(sync_changes(self.teacher, self.since)['contents']), [self.published.id])
+
+    def test_deletes_come_from_tombstones(self):
+        comment_id, draft_id = self.draft_comment.id, self.draft.id
+        self.draft.delete()
+        changes = sync_changes(self.student, self.since)
+        self.assertEqual(changes['contents']['deleted'], [draft_id])
+        self.assertEqual(changes['comments']['deleted'], [comment_id])
+
+    def test_completion_tombstones_reach_only_their_student(self):
+        completion_id = self.completion.id
+        self.completion.delete()
+        self.assertEqual(sync_changes(self.student, self.since)['completions']['deleted'], [completion_id])
+        self.assertEqual(sync_changes(self.other, self.since)['completions']['deleted'], [])
+
+    def test_course_joined_after_the_token_is_sent_whole(self):
+        newcomer = User.objects.create_user('newcomer')
+        CourseMember.objects.create(course_id=self.course, user_id=newcomer)
+        changes = sync_changes(newcomer, self.since)
+        self.assertEqual(self.ids(changes['contents']), [self.published.id])
+        self.assertEqual(self.ids(changes['comments']), [self.visible_comment.id])
+
+    def test_course_left_after_the_token_is_deleted_whole(self):
+        CourseMember.objects.get(course_id=self.course, user_id=self.student).delete()
+        changes = sync_changes(self.student, self.since)
+        self.assertEqual(sorted(changes['contents']['deleted']), [self.published.id, self.draft.id])
+        self.assertIn(self.completion.id, changes['completions']['deleted'])
+        self.assertEqual(sync_changes(self.other, self.since)['contents']['deleted'], [])
+
+    def test_rejoined_course_is_not_deleted(self):
+        CourseMember.objects.get(course_id=self.course, user_id=self.student).delete()
+        CourseMember.objects.create(course_id=self.course, user_id=self.student)
+        changes = sync_changes(self.student, self.since)
+        self.assertNotIn(self.published.id, changes['contents']['deleted'])
+        self.assertEqual(self.ids(changes['contents']), [self.published.id])
+
+    def test_tombstones_before_the_token_are_not_sent(self):
+        self.draft.delete()
+        later = timezone.now() + timedelta(minutes=1)
+        self.assertEqual(sync_changes(self.student, later)['contents']['deleted'], [])
+
+class PositionKeyTests(SimpleTestCase):
+    def test_key_sorts_between_its_neighbours(self):
+        for lower, upper in [(None, None), (None, 'i'), ('i', None), ('a', 'b'), ('a', 'a1'), ('az', 'b'), ('a0z', 'a1')]:
+            key = key_between(lower, upper)
+            self.assertGreater(key, lower or '', (lower, upper))
+            if upper is not None:
+                self.assertLess(key, upper, (lower, upper))
+            self.assertFalse(key.endswith('0'), (lower, upper))
+
+    def test_bounds_out_of_order_are_rejected(self):
+        for lower, upper in [('b', 'a'), ('a', 'a')]:
+            with self.assertRaises(ValueError):
+                key_between(lower, upper)
+
+    def test_repeated_inserts_in_one_gap_stay_ordered(self):
+        lower, upper = 'a', 'b'
+        for _ in range(200):
+            key = key_between(lower, upper)
+            self.assertTrue(lower < key < upper)
+            upper = key
+
+    def test_appending_grows_one_character_per_35_keys(self):
+        keys = [key_between()]
+        for _ in range(200):
+            keys.append(key_between(keys[-1]))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertLessEqual(max(map(len, keys)), 7)
+
+    def test_prepending_shrinks_one_character_per_35_keys(self):
+        keys = [key_between(None, 'i')]
+        for _ in range(200):
+            keys.append(key_between(None, keys[-1]))
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        self.assertFalse(any(key.endswith('0') for key in keys))
+        self.assertLessEqual(max(map(len, keys)), 7)
+
+    def test_keys_between_are_ascending_and_short(self):
+        keys = keys_between('a', 'b', 100)
+        self.assertEqual(len(keys), 100)
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertTrue(all('a' < key < 'b' for key in keys))
+        self.assertLessEqual(max(map(len, keys)), 3)
+        self.assertEqual(keys_between(None, None, 0), [])
+
+class ContentPositionTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher')
+        self.course = Course.objects.create(name='Python', description='-', price=0, teacher=self.teacher)
+        self.contents = [CourseContent.objects.create(name=f'c{i}', course_id=self.course) for i in range(5)]
+
+    def order(self):
+        return list(CourseContent.objects.filter(course_id=self.course).values_list('id', flat=True))
+
+    def test_new_contents_are_appended(self):
+        self.assertEqual(self.order(), [content.id for content in self.contents])
+
+    def test_a_key_is_held_once_per_course(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CourseContent.objects.create(name='dup', course_id=self.course, position=self.contents[0].position)
+        other = Course.objects.create(name='Go', description='-', price=0, teacher=self.teacher)
+        CourseContent.objects.create(name='same key', course_id=other, position=self.contents[0].position)
+
+    def test_rebalance_keeps_the_order_with_short_keys(self):
+        for index, content in enumerate(reversed(self.contents)):
+            CourseContent.objects.filter(pk=content.pk).update(position='0' * REBALANCE_LENGTH + str(index + 1))
+        before = self.order()
+        CourseContent.rebalance(self.course.id)
+        self.assertEqual(self.order(), before)
+        self.assertEqual(before, [content.id for content in reversed(self.contents)])
+        positions = CourseContent.objects.filter(course_id=self.course).values_list('position', flat=True)
+        self.assertLessEqual(max(map(len, positions)), 2)
+
+    def test_assign_positions_may_swap_keys(self):
+        contents = list(reversed(self.contents))
+        CourseContent.assign_positions(contents, [content.position for content in self.contents])
+        self.assertEqual(self.order(), [content.id for content in contents])
+
+    def test_long_appended_key_triggers_a_rebalance(self):
+        CourseContent.objects.filter(pk=self.contents[-1].pk).update(position='z' * REBALANCE_LENGTH)
+        added = CourseContent.objects.create(name='last', course_id=self.course)
+        self.assertEqual(self.order(), [content.id for content in self.contents] + [added.id])
+        positions = CourseContent.objects.filter(course_id=self.course).values_list('position', flat=True)
+        self.assertLessEqual(max(map(len, positions)), 2)
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher')
+        self.course = Course.objects.create(name='Python', description='-', price=0, teacher=self.teacher)
+        self.day = timezone.now() - timedelta(days=2)
+        self.students = []
+
+    def enroll(self, created_at):
+        student = User.objects.create_user(f'student{len(self.students)}')
+        self.students.append(student)
+        member = CourseMember.objects.create(course_id=self.course, user_id=student)
+        CourseMember.objects.filter(pk=member.pk).update(created_at=created_at)
+        return member
+
+    def stats(self):
+        return {
+            stats.date: (stats.enrollments, stats.feedback_count, stats.rating_sum)
+            for stats in CourseDailyStats.objects.filter(course=self.course)
+        }
+
+    def test_rows_are_counted_once(self):
+        self.enroll(self.day)
+        self.enroll(self.day)
+        self.assertEqual(rollup_daily_stats(['enrollments']), {'enrollments': 2})
+        self.assertEqual(rollup_daily_stats(['enrollments']), {'enrollments': 0})
+
+        latest = self.enroll(self.day)
+        self.assertEqual(rollup_daily_stats(['enrollments']), {'enrollments': 1})
+        self.assertEqual(self.stats(), {timezone.localdate(self.day): (3, 0, 0)})
+        self.assertEqual(RollupWatermark.objects.get(source='enrollments').last_id, latest.pk)
+
+    def test_feedback_adds_count_and_rating_sum(self):
+        for rating in (4, 5):
+            self.enroll(self.day)
+            feedback = CourseFeedback.objects.create(
+                student=self.students[-1], course=self.course, rating=rating, feedback_text='-'
+            )
+            CourseFeedback.objects.filter(pk=feedback.pk).update(created_at=self.day)
+        rollup_daily_stats()
+        self.assertEqual(self.stats(), {timezone.localdate(self.day): (2, 2, 9)})
+
+    def test_run_stops_below_the_first_unsettled_row(self):
+        settled = self.enroll(self.day)
+        unsettled = self.enroll(timezone.now())
+        self.enroll(self.day)
+        settled_before = timezone.now() - timedelta(minutes=1)
+
+        self.assertEqual(rollup_source('enrollments', settled_before), 1)
+        self.assertEqual(RollupWatermark.objects.get(source='enrollments').last_id, settled.pk)
+
+        CourseMember.objects.filter(pk=unsettled.pk).update(created_at=self.day)
+        self.assertEqual(rollup_source('enrollments', settled_before), 2)
+        self.assertEqual(self.stats(), {timezone.localdate(self.day): (3, 0, 0)})
+
+    def test_daily_series_is_zero_filled(self):
+        CourseDailyStats.objects.create(course=self.course, date=date(2026, 3, 3), feedback_count=2, rating_sum=7)
+        points = course_timeseries(self.course.id, 'day', date(2026, 3, 2), date(2026, 3, 4))
+        self.assertEqual([point['period'] for point in points], [date(2026, 3, 2), date(2026, 3, 3), date(2026, 3, 4)])
+        self.assertEqual([point['feedback_count'] for point in points], [0, 2, 0])
+        self.assertEqual([point['average_rating'] for point in points], [None, 3.5, None])
+
+    def test_weekly_series_covers_whole_weeks_from_monday(self):
+        # 2026-03-02 is a Monday
+        CourseDailyStats.objects.create(course=self.course, date=date(2026, 3, 2), enrollments=3)
+        CourseDailyStats.objects.create(course=self.course, date=date(2026, 3, 4), enrollments=2)
+        CourseDailyStats.objects.create(course=self.course, date=date(2026, 3, 10), enrollments=1)
+        points = course_timeseries(self.course.id, 'week', date(2026, 3, 4), date(2026, 3, 15))
+        self.assertEqual([(point['period'], point['enrollments']) for point in points],
+                         [(date(2026, 3, 2), 5), (date(2026, 3, 9), 1)])
+
+class RatingSummaryTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher')
+        self.course = Course.objects.create(name='Python', description='-', price=0, teacher=self.teacher)
+
+    def summary(self):
+        course = Course.objects.get(pk=self.course.pk)
+        stars = [getattr(course, f'rating_count_{star}') for star in range(1, 6)]
+        return course.rating_count, course.rating_sum, course.rating_average, stars
+
+    def test_no_change_needs_no_update(self):
+        self.assertEqual(rating_updates(None, None), {})
+        self.assertEqual(rating_updates(3, 3), {})
+
+    def test_changed_rating_keeps_the_count(self):
+        updates = rating_updates(2, 5)
+        self.assertNotIn('rating_count', updates)
+        self.assertEqual(set(updates), {'rating_sum', 'rating_count_2', 'rating_count_5', 'rating_average'})
+
+    def test_create_edit_and_delete(self):
+        apply_rating_change(self.course.id, None, 4)
+        apply_rating_change(self.course.id, None, 2)
+        self.assertEqual(self.summary(), (2, 6, 3.0, [0, 1, 0, 1, 0]))
+
+        apply_rating_change(self.course.id, 4, 5)
+        self.assertEqual(self.summary(), (2, 7, 3.5, [0, 1, 0, 0, 1]))
+
+        apply_rating_change(self.course.id, 2, None)
+        self.assertEqual(self.summary(), (1, 5, 5.0, [0, 0, 0, 0, 1]))
+
+        apply_rating_change(self.course.id, 5, None)
+        self.assertEqual(self.summary(), (0, 0, 0.0, [0, 0, 0, 0, 0]))
+
+    def test_deleting_feedback_removes_its_rating(self):
+        student = User.objects.create_user('student')
+        feedback = CourseFeedback.objects.create(student=student, course=self.course, rating=3, feedback_text='-')
+        apply_rating_change(self.course.id, None, feedback.rating)
+        # Covers deletes outside the API, e.g. the admin or a deleted user
+        student.delete()
+        self.assertEqual(self.summary(), (0, 0, 0.0, [0, 0, 0, 0, 0]))
+
+def auth_headers(user):
+    return {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+class ModerationEventTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher')
+        student = User.objects.create_user('student')
+        self.course = Course.objects.create(name='Python', description='-', price=0, teacher=self.teacher)
+        member = CourseMember.objects.create(course_id=self.course, user_id=student)
+        self.content = CourseContent.objects.create(name='Intro', course_id=self.course, status='published')
+        self.comments = [
+            Comment.objects.create(content_id=self.content, member_id=member, comment=f'c{i}', is_approved=False)
+            for i in range(2)
+        ]
+
+    def published(self, publish):
+        return [(call.args[1], call.args[2]) for call in publish.call_args_list]
+
+    def test_approving_one_comment_pushes_it(self):
+        comment = self.comments[0]
+        with mock.patch('lms_core.api.publish_course_event') as publish:
+            response = self.client.patch(
+                f'/api/v1/content/{self.content.id}/comments/{comment.id}/moderate', {'is_approved': True},
+                content_type='application/json', **auth_headers(self.teacher)
+            )
+        self.assertEqual(response.status_code, 200)
+        events = self.published(publish)
+        self.assertEqual([event for event, _ in events], ['comment_moderated', 'comment'])
+        self.assertEqual(events[1][1]['id'], comment.id)
+        self.assertEqual(events[1][1]['comment'], 'c0')
+
+    def test_bulk_approval_pushes_every_comment(self):
+        with mock.patch('lms_core.api.publish_course_event') as publish:
+            response = self.client.post(
+                f'/api/v1/courses/{self.course.id}/comments/moderate',
+                {'content_id': self.content.id, 'is_approved': True},
+                content_type='application/json', **auth_headers(self.teacher)
+            )
+        self.assertEqual(response.json()['updated'], 2)
+        events = self.published(publish)
+        self.assertEqual([event for event, _ in events], ['comments_moderated', 'comment', 'comment'])
+        self.assertEqual([data['id'] for _, data in events[1:]], [comment.id for comment in self.comments])
+
+    def test_hiding_pushes_only_the_ids(self):
+        Comment.objects.update(is_approved=True)
+        with mock.patch('lms_core.api.publish_course_event') as publish:
+            self.client.post(
+                f'/api/v1/courses/{self.course.id}/comments/moderate',
+                {'content_id': self.content.id, 'is_approved': False},
+                content_type='application/json', **auth_headers(self.teacher)
+            )
+        self.assertEqual([event for event, _ in self.published(publish)], ['comments_moderated'])
+
+class CompletionMatrixTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher')
+        self.course = Course.objects.create(name='Python', description='-', price=0, teacher=self.teacher)
+        # 13 contents: the last byte of each row is partly used
+        self.contents = [CourseContent.objects.create(name=f'c{i}', course_id=self.course) for i in range(13)]
+        self.students = [User.objects.create_user(f'student{i}') for i in range(11)]
+        for student in self.students:
+            CourseMember.objects.create(course_id=self.course, user_id=student)
+        ContentCompletion.objects.bulk_create([
+            ContentCompletion(student=student, content=content)
+            for s_index, student in enumerate(self.students)
+            for c_index, content in enumerate(self.contents)
+            if (s_index * 7 + c_index * 3) % 5 < 2 or s_index == 0
+        ])
+        # A former member keeps completions that no longer count
+        self.former = self.students.pop()
+        CourseMember.objects.get(course_id=self.course, user_id=self.former).delete()
+        invalidate_completion_matrix(self.course.id)
+
+    def completions(self):
+        return ContentCompletion.objects.filter(content__course_id=self.course, student__in=self.students)
+
+    def test_totals_match_count_queries(self):
+        matrix = CompletionMatrix.load(self.course.id)
+        self.assertEqual(matrix.shape, (len(self.students), len(self.contents)))
+        self.assertEqual(matrix.total_completions(), self.completions().count())
+        expected_rate = self.completions().count() / (len(self.students) * len(self.contents)) * 100
+        self.assertAlmostEqual(matrix.completion_rate(), expected_rate)
+        self.assertLess(matrix.total_completions(), ContentCompletion.objects.count())
+
+    def test_per_student_and_per_content_counts(self):
+        matrix = CompletionMatrix.load(self.course.id)
+        per_student = dict(zip(matrix.student_ids.tolist(), matrix.completed_per_student().tolist()))
+        for student in self.students:
+            self.assertEqual(per_student[student.id], self.completions().filter(student=student).count())
+        # Several unpack chunks, the last one partial
+        with mock.patch('lms_core.analytics.UNPACK_ROWS', 3):
+            per_content = dict(zip(matrix.content_ids.tolist(), matrix.completed_per_content().tolist()))
+        rates = matrix.content_rates()
+        for content in self.contents:
+            count = self.completions().filter(content=content).count()
+            self.assertEqual(per_content[content.id], count)
+            self.assertAlmostEqual(rates[content.id], count / len(self.students))
+
+    def test_students_completing(self):
+        matrix = CompletionMatrix.load(self.course.id)
+        chosen = [self.contents[0].id, self.contents[9].id, self.contents[12].id]
+        expected = [
+            student.id for student in self.students
+            if self.completions().filter(student=student, content_id__in=chosen).count() == len(chosen)
+        ]
+        self.assertEqual(matrix.students_completing(chosen), expected)
+        self.assertIn(self.students[0].id, expected)
+        # Unknown contents are ignored
+        self.assertEqual(matrix.students_completing(chosen + [10 ** 9]), expected)
+
+    def test_set_flips_one_cell(self):
+        matrix = CompletionMatrix.load(self.course.id)
+        student, content = self.students[1], self.contents[12]
+        completed = self.completions().filter(student=student, content=content).exists()
+        total = matrix.total_completions()
+        self.assertTrue(matrix.set(student.id, content.id, not completed))
+        self.assertEqual(matrix.total_completions(), total + (-1 if completed else 1))
+        self.assertFalse(matrix.set(self.former.id, content.id, True))
+
+    def test_empty_course(self):
+        course = Course.objects.create(name='Empty', description='-', price=0, teacher=self.teacher)
+        matrix = CompletionMatrix.load(course.id)
+        self.assertEqual(matrix.shape, (0, 0))
+        self.assertEqual(matrix.total_completions(), 0)
+        self.assertEqual(matrix.completion_rate(), 0.0)
+        self.assertEqual(matrix.content_rates(), {})
+        self.assertEqual(matrix.students_completing([]), [])
+
+    def test_course_without_members(self):
+        course = Course.objects.create(name='New', description='-', price=0, teacher=self.teacher)
+        content = CourseContent.objects.create(name='Intro', course_id=course)
+        matrix = CompletionMatrix.load(course.id)
+        self.assertEqual(matrix.shape, (0, 1))
+        self.assertEqual(matrix.completion_rate(), 0.0)
+        self.assertEqual(matrix.content_rates(), {content.id: 0.0})
+
+    def test_enrollment_drops_the_cached_matrix_on_commit(self):
+        cached = get_completion_matrix(self.course.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseMember.objects.create(course_id=self.course, user_id=User.objects.create_user('late'))
+            self.assertIs(get_completion_matrix(self.course.id), cached)
+        self.assertEqual(get_completion_matrix(self.course.id).shape[0], len(self.students) + 1)
+
+class FeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user('teacher')
+        self.student = User.objects.create_user('student')
+        self.course = Course.objects.create(name='Python', description='-', price=0, teacher=self.teacher)
+        CourseMember.objects.create(course_id=self.course, user_id=self.student)
+        CourseContent.objects.create(name='Intro', course_id=self.course, status='published')
+
+    def names(self, page):
+        return [item['title'] for item in page['items']]
+
+    def test_new_content_refreshes_the_cached_page(self):
+        self.assertEqual(self.names(get_feed(self.student)), ['Intro'])
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseContent.objects.create(name='Next', course_id=self.course, status='published')
+        self.assertEqual(sorted(self.names(get_feed(self.student))), ['Intro', 'Next'])
+
+    def test_version_moves_only_when_the_write_commits(self):
+        before = cache.get(version_key(self.course.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseContent.objects.create(name='Next', course_id=self.course, status='published')
+            self.assertEqual(cache.get(version_key(self.course.id)), before)
+        self.assertNotEqual(cache.get(version_key(self.course.id)), before)
+
+class CourseCloneTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.teacher = User.objects.create_user('teacher')
+        self.source = Course.objects.create(name='Python', description='-', price=10, teacher=self.teacher)
+        self.chapter = CourseContent.objects.create(name='Chapter', course_id=self.source, status='published')
+        self.lesson = CourseContent.objects.create(name='Lesson', course_id=self.source, parent_id=self.chapter)
+        self.lesson.file_attachment.save('slides.pdf', ContentFile(b'%PDF slides'), save=True)
+        CourseAnnouncement.objects.create(title='Welcome', content='-', course=self.source, created_by=self.teacher,
+                                          publish_date=timezone.now())
+
+    def clone(self, name='Python again'):
+        return self.client.post(f'/api/v1/courses/{self.source.id}/clone', {'name': name},
+                                content_type='application/json', **auth_headers(self.teacher))
+
+    def test_clone_copies_the_tree_and_shares_files(self):
+        response = self.clone()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'completed')
+        clone = Course.objects.get(pk=response.json()['course']['id'])
+        self.assertEqual(clone.name, 'Python again')
+
+        copies = {content.name: content for content in CourseContent.objects.filter(course_id=clone)}
+        self.assertEqual(set(copies), {'Chapter', 'Lesson'})
+        # Parent links point into the clone, not at the source
+        self.assertEqual(copies['Lesson'].parent_id_id, copies['Chapter'].id)
+        self.assertIsNone(copies['Chapter'].parent_id_id)
+        self.assertEqual(copies['Lesson'].position, self.lesson.position)
+        self.assertEqual(CourseAnnouncement.objects.filter(course=clone).count(), 1)
+
+        self.assertEqual(copies['Lesson'].file_attachment.name, self.lesson.file_attachment.name)
+        self.assertEqual(MediaBlob.objects.get(name=self.lesson.file_attachment.name).ref_count, 2)
+
+    def test_large_course_is_copied_in_the_background(self):
+        with override_settings(COURSE_CLONE_SYNC_LIMIT=1), mock.patch('lms_core.api.run_in_background') as background:
+            response = self.clone()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'processing')
+        self.assertEqual(response.json()['contents'], 2)
+        clone_id = response.json()['course']['id']
+        background.assert_called_once_with(clone_course_contents, self.source.id, clone_id)
+        self.assertFalse(CourseContent.objects.filter(course_id=clone_id).exists())
+
+        self.assertEqual(clone_course_contents(self.source.id, clone_id), 2)
+        self.assertEqual(CourseContent.objects.filter(course_id=clone_id).count(), 2)
+
+    def test_only_the_teacher_can_clone(self):
+        other = User.objects.create_user('other')
+        response = self.client.post(f'/api/v1/courses/{self.source.id}/clone', {},
+                                    content_type='application/json', **auth_headers(other))
+        self.assertEqual(response.status_code, 403)
+
+class GradebookTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher')
+        self.course = Course.objects.create(name='Python', description='-', price=10, teacher=self.teacher)
+        self.first = CourseContent.objects.create(name='First', course_id=self.course, status='published')
+        self.second = CourseContent.objects.create(name='Second', course_id=self.course, status='published')
+        # Users are created in id order: alice < former < bob < gone
+        self.alice, former, self.bob, gone = (User.objects.create_user(name) for name in ('alice', 'former', 'bob', 'gone'))
+        for user in (self.alice, former, self.bob, gone):
+            CourseMember.objects.create(course_id=self.course, user_id=user)
+        for user, content in ((self.alice, self.first), (former, self.first), (former, self.second),
+                              (self.bob, self.second), (gone, self.first)):
+            ContentCompletion.objects.create(student=user, content=content)
+        CourseMember.objects.filter(user_id__in=[former, gone]).delete()
+
+    def test_rows_skip_completions_of_former_members(self):
+        rows = gradebook_rows(self.course)
+        contents, _ = next(rows)
+        self.assertEqual(contents, [(self.first.id, 'First'), (self.second.id, 'Second')])
+        rows = [(member[1], set(completed)) for member, completed in rows]
+        self.assertEqual(rows, [('alice', {self.first.id}), ('bob', {self.second.id})])
+
+    def test_csv_has_a_column_per_content(self):
+        lines = ''.join(stream_csv(self.course)).splitlines()
+        self.assertEqual(lines[0], f"user_id,username,email,first_name,last_name,completed,"
+                                   f"{self.first.id}: First,{self.second.id}: Second")
+        self.assertEqual(len(lines), 3)
+        alice = lines[1].split(',')
+        self.assertEqual(alice[1], 'alice')
+        self.assertEqual(alice[5], '1')
+        self.assertTrue(alice[6])
+        self.assertEqual(alice[7], '')
+
+    def test_jsonl_keys_completions_by_content(self):
+        header, *members = [orjson.loads(line) for line in b''.join(stream_jsonl(self.course)).splitlines()]
+        self.assertEqual([content['id'] for content in header['contents']], [self.first.id, self.second.id])
+        self.assertEqual([member['username'] for member in members], ['alice', 'bob'])
+        self.assertEqual(list(members[1]['completions']), [str(self.second.id)])
+
+    def test_export_is_limited_to_the_teacher(self):
+        response = self.client.get(f'/api/v1/courses/{self.course.id}/gradebook.csv', **auth_headers(self.alice))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(f'/api/v1/courses/{self.course.id}/gradebook.csv', **auth_headers(self.teacher))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('gradebook-course-', response['Content-Disposition'])
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+
+class CertificateExportTests(TestCase):
+    def setUp(self):
+        pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(pool.shutdown)
+        patcher = mock.patch('lms_core.api.get_process_pool', return_value=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = pool
+
+    def entry(self, username):
+        return (f"certificate-{username}.html", {
+            "recipient_name": username.title(), "course_name": 'Python', "teacher_name": 'Teacher',
+            "completed_contents": 2, "total_contents": 2, "completion_date": timezone.now(),
+        })
+
+    def test_archive_is_streamed_per_batch(self):
+        chunks = list(stream_certificates_zip((self.entry(name) for name in ('alice', 'bob', 'carol')), self.pool, 1))
+        # One chunk per rendered batch, then the central directory
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(all(chunks))
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertEqual(archive.namelist(), ['certificate-alice.html', 'certificate-bob.html', 'certificate-carol.html'])
+            self.assertIn('Carol', archive.read('certificate-carol.html').decode())
+
+    def test_export_contains_only_eligible_students(self):
+        teacher = User.objects.create_user('teacher')
+        course = Course.objects.create(name='Python', description='-', price=10, teacher=teacher)
+        contents = [CourseContent.objects.create(name=name, course_id=course, status='published')
+                    for name in ('First', 'Second')]
+        CourseContent.objects.create(name='Draft', course_id=course)
+        done, halfway = User.objects.create_user('done'), User.objects.create_user('halfway')
+        for user in (done, halfway):
+            CourseMember.objects.create(course_id=course, user_id=user)
+        for content in contents:
+            ContentCompletion.objects.create(student=done, content=content)
+        ContentCompletion.objects.create(student=halfway, content=contents[0])
+
+        url = f'/api/v1/courses/{course.id}/certificates/export'
+        self.assertEqual(self.client.get(url, **auth_headers(done)).status_code, 403)
+        response = self.client.get(url, **auth_headers(teacher))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ['certificate-done.html'])
+            self.assertIn('with 2 out of 2 contents completed', archive.read('certificate-done.html').decode())
+
+def png_bytes(size, mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+@override_settings(IMAGE_VARIANT_FORMAT='WEBP')
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.teacher = User.objects.create_user('teacher')
+        self.course = Course.objects.create(name='Python', description='-', price=10, teacher=self.teacher)
+        self.course.image.save('cover.png', ContentFile(png_bytes((2000, 1000))), save=True)
+
+    def test_variants_fit_their_bounding_box(self):
+        variants = render_image_variants(io.BytesIO(png_bytes((2000, 1000), 'P')))
+        sizes = {name: Image.open(io.BytesIO(data)).size for name, data in variants.items()}
+        self.assertEqual(sizes, {'thumbnail': (160, 80), 'card': (640, 320), 'full': (1600, 800)})
+        self.assertEqual(Image.open(io.BytesIO(variants['card'])).format, 'WEBP')
+
+    def test_variants_are_stored_next_to_the_original(self):
+        generate_image_variants('lms_core.Course', self.course.pk, 'image')
+        self.course.refresh_from_db()
+        names = {getattr(self.course, f'image_{name}').name for name in ('thumbnail', 'card', 'full')}
+        self.assertEqual(len(names), 3)
+        for name in names:
+            self.assertTrue(name.endswith('.webp'))
+            self.assertTrue(self.course.image.storage.exists(name))
+            self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+
+    def test_replaced_original_keeps_its_variants_empty(self):
+        def replace_meanwhile(source):
+            Course.objects.filter(pk=self.course.pk).update(image='course/replaced.png')
+            return render_image_variants(source)
+
+        with mock.patch('lms_core.images.render_image_variants', side_effect=replace_meanwhile):
+            generate_image_variants('lms_core.Course', self.course.pk, 'image')
+        self.assertFalse(Course.objects.get(pk=self.course.pk).image_card)
+
+    def test_generation_waits_for_the_commit(self):
+        with mock.patch('lms_core.workers.get_background_pool') as pool:
+            with self.captureOnCommitCallbacks() as callbacks:
+                schedule_image_variants(self.course, 'image')
+            pool.assert_not_called()
+            for callback in callbacks:
+                callback()
+        pool.return_value.submit.assert_called_once()
+        self.assertEqual(pool.return_value.submit.call_args.args[1:3],
+                         (generate_image_variants, ('lms_core.Course', self.course.pk, 'image')))
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def gc(self, *args):
+        out = io.StringIO()
+        call_command('gc_media_blobs', '--grace-hours=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_identical_uploads_share_one_blob(self):
+        first = default_storage.save('notes.PDF', ContentFile(b'same bytes'))
+        second = default_storage.save('other.pdf', ContentFile(b'same bytes'))
+        digest = hashlib.sha256(b'same bytes').hexdigest()
+        self.assertEqual(first, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.pdf')
+        self.assertEqual(second, first)
+        blob = MediaBlob.objects.get(name=first)
+        self.assertEqual((blob.ref_count, blob.size, blob.digest), (2, 10, digest))
+
+        default_storage.delete(first)
+        self.assertEqual(MediaBlob.objects.get(name=first).ref_count, 1)
+        self.assertTrue(default_storage.exists(first))
+
+    def test_gc_recounts_references_and_purges_orphans(self):
+        teacher = User.objects.create_user('teacher')
+        course = Course.objects.create(name='Python', description='-', price=10, teacher=teacher)
+        content = CourseContent.objects.create(name='Lesson', course_id=course)
+        content.file_attachment.save('kept.pdf', ContentFile(b'kept'), save=True)
+        orphan = default_storage.save('orphan.pdf', ContentFile(b'orphan'))
+        default_storage.delete(orphan)
+        # A reference that was lost, e.g. a row deleted without its file
+        MediaBlob.objects.filter(name=content.file_attachment.name).update(ref_count=5)
+
+        self.assertIn('1 blob(s) recounted, 1 orphaned blob(s)', self.gc('--dry-run'))
+        self.assertTrue(default_storage.exists(orphan))
+
+        self.assertIn('1 blob(s) purged', self.gc())
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertFalse(MediaBlob.objects.filter(name=orphan).exists())
+        self.assertEqual(MediaBlob.objects.get(name=content.file_attachment.name).ref_count, 1)
+        self.assertTrue(default_storage.exists(content.file_attachment.name))
+
+    def test_gc_purges_old_untracked_files(self):
+        name = default_storage.save('lost.pdf', ContentFile(b'lost'))
+        MediaBlob.objects.filter(name=name).delete()
+        old = time.time() - 3600
+        os.utime(default_storage.path(name), (old, old))
+
+        self.assertIn('1 untracked file(s)', self.gc())
+        self.assertFalse(default_storage.exists(name))
+
+class ORJSONRendererTests(TestCase):
+    def test_output_matches_the_standard_renderer(self):
+        data = {
+            "at": datetime(2025, 3, 1, 12, 30, tzinfo=dt_timezone.utc),
+            "day": date(2025, 3, 1),
+            "price": Decimal('10.50'),
+            "id": uuid.UUID(int=1),
+            "items": [1, "two", None],
+        }
+        fast = ORJSONRenderer().render(None, data, response_status=200)
+        standard = JSONRenderer().render(None, data, response_status=200)
+        self.assertEqual(orjson.loads(fast), json.loads(standard))
+        self.assertEqual(orjson.loads(fast)['at'], '2025-03-01T12:30:00Z')
+
+    def test_parser_reads_json_bodies(self):
+        request = RequestFactory().post('/', b'{"name": "Python", "tags": [1, 2]}', content_type='application/json')
+        self.assertEqual(ORJSONParser().parse_body(request), {"name": "Python", "tags": [1, 2]})
+
+    def test_api_round_trip(self):
+        user = User.objects.create_user('teacher')
+        response = self.client.post('/api/v1/categories', {"name": "Data", "description": "Ilmu data"},
+                                    content_type='application/json', **auth_headers(user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Data')
+        self.assertTrue(response.json()['created_at'].endswith('Z'))
+        invalid = self.client.post('/api/v1/categories', b'{"name": ', content_type='application/json',
+                                   **auth_headers(user))
+        self.assertEqual(invalid.status_code, 400)
+
+class FieldsetTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher', email='teacher@example.com')
+        self.course = Course.objects.create(name='Python', description='-', price=10, teacher=self.teacher)
+        self.announcement = CourseAnnouncement.objects.create(
+            title='Welcome', content='-', course=self.course, created_by=self.teacher,
+            publish_date=timezone.now() - timedelta(hours=1)
+        )
+        self.url = f'/api/v1/courses/{self.course.id}/announcements'
+
+    def get(self, **params):
+        response = self.client.get(self.url, params, **auth_headers(self.teacher))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_parse_paths(self):
+        self.assertIsNone(parse_paths(None))
+        self.assertEqual(parse_paths(' id, course.name ,,'), frozenset({'id', 'course.name'}))
+
+    def test_plan_loads_only_the_requested_columns(self):
+        plan = build_plan(CourseAnnouncementOut, CourseAnnouncement, frozenset({'title', 'course.name'}), frozenset())
+        self.assertEqual(plan.select_related, ['course'])
+        self.assertEqual(set(plan.only), {'id', 'title', 'course', 'course__id', 'course__name'})
+
+    def test_sparse_fields_and_relation_ids(self):
+        self.assertEqual(self.get(fields='title,course'),
+                         [{"id": self.announcement.id, "title": 'Welcome', "course": self.course.id}])
+        self.assertEqual(self.get(fields='title', expand='created_by')[0].keys(), {'id', 'title'})
+
+    def test_dotted_paths_expand_the_relation(self):
+        row, = self.get(fields='course.name,created_by')
+        self.assertEqual(row, {"id": self.announcement.id, "course": {"id": self.course.id, "name": 'Python'},
+                               "created_by": self.teacher.id})
+
+    def test_expand_embeds_the_relation(self):
+        row, = self.get(expand='created_by')
+        self.assertEqual(row['created_by']['email'], 'teacher@example.com')
+        self.assertEqual(row['course'], self.course.id)
+        self.assertEqual(self.get(expand='*')[0]['course']['teacher']['id'], self.teacher.id)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(self.url, {'fields': 'title,secret'}, **auth_headers(self.teacher))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['detail'])
+
+class CompactResponseTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher')
+        self.course = Course.objects.create(name='Python', description='-', price=10, teacher=self.teacher)
+        self.content = CourseContent.objects.create(name='Lesson', course_id=self.course, status='published')
+        student = User.objects.create_user('student')
+        self.member = CourseMember.objects.create(course_id=self.course, user_id=student)
+        for text in ('First', 'Second'):
+            Comment.objects.create(content_id=self.content, member_id=self.member, comment=text)
+
+    def test_shared_objects_are_included_once(self):
+        with self.assertNumQueries(1):
+            payload = compact_payload(Comment.objects.order_by('id'), CourseCommentOut)
+        self.assertEqual([row['comment'] for row in payload['data']], ['First', 'Second'])
+        self.assertEqual({row['content_id'] for row in payload['data']}, {self.content.id})
+        self.assertEqual(payload['relations']['comment'], {'content_id': 'coursecontent', 'member_id': 'coursemember'})
+        self.assertEqual(payload['relations']['course'], {'teacher': 'user'})
+
+        included = payload['included']
+        self.assertEqual(list(included['coursecontent']), [str(self.content.id)])
+        self.assertEqual(included['coursecontent'][str(self.content.id)]['course_id'], self.course.id)
+        self.assertEqual(included['course'][str(self.course.id)]['name'], 'Python')
+        self.assertEqual(set(included['user']), {str(self.teacher.id), str(self.member.user_id_id)})
+
+    def test_fields_limit_the_rows(self):
+        payload = compact_payload(Comment.objects.order_by('id'), CourseCommentOut, frozenset({'comment'}))
+        self.assertEqual(payload['data'][0].keys(), {'id', 'comment'})
+        self.assertEqual(payload['included'], {})
+
+    def test_list_endpoint_switches_on_compact(self):
+        url = f'/api/v1/content/{self.content.id}/comments'
+        plain = self.client.get(url, **auth_headers(self.teacher)).json()
+        self.assertEqual(plain[0]['content_id']['name'], 'Lesson')
+        compact = self.client.get(url, {'compact': 'true'}, **auth_headers(self.teacher)).json()
+        self.assertEqual(len(compact['data']), 2)
+        self.assertEqual(compact['data'][0]['member_id'], self.member.id)
+        self.assertIn(str(self.member.id), compact['included']['coursemember'])
+
+class ProjectionTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user('teacher')
+        category = CourseCategory.objects.create(name='Data', created_by=self.teacher)
+        Course.objects.create(name='Python', description='-', price=10, teacher=self.teacher, category=category,
+                              image='course/cover.png')
+        Course.objects.create(name='SQL', description='-', price=0, teacher=self.teacher)
+
+    def test_rows_match_the_schema_output(self):
+        courses = Course.objects.order_by('id')
+        expected = [CourseSchemaOut.from_orm(course).model_dump() for course in courses]
+        with self.assertNumQueries(1):
+            rows = project(courses, CourseSchemaOut)
+        self.assertEqual(rows, expected)
+        self.assertIsNone(rows[1]['category'])
+        self.assertIsNone(rows[1]['image'])
+        self.assertEqual(rows[0]['image'], default_storage.url('course/cover.png'))
+        self.assertEqual(rows[0]['category']['created_by']['id'], self.teacher.id)
+
+    def test_list_endpoint_uses_the_projection(self):
+        course = Course.objects.get(name='Python')
+        CourseAnnouncement.objects.create(title='Welcome', content='-', course=course, created_by=self.teacher,
+                                          publish_date=timezone.now() - timedelta(hours=1))
+        response = self.client.get(f'/api/v1/courses/{course.id}/announcements', **auth_headers(self.teacher))
+        self.assertEqual(response.status_code, 200)
+        row, = response.json()
+        self.assertEqual(row['course']['category']['name'], 'Data')
+        self.assertEqual(row['created_by']['id'], self.teacher.id)
+
+@override_settings(COMPRESSION_ENCODINGS=['gzip'], COMPRESSION_MIN_SIZE=100,
+                   COMPRESSION_CACHE_PATHS=[r'^/api/v1/courses$'])
+class CompressionMiddlewareTests(TestCase):
+    body = b'{"items": []}' * 100
+
+    def setUp(self):
+        cache.clear()
+
+    def process(self, path='/api/v1/courses', accept='gzip', response=None):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept)
+        if response is None:
+            response = HttpResponse(self.body, content_type='application/json')
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate_encoding(self):
+        encodings = ['zstd', 'br', 'gzip']
+        self.assertEqual(negotiate_encoding('gzip, br', encodings), 'br')
+        self.assertEqual(negotiate_encoding('gzip;q=1, br;q=0.5', encodings), 'gzip')
+        self.assertEqual(negotiate_encoding('*;q=0.2, zstd;q=0', encodings), 'br')
+        self.assertEqual(negotiate_encoding('BR;q=0.8', encodings), 'br')
+        self.assertIsNone(negotiate_encoding('identity', encodings))
+        self.assertIsNone(negotiate_encoding('gzip;q=oops', encodings))
+        self.assertIsNone(negotiate_encoding('', encodings))
+
+    def test_compresses_accepted_responses(self):
+        response = self.process(path='/api/v1/courses/1', accept='br;q=1, gzip;q=0.5')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+
+    def test_leaves_small_or_unaccepted_responses_alone(self):
+        self.assertFalse(self.process(accept='identity').has_header('Content-Encoding'))
+        small = self.process(response=HttpResponse(b'{}', content_type='application/json'))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        image = self.process(response=HttpResponse(self.body, content_type='image/png'))
+        self.assertFalse(image.has_header('Content-Encoding'))
+        self.assertFalse(image.has_header('Vary'))
+
+    def test_etag_becomes_weak(self):
+        response = HttpResponse(self.body, content_type='application/json')
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.process(response=response)['ETag'], 'W/"abc"')
+
+    def test_cached_paths_reuse_the_compressed_body(self):
+        first = self.process()
+        with mock.patch('lms_core.middleware.compress') as compress:
+            second = self.process()
+            compress.assert_not_called()
+            self.process(path='/api/v1/courses/1')
+            compress.assert_called_once()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(gzip.decompress(second.content), self.body)
+
+    def test_streams_are_compressed_chunk_by_chunk(self):
+        response = self.process(response=StreamingHttpResponse(iter([b'a,b\n', b'c,d\n']), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'a,b\nc,d\n')
+
+class MsgPackNegotiationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('teacher')
+        CourseCategory.objects.create(name='Data', created_by=self.user)
+
+    def get(self, accept):
+        return self.client.get('/api/v1/categories', HTTP_ACCEPT=accept)
+
+    def test_renderer_sends_dates_as_in_json(self):
+        data = {"at": datetime(2025, 3, 1, 12, 30, tzinfo=dt_timezone.utc), "price": Decimal('10.50')}
+        packed = MsgPackRenderer().render(None, data, response_status=200)
+        self.assertEqual(msgpack.unpackb(packed), {"at": '2025-03-01T12:30:00Z', "price": '10.50'})
+
+    def test_accept_selects_the_format(self):
+        packed = self.get('application/msgpack')
+        self.assertEqual(packed['Content-Type'], 'application/msgpack')
+        self.assertIn('Accept', packed['Vary'])
+        plain = self.get('application/json')
+        self.assertEqual(plain['Content-Type'], 'application/json; charset=utf-8')
+        self.assertEqual(msgpack.unpackb(packed.content), plain.json())
+
+    def test_quality_values_are_respected(self):
+        for accept, media_type in (
+            ('*/*', 'application/json'),
+            ('application/x-msgpack', 'application/msgpack'),
+            ('application/json;q=0.5, application/msgpack', 'application/msgpack'),
+            ('application/json, application/msgpack;q=0.5', 'application/json'),
+            ('application/*;q=0.8, application/msgpack;q=0.8', 'application/msgpack'),
+            ('application/msgpack;q=0', 'application/json'),
+        ):
+            with self.subTest(accept=accept):
+                self.assertEqual(self.get(accept)['Content-Type'].split(';')[0], media_type)
+
+    def test_errors_follow_the_negotiated_format(self):
+        response = self.client.get('/api/v1/courses/1', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(msgpack.unpackb(response.content), {"detail": 'Unauthorized'})
+
+    def test_msgpack_request_bodies_are_parsed(self):
+        response = self.client.post('/api/v1/categories', msgpack.packb({"name": 'Web', "description": None}),
+                                    content_type='application/msgpack', **auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Web')
+
+class FunnelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user('teacher')
+        self.course = Course.objects.create(name='Python', description='-', price=10, teacher=self.teacher)
+        self.contents = [CourseContent.objects.create(name=name, course_id=self.course, status='published')
+                         for name in ('First', 'Second', 'Third')]
+        students = [User.objects.create_user(name) for name in ('a', 'b', 'c', 'd', 'former')]
+        for student in students:
+            CourseMember.objects.create(course_id=self.course, user_id=student)
+        self.student = students[3]
+        start = timezone.now() - timedelta(days=1)
+        a, b, c, _, former = students
+        for student, step, seconds in ((a, 0, 0), (a, 1, 60), (a, 2, 180), (b, 0, 0), (b, 1, 120), (c, 0, 0),
+                                       (former, 0, 0), (former, 1, 1)):
+            completion = ContentCompletion.objects.create(student=student, content=self.contents[step])
+            ContentCompletion.objects.filter(pk=completion.pk).update(completed_at=start + timedelta(seconds=seconds))
+        CourseMember.objects.filter(user_id=former).delete()
+
+    def test_steps_in_course_order(self):
+        funnel = get_course_funnel(self.course.id)
+        self.assertEqual(funnel['total_students'], 4)
+        steps = funnel['steps']
+        self.assertEqual([step['content_id'] for step in steps], [content.id for content in self.contents])
+        self.assertEqual([step['completed'] for step in steps], [3, 2, 1])
+        self.assertEqual([step['completion_rate'] for step in steps], [75.0, 50.0, 25.0])
+        self.assertEqual([step['drop_off'] for step in steps], [0.0, 25.0, 25.0])
+        self.assertEqual([step['median_seconds_from_previous'] for step in steps], [None, 90.0, 120.0])
+        self.assertEqual(funnel['median_seconds_between_completions'], 120.0)
+
+    def test_new_completion_refreshes_the_cached_funnel(self):
+        self.assertEqual(get_course_funnel(self.course.id)['steps'][0]['completed'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            ContentCompletion.objects.create(student=self.student, content=self.contents[0])
+        self.assertEqual(get_course_funnel(self.course.id)['steps'][0]['completed'], 4)
+
+    def test_endpoint_is_limited_to_the_teacher(self):
+        url = f'/api/v1/courses/{self.course.id}/analytics/funnel'
+        self.assertEqual(self.client.get(url, **auth_headers(self.student)).status_code, 403)
+        response = self.client.get(url, **auth_headers(self.teacher))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([step['position'] for step in response.json()['steps']], [1, 2, 3])
+
+class CatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user('teacher')
+        self.category = CourseCategory.objects.create(name='Data', created_by=self.teacher)
+        self.courses = [
+            Course.objects.create(name=f'Course {index}', description='-', price=index * 10, teacher=self.teacher,
+                                  category=self.category if index % 2 else None)
+            for index in range(12)
+        ]
+
+    def names(self, **params):
+        response = self.client.get('/api/v1/courses', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.json()['items']]
+
+    def test_pages_report_count_and_has_next(self):
+        first = self.client.get('/api/v1/courses').json()
+        self.assertEqual((len(first['items']), first['count'], first['has_next']), (10, 12, True))
+        with mock.patch('lms_core.api.catalog_count') as count:
+            last = self.client.get('/api/v1/courses', {'page': 2}).json()
+        # The short last page settles the total without a COUNT
+        count.assert_not_called()
+        self.assertEqual((len(last['items']), last['count'], last['has_next']), (2, 12, False))
+        beyond = self.client.get('/api/v1/courses', {'page': 3}).json()
+        self.assertEqual((beyond['items'], beyond['count'], beyond['has_next']), ([], 12, False))
+        self.assertEqual(self.client.get('/api/v1/courses', {'page': 0}).status_code, 400)
+
+    def test_filters_and_sorts(self):
+        self.assertEqual(self.names(category_id=self.category.id, max_price=50), ['Course 5', 'Course 3', 'Course 1'])
+        self.assertEqual(self.names(min_price=100), ['Course 11', 'Course 10'])
+        self.assertEqual(self.client.get('/api/v1/courses', {'min_price': 5, 'max_price': 1}).status_code, 400)
+
+        for user in (User.objects.create_user('a'), User.objects.create_user('b')):
+            CourseMember.objects.create(course_id=self.courses[3], user_id=user)
+        CourseMember.objects.create(course_id=self.courses[7], user_id=User.objects.create_user('c'))
+        self.assertEqual(self.names(sort='popular')[:3], ['Course 3', 'Course 7', 'Course 11'])
+        Course.objects.filter(pk=self.courses[2].pk).update(rating_average=4.5, rating_count=2)
+        self.assertEqual(self.names(sort='rating')[0], 'Course 2')
+
+    def test_count_is_cached_until_a_course_changes(self):
+        self.assertEqual(catalog_count(Course.objects.all(), {}), 12)
+        with self.assertNumQueries(0):
+            self.assertEqual(catalog_count(Course.objects.all(), {}), 12)
+        self.assertEqual(catalog_count(Course.objects.filter(price__gte=100), {"min_price": 100}), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.create(name='New', description='-', price=0, teacher=self.teacher)
+        self.assertEqual(catalog_count(Course.objects.all(), {}), 13)
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user('teacher')
+        self.a, self.b, self.c, self.d = (
+            Course.objects.create(name=name, description='-', price=0, teacher=self.teacher) for name in 'ABCD'
+        )
+        students = [User.objects.create_user(f's{index}') for index in range(4)]
+        for course, members in ((self.a, students[:3]), (self.b, students[:2]), (self.c, students[2:3]),
+                                (self.d, students)):
+            for student in members:
+                CourseMember.objects.create(course_id=course, user_id=student)
+
+    def test_neighbours_match_dense_cosine_similarity(self):
+        course_ids, matrix = enrollment_matrix()
+        dense = matrix.toarray()
+        common = dense @ dense.T
+        cosine = common / np.outer(np.linalg.norm(dense, axis=1), np.linalg.norm(dense, axis=1))
+        expected = {}
+        for row, course_id in enumerate(course_ids.tolist()):
+            neighbours = [(int(course_ids[other]), float(cosine[row, other]), int(common[row, other]))
+                          for other in range(len(course_ids)) if other != row and common[row, other] >= 1]
+            expected[course_id] = sorted(neighbours, key=lambda n: (-n[1], n[0]))[:2]
+
+        for block_size in (1, 3, 100):
+            with self.subTest(block_size=block_size):
+                result = dict(top_neighbours(course_ids, matrix, 2, 1, block_size))
+                self.assertEqual(result.keys(), expected.keys())
+                for course_id, neighbours in result.items():
+                    self.assertEqual([n[0] for n in neighbours], [n[0] for n in expected[course_id]])
+                    self.assertEqual([n[2] for n in neighbours], [n[2] for n in expected[course_id]])
+                    np.testing.assert_allclose([n[1] for n in neighbours], [n[1] for n in expected[course_id]])
+
+    def test_build_keeps_courses_with_enough_common_students(self):
+        self.assertEqual(build_course_recommendations(top_k=5, min_common=2), 6)
+        stored = list(CourseRecommendation.objects.filter(course=self.a).order_by('rank').values_list(
+            'recommended_id', 'common_students'))
+        self.assertEqual(stored, [(self.d.id, 3), (self.b.id, 2)])
+        self.assertFalse(CourseRecommendation.objects.filter(course=self.c).exists())
+        self.assertAlmostEqual(CourseRecommendation.objects.get(course=self.a, recommended=self.d).score,
+                               3 / (2 * 3 ** 0.5))
+        with self.assertRaises(ValueError):
+            build_course_recommendations(top_k=0)
+        with self.assertRaises(ValueError):
+            build_course_recommendations(min_common=0)
+
+    def test_cached_neighbours_show_live_courses(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            build_course_recommendations(top_k=5, min_common=2)
+        first = get_recommendations(self.a.id, CourseSchemaOut, 10)
+        self.assertEqual([item['recommended']['name'] for item in first], ['D', 'B'])
+        self.assertEqual([item['rank'] for item in first], [1, 2])
+
+        Course.objects.filter(pk=self.d.pk).update(name='D renamed')
+        # Neighbours come from the cache, only the courses are read
+        with self.assertNumQueries(1):
+            items = get_recommendations(self.a.id, CourseSchemaOut, 10)
+        self.assertEqual(items[0]['recommended']['name'], 'D renamed')
+        self.assertEqual(len(get_recommendations(self.a.id, CourseSchemaOut, 1)), 1)
+
+        CourseMember.objects.filter(course_id=self.d).delete()
+        Course.objects.filter(pk=self.d.pk).delete()
+        self.assertEqual([item['recommended']['name'] for item in get_recommendations(self.a.id, CourseSchemaOut, 10)],
+                         ['B'])
+
+    def test_endpoint(self):
+        build_course_recommendations(top_k=5, min_common=2)
+        url = f'/api/v1/courses/{self.b.id}/recommendations'
+        response = self.client.get(url, {'limit': 1}, **auth_headers(self.teacher))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['recommended']['id'] for item in response.json()], [self.a.id])
+        self.assertEqual(response.json()[0]['common_students'], 2)
+        self.assertEqual(self.client.get(url, {'limit': 0}, **auth_headers(self.teacher)).status_code, 400)
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from ninja.errors import HttpError
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+def upload_dir(upload):
+    return Path(getattr(settings, 'CHUNKED_UPLOAD_DIR', settings.BASE_DIR / 'chunked_uploads')) / str(upload.id)
+
+def part_path(upload, part_number):
+    return upload_dir(upload) / f"{part_number:06d}.part"
+
+def received_parts(upload):
+    """Part numbers already stored on disk, used by clients to resume"""
+    directory = upload_dir(upload)
+    if not directory.exists():
+        return []
+    return sorted(int(path.stem) for path in directory.glob('*.part'))
+
+def write_part(upload, part_number, stream, checksum=None):
+    """Copy one part from the request stream to disk, verifying size and SHA-256"""
+    if not 0 <= part_number < upload.total_parts:
+        raise HttpError(400, f"Part number must be between 0 and {upload.total_parts - 1}")
+
+    expected_size = upload.part_size(part_number)
+    directory = upload_dir(upload)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as tmp:
+        try:
+            while True:
+                data = stream.read(COPY_BUFFER_SIZE)
+                if not data:
+                    break
+                size += len(data)
+                if size > expected_size:
+                    break
+                digest.update(data)
+                tmp.write(data)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+    if size != expected_size:
+        os.unlink(tmp.name)
+        raise HttpError(400, f"Part {part_number} must be exactly {expected_size} bytes")
+    if checksum and checksum.lower() != digest.hexdigest():
+        os.unlink(tmp.name)
+        raise HttpError(400, f"Checksum mismatch for part {part_number}")
+
+    # Atomic rename, a retried part simply replaces the previous attempt
+    os.replace(tmp.name, part_path(upload, part_number))
+    return size, digest.hexdigest()
+
+class AssembledFile(File):
+    """Assembled upload on disk, lets the storage link it instead of copying"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+def assemble_upload(upload):
+    """Concatenate the parts into one file and verify the whole-file checksum
+
+    Returns an open ``AssembledFile``; the caller saves it to the target field,
+    then calls ``remove_assembled`` whatever the outcome and ``discard_upload``
+    once the save succeeded.
+    """
+    missing = set(range(upload.total_parts)) - set(received_parts(upload))
+    if missing:
+        raise HttpError(400, f"Missing parts: {', '.join(map(str, sorted(missing)))}")
+
+    digest = hashlib.sha256()
+    assembled = AssembledFile(
+        tempfile.NamedTemporaryFile(dir=upload_dir(upload), suffix='.assembled', delete=False),
+        name=upload.filename
+    )
+    try:
+        for part_number in range(upload.total_parts):
+            with open(part_path(upload, part_number), 'rb') as part:
+                while True:
+                    data = part.read(COPY_BUFFER_SIZE)
+                    if not data:
+                        break
+                    digest.update(data)
+                    assembled.file.write(data)
+        assembled.file.flush()
+        assembled.file.seek(0)
+
+        if upload.checksum and upload.checksum.lower() != digest.hexdigest():
+            raise HttpError(400, "Checksum mismatch for the assembled file")
+    except BaseException:
+        remove_assembled(assembled)
+        raise
+
+    return assembled
+
+def remove_assembled(assembled):
+    """Close and delete an assembled file, the parts it was built from are kept"""
+    assembled.close()
+    try:
+        os.unlink(assembled.temporary_file_path())
+    except FileNotFoundError:
+        # Moved into place by the storage
+        pass
+
+def discard_upload(upload):
+    """Remove every stored part of an upload"""
+    shutil.rmtree(upload_dir(upload), ignore_errors=True)
@@ -1,4 +1,5 @@
 import re
+from asgiref.sync import sync_to_async
 from django.http import HttpRequest
 from django.utils import timezone
 from datetime import timedelta, date
@@ -10,12 +11,21 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 
 class JWTAuth(HttpBearer):
     def authenticate(self, request, token):
+        # Sub-requests of /batch reuse the user the batch request authenticated
+        batch_user = getattr(request, 'batch_user', None)
+        if batch_user is not None:
+            return batch_user
         validated = JWTAuthentication().authenticate(request)
         if validated is None:
             raise Exception("Invalid token")
         user, _ = validated
         return user
 
+class AsyncJWTAuth(JWTAuth):
+    """JWTAuth for async endpoints, token check and user lookup run in a worker thread"""
+    async def authenticate(self, request, token):
+        return await sync_to_async(super().authenticate)(request, token)
+
 def calculator(a, b, operator):
     if operator == '+':
         return a + b
@@ -144,7 +154,8 @@ def check_content_creation_limit(teacher):
 
 def is_teacher_of_course(user, course):
     """Check if user is the teacher of the course"""
-    return course.teacher == user
+    # Compare ids so the teacher row is not fetched
+    return course.teacher_id == user.pk
 
 def is_member_of_course(user, course):
     """Check if user is a member of the course"""
@@ -0,0 +1,63 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_process_pool = None
+_background_pool = None
+_batch_pool = None
+_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """Get the shared process pool for CPU-bound jobs (created on first use)"""
+    global _process_pool
+    if _process_pool is None:
+        with _pool_lock:
+            if _process_pool is None:
+                max_workers = getattr(settings, 'WORKER_POOL_SIZE', None) or os.cpu_count()
+                _process_pool = ProcessPoolExecutor(max_workers=max_workers)
+    return _process_pool
+
+def get_background_pool():
+    """Get the shared thread pool for background jobs (created on first use)"""
+    global _background_pool
+    if _background_pool is None:
+        with _pool_lock:
+            if _background_pool is None:
+                _background_pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_WORKERS', 4),
+                    thread_name_prefix='lms-background'
+                )
+    return _background_pool
+
+def get_batch_pool():
+    """Get the thread pool that runs concurrent /batch sub-requests (created on first use)"""
+    global _batch_pool
+    if _batch_pool is None:
+        with _pool_lock:
+            if _batch_pool is None:
+                _batch_pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BATCH_WORKERS', 8),
+                    thread_name_prefix='lms-batch'
+                )
+    return _batch_pool
+
+def _run_job(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background job %s failed", func.__name__)
+    finally:
+        # Worker threads keep their own connection, release it between jobs
+        connection.close()
+
+def run_in_background(func, *args, **kwargs):
+    """Run ``func`` in the background pool once the current transaction commits"""
+    transaction.on_commit(
+        lambda: get_background_pool().submit(_run_job, func, args, kwargs)
+    )
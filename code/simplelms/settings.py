@@ -53,6 +53,7 @@ SIMPLE_JWT = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'lms_core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,6 +77,11 @@ NINJA_JWT = {
     'JWT_SECRET_KEY': SECRET_KEY,
 }
 
+# Renderer and parser of the NinjaAPI instance, use 'ninja.renderers.JSONRenderer'
+# and 'ninja.parser.Parser' to fall back to the standard library json module
+API_RENDERER = 'lms_core.renderers.ORJSONRenderer'
+API_PARSER = 'lms_core.renderers.ORJSONParser'
+
 ROOT_URLCONF = 'simplelms.urls'
 
 TEMPLATES = [
@@ -144,11 +150,106 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded media is stored once per distinct content (see lms_core/storage.py),
+# run `python manage.py gc_media_blobs` periodically to remove unused blobs.
+STORAGES = {
+    'default': {
+        'BACKEND': 'lms_core.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Worker pools for CPU-bound jobs (None = one worker per CPU) and background jobs
+WORKER_POOL_SIZE = None
+BACKGROUND_WORKERS = 4
+# Threads running the read sub-requests of /batch concurrently, and the size limit of one batch
+BATCH_WORKERS = 8
+BATCH_MAX_REQUESTS = 20
+
+# Resized variants generated for course images and profile pictures
+IMAGE_VARIANT_FORMAT = 'WEBP'
+IMAGE_VARIANT_QUALITY = 80
+
+# Content attachment downloads. Set FILE_DOWNLOAD_OFFLOAD to 'x-sendfile' (Apache)
+# or 'x-accel-redirect' (nginx, internal location at FILE_DOWNLOAD_ACCEL_PREFIX)
+# to let the web server push the bytes instead of Django.
+FILE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+FILE_DOWNLOAD_OFFLOAD = None
+FILE_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+
+# Resumable chunked uploads, parts are kept here until the upload completes
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'chunked_uploads'
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 ** 3
+
+# Certificates rendered per batch when exporting a whole course
+CERTIFICATE_EXPORT_BATCH_SIZE = 200
+
+# Courses with more contents than this are cloned in the background
+COURSE_CLONE_SYNC_LIMIT = 500
+COURSE_CLONE_BATCH_SIZE = 500
+
+# Feedback per page of list_feedback
+FEEDBACK_PAGE_SIZE = 20
+
+# Rows fetched per round trip when streaming a gradebook export
+GRADEBOOK_CHUNK_SIZE = 2000
+
+# Catalog totals per filter combination, also refreshed when a course is saved or deleted
+CATALOG_COUNT_CACHE_TIMEOUT = 300
+
+# In-process completion matrices used by course statistics
+COMPLETION_MATRIX_TTL = 300
+COMPLETION_MATRIX_MAX_COURSES = 256
+
+# Drop-off funnel cache, also refreshed on every completion write
+FUNNEL_CACHE_TIMEOUT = 3600
+
+# Daily rollups (rollup_daily_stats): rows younger than the settle delay wait for the next run,
+# keep it above the longest write transaction or rows committed later are never counted
+ROLLUP_SETTLE_SECONDS = 60
+ROLLUP_BATCH_SIZE = 500
+ROLLUP_MAX_DAYS = 366
+
+# Co-enrollment recommendations (build_course_recommendations)
+RECOMMENDATION_TOP_K = 20
+RECOMMENDATION_MIN_COMMON_STUDENTS = 2
+RECOMMENDATION_BLOCK_SIZE = 1000
+RECOMMENDATION_CACHE_TIMEOUT = 3600
+
+# Delta sync: tokens older than the tombstone retention get 410, overlap covers late commits
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+SYNC_OVERLAP_SECONDS = 5
+
+# Home feed page cache (also expires when the next scheduled item is released)
+FEED_CACHE_TIMEOUT = 300
+FEED_MAX_LIMIT = 100
+
+# Live course events (SSE), replace the broker for multi-process deployments
+EVENT_BROKER = 'lms_core.events.InProcessBroker'
+EVENT_QUEUE_SIZE = 100
+EVENT_HEARTBEAT_SECONDS = 15
+EVENT_RETRY_MS = 5000
+
+# Response compression, encodings in server preference order (br/zstd need their packages)
+COMPRESSION_ENCODINGS = ['zstd', 'br', 'gzip']
+COMPRESSION_MIN_SIZE = 1024
+# Responses on these paths are compressed once at a high level and kept in the cache;
+# list only bodies many clients share, per-user bodies would pay the level without a hit
+COMPRESSION_CACHE_PATHS = [
+    r'^/api/v1/courses$',
+    r'^/api/v1/categories$',
+]
+COMPRESSION_CACHE_LEVELS = {'zstd': 19, 'br': 11, 'gzip': 9}
+COMPRESSION_CACHE_TIMEOUT = 60 * 60
+
 try:
     from .local_settings import *
 except: